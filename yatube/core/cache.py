@@ -0,0 +1,305 @@
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import pickle
+import shutil
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+logger = logging.getLogger(__name__)
+
+# Заголовок слота: состояние, хэш ключа, срок жизни (0 - бессрочно),
+# время последнего обращения и длина значения.
+SLOT_HEADER = struct.Struct('<B16sddI')
+EMPTY = 0
+USED = 1
+# Значение лежит в отдельном файле, слот хранит только заголовок.
+LARGE = 2
+# Счетчики больших значений хранятся в самом кэше и общие для процессов.
+STATS_KEY = 'core:cache:stats:{}'
+STATS = ('large', 'rejected')
+
+
+class SharedMemoryCache(BaseCache):
+    """Кэш в отображенном в память файле, общий для процессов на хосте.
+
+    Файл LOCATION разбит на SLOTS слотов по SLOT_SIZE байт, сгруппированных
+    в наборы по WAYS слотов. Ключ попадает в набор по хэшу, внутри набора
+    вытесняется давно не использованный или просроченный слот, поэтому
+    размер кэша ограничен размером файла. Доступ к набору защищен
+    блокировкой диапазона файла (между процессами) и блокировкой потоков
+    (внутри процесса).
+
+    Значение, не помещающееся в слот, пишется в отдельный файл каталога
+    LOCATION.large, а слот хранит его заголовок: файл живет и вытесняется
+    вместе со слотом. Значения больше MAX_VALUE_SIZE байт не кэшируются;
+    такие отказы пишутся в лог и считаются в stats().
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.path = location
+        self.slot_size = int(options.get('SLOT_SIZE', 4096))
+        self.ways = int(options.get('WAYS', 8))
+        self.sets = max(int(options.get('SLOTS', 4096)) // self.ways, 1)
+        self.size = self.sets * self.ways * self.slot_size
+        self.max_value = self.slot_size - SLOT_HEADER.size
+        self.max_large_value = int(
+            options.get('MAX_VALUE_SIZE', 8 * 1024 * 1024)
+        )
+        self.large_path = f'{location}.large'
+        self._lock = threading.RLock()
+        self._map = None
+
+    def _mmap(self):
+        if self._map is None:
+            with self._lock:
+                if self._map is None:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+                    if os.fstat(fd).st_size < self.size:
+                        os.ftruncate(fd, self.size)
+                    self._fd = fd
+                    self._map = mmap.mmap(fd, self.size)
+        return self._map
+
+    def _digest(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+    def _set_of(self, digest):
+        return int.from_bytes(digest[:8], 'little') % self.sets
+
+    @contextmanager
+    def _locked(self, set_index):
+        """Блокировка набора слотов для потоков и процессов."""
+        start = set_index * self.ways * self.slot_size
+        length = self.ways * self.slot_size
+        with self._lock:
+            data = self._mmap()
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, length, start)
+            try:
+                yield data
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, length, start)
+
+    def _slots(self, set_index):
+        first = set_index * self.ways
+        return [
+            (first + way) * self.slot_size for way in range(self.ways)
+        ]
+
+    def _find(self, data, digest, now):
+        """Смещение живого слота ключа в наборе или None."""
+        for offset in self._slots(self._set_of(digest)):
+            state, slot_digest, expires, _, _ = SLOT_HEADER.unpack_from(
+                data, offset
+            )
+            if state == EMPTY or slot_digest != digest:
+                continue
+            if expires and expires <= now:
+                self._free(data, offset)
+                return None
+            return offset
+        return None
+
+    def _file(self, digest):
+        return os.path.join(self.large_path, digest.hex())
+
+    def _free(self, data, offset):
+        """Освобождает слот вместе с файлом большого значения."""
+        if data[offset] == LARGE:
+            digest = SLOT_HEADER.unpack_from(data, offset)[1]
+            try:
+                os.unlink(self._file(digest))
+            except FileNotFoundError:
+                pass
+        data[offset] = EMPTY
+
+    def _victim(self, data, digest, now):
+        """Слот для записи: тот же ключ, свободный или давно не нужный."""
+        oldest = None
+        oldest_used = None
+        for offset in self._slots(self._set_of(digest)):
+            state, slot_digest, expires, used, _ = SLOT_HEADER.unpack_from(
+                data, offset
+            )
+            if state == EMPTY or slot_digest == digest:
+                return offset
+            if expires and expires <= now:
+                return offset
+            if oldest_used is None or used < oldest_used:
+                oldest, oldest_used = offset, used
+        return oldest
+
+    def _read(self, data, offset, now):
+        """Значение слота; для пропавшего файла слот освобождается."""
+        state, digest, expires, _, length = SLOT_HEADER.unpack_from(
+            data, offset
+        )
+        if state == LARGE:
+            try:
+                with open(self._file(digest), 'rb') as large:
+                    value = large.read()
+            except FileNotFoundError:
+                data[offset] = EMPTY
+                raise KeyError(digest)
+        else:
+            start = offset + SLOT_HEADER.size
+            value = data[start:start + length]
+        SLOT_HEADER.pack_into(
+            data, offset, state, digest, expires, now, length
+        )
+        return pickle.loads(value)
+
+    def _write(self, data, offset, digest, value, expires, now):
+        """Пишет значение в свободный слот или в файл рядом с кэшем."""
+        state = USED
+        if len(value) > self.max_value:
+            state = LARGE
+            os.makedirs(self.large_path, exist_ok=True)
+            path = self._file(digest)
+            temporary = f'{path}.{os.getpid()}.tmp'
+            with open(temporary, 'wb') as large:
+                large.write(value)
+            os.replace(temporary, path)
+        else:
+            start = offset + SLOT_HEADER.size
+            data[start:start + len(value)] = value
+        SLOT_HEADER.pack_into(
+            data, offset, state, digest, expires, now, len(value)
+        )
+
+    def _count(self, name):
+        key = STATS_KEY.format(name)
+        if not self.add(key, 1, timeout=None):
+            try:
+                self.incr(key)
+            except ValueError:
+                pass
+
+    def stats(self):
+        """Сколько значений записано в файлы и сколько не закэшировано."""
+        return {name: self.get(STATS_KEY.format(name), 0) for name in STATS}
+
+    def _expires(self, timeout):
+        expires = self.get_backend_timeout(timeout)
+        return 0 if expires is None else expires
+
+    def _store(self, key, value, timeout, version, only_new):
+        digest = self._digest(key, version)
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._locked(self._set_of(digest)) as data:
+            offset = self._find(data, digest, now)
+            if only_new and offset is not None:
+                return False
+            rejected = len(value) > self.max_large_value
+            if not rejected:
+                if offset is None:
+                    offset = self._victim(data, digest, now)
+                self._free(data, offset)
+                self._write(
+                    data, offset, digest, value, self._expires(timeout), now
+                )
+            elif offset is not None:
+                self._free(data, offset)
+        # Счетчики лежат в других наборах: блокировка набора уже снята.
+        if rejected:
+            logger.warning(
+                'Значение ключа %s (%s байт) больше MAX_VALUE_SIZE и '
+                'не закэшировано', key, len(value)
+            )
+            self._count('rejected')
+            return False
+        if len(value) > self.max_value:
+            self._count('large')
+        return True
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._store(key, value, timeout, version, only_new=True)
+
+    def get(self, key, default=None, version=None):
+        digest = self._digest(key, version)
+        now = time.time()
+        with self._locked(self._set_of(digest)) as data:
+            offset = self._find(data, digest, now)
+            if offset is None:
+                return default
+            try:
+                return self._read(data, offset, now)
+            except KeyError:
+                return default
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._store(key, value, timeout, version, only_new=False)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        digest = self._digest(key, version)
+        now = time.time()
+        with self._locked(self._set_of(digest)) as data:
+            offset = self._find(data, digest, now)
+            if offset is None:
+                return False
+            state, _, _, used, length = SLOT_HEADER.unpack_from(
+                data, offset
+            )
+            SLOT_HEADER.pack_into(
+                data, offset, state, digest, self._expires(timeout), used,
+                length
+            )
+            return True
+
+    def delete(self, key, version=None):
+        digest = self._digest(key, version)
+        with self._locked(self._set_of(digest)) as data:
+            offset = self._find(data, digest, time.time())
+            if offset is None:
+                return False
+            self._free(data, offset)
+            return True
+
+    def incr(self, key, delta=1, version=None):
+        """Атомарно для всех процессов увеличивает число в кэше."""
+        digest = self._digest(key, version)
+        now = time.time()
+        with self._locked(self._set_of(digest)) as data:
+            offset = self._find(data, digest, now)
+            if offset is None:
+                raise ValueError(f"Key '{key}' not found")
+            _, _, expires, _, _ = SLOT_HEADER.unpack_from(data, offset)
+            try:
+                value = self._read(data, offset, now) + delta
+            except KeyError:
+                raise ValueError(f"Key '{key}' not found")
+            self._free(data, offset)
+            self._write(
+                data, offset, digest,
+                pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires, now
+            )
+            return value
+
+    def clear(self):
+        with self._lock:
+            data = self._mmap()
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.size, 0)
+            try:
+                for offset in range(0, self.size, self.slot_size):
+                    data[offset] = EMPTY
+                shutil.rmtree(self.large_path, ignore_errors=True)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.size, 0)
+
+    def close(self, **kwargs):
+        # Отображение живет все время работы процесса.
+        pass
@@ -0,0 +1,23 @@
+from django.utils.module_loading import import_string
+
+
+def lazy_view(path, **initkwargs):
+    """View, модуль которой импортируется при первом запросе к ней.
+
+    path - путь к функции или классу view; для класса вызывается
+    as_view(**initkwargs). Так редко используемые страницы не
+    замедляют запуск процесса и загрузку URLconf.
+    """
+    view = None
+
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            target = import_string(path)
+            if isinstance(target, type):
+                target = target.as_view(**initkwargs)
+            view = target
+        return view(request, *args, **kwargs)
+
+    wrapper.lazy_path = path
+    return wrapper
@@ -0,0 +1,112 @@
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.cache import SharedMemoryCache
+
+
+# Размеры значений: счетчик, фрагмент ленты, тело страницы и часть
+# карты сайта.
+SIZES = (200, 4000, 60000, 600000)
+# Объем, который пишется для одного размера значения.
+TOTAL_BYTES = 50 * 1024 * 1024
+
+
+def make_backends(directory):
+    params = {'TIMEOUT': 300, 'OPTIONS': {'MAX_ENTRIES': 100000}}
+    return {
+        'locmem': LocMemCache('benchmark', params),
+        'filebased': FileBasedCache(
+            os.path.join(directory, 'filebased'), params
+        ),
+        # Настройки как в settings.py при YATUBE_SHARED_CACHE.
+        'shared': SharedMemoryCache(
+            os.path.join(directory, 'shared.cache'),
+            {'TIMEOUT': 300, 'OPTIONS': {'SLOTS': 65536, 'SLOT_SIZE': 16384}}
+        ),
+    }
+
+
+def make_value(size):
+    """Строка похожая на HTML страницы, а не на повтор одного символа."""
+    item = '<article class="card"><p>Запись {}</p></article>\n'
+    value = ''
+    number = 0
+    while len(value) < size:
+        value += item.format(number)
+        number += 1
+    return value[:size]
+
+
+def worker(cache, number, workers, keys, value, barrier, results):
+    """Пишет свою часть ключей, затем читает все ключи."""
+    for key in range(number, keys, workers):
+        cache.set(f'key:{key}', value)
+    barrier.wait()
+    hits = sum(
+        cache.get(f'key:{key}') is not None for key in range(keys)
+    )
+    results.put(hits)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает LocMemCache, FileBasedCache и SharedMemoryCache на '
+        'значениях разного размера: скорость операций и долю попаданий '
+        'между процессами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keys', type=int, default=5000)
+        parser.add_argument('--workers', type=int, default=4)
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        context = multiprocessing.get_context('fork')
+        for size in SIZES:
+            value = make_value(size)
+            keys = min(options['keys'], max(TOTAL_BYTES // size, workers))
+            self.stdout.write(f'Значения по {size} байт, ключей: {keys}')
+            self.run(context, keys, workers, value)
+
+    def run(self, context, keys, workers, value):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, cache in make_backends(directory).items():
+                cache.clear()
+                start = time.perf_counter()
+                for key in range(keys):
+                    cache.set(f'key:{key}', value)
+                set_time = time.perf_counter() - start
+                start = time.perf_counter()
+                for key in range(keys):
+                    cache.get(f'key:{key}')
+                get_time = time.perf_counter() - start
+                cache.clear()
+                barrier = context.Barrier(workers)
+                results = context.Queue()
+                processes = [
+                    context.Process(
+                        target=worker,
+                        args=(
+                            cache, number, workers, keys, value, barrier,
+                            results
+                        )
+                    )
+                    for number in range(workers)
+                ]
+                for process in processes:
+                    process.start()
+                hits = sum(results.get() for _ in processes)
+                for process in processes:
+                    process.join()
+                self.stdout.write(
+                    f'{name:10} set: {keys / set_time:10.0f} оп/с  '
+                    f'get: {keys / get_time:10.0f} оп/с  '
+                    f'попадания между процессами: '
+                    f'{hits / (keys * workers):.0%}'
+                )
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+
+from core.prefork import (PreforkServer, cache_templates, connect_databases,
+                          warmup)
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает HTTP-сервер с предварительно прогретым приложением '
+        'и несколькими рабочими процессами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'addrport', nargs='?', default='127.0.0.1:8000',
+            help='Адрес и порт, по умолчанию 127.0.0.1:8000.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Количество рабочих процессов.'
+        )
+        parser.add_argument(
+            '--max-requests', type=int, default=1000,
+            help='Сколько запросов обслуживает процесс до перезапуска.'
+        )
+
+    def handle(self, *args, **options):
+        host, _, port = options['addrport'].rpartition(':')
+        if not port.isdigit():
+            raise CommandError('Укажите адрес в виде host:port')
+        start = time.perf_counter()
+        application = get_wsgi_application()
+        cache_templates()
+        templates = warmup()
+        self.stdout.write(
+            f'Приложение загружено за '
+            f'{(time.perf_counter() - start) * 1000:.0f} мс, '
+            f'шаблонов скомпилировано: {templates}'
+        )
+        server = PreforkServer(
+            application,
+            host=host or '127.0.0.1',
+            port=int(port),
+            workers=options['workers'],
+            max_requests=options['max_requests'],
+            on_worker_start=connect_databases,
+        )
+        server.bind()
+        self.stdout.write(
+            f'Сервер слушает http://{server.host}:{server.port}/, '
+            f'рабочих процессов: {server.workers}'
+        )
+        server.run()
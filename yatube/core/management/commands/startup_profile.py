@@ -0,0 +1,82 @@
+import json
+import os
+import re
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand
+
+# Скрипт выполняется в отдельном интерпретаторе, чтобы все модули
+# импортировались с нуля, как при запуске WSGI-процесса.
+PROFILE_SCRIPT = '''
+import json
+import time
+
+start = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+urlconf = time.perf_counter()
+print(json.dumps({
+    'django.setup()': setup - start,
+    'URLconf': urlconf - setup,
+}))
+'''
+IMPORTTIME_RE = re.compile(
+    r'import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \| '
+    r'(?P<indent>\s*)(?P<module>\S+)'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает стоимость импорта модулей при django.setup() '
+        'и загрузке URLconf.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=30,
+            help='Сколько самых дорогих модулей показать.'
+        )
+        parser.add_argument(
+            '--sort', choices=('self', 'cumulative'), default='cumulative',
+            help='Сортировка по собственному или суммарному времени.'
+        )
+        parser.add_argument(
+            '--prefix', default='',
+            help='Показывать только модули с этим префиксом.'
+        )
+
+    def handle(self, *args, **options):
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROFILE_SCRIPT],
+            cwd=os.getcwd(), env=env, capture_output=True, text=True,
+            check=True
+        )
+        phases = json.loads(result.stdout.strip().splitlines()[-1])
+        modules = []
+        for line in result.stderr.splitlines():
+            match = IMPORTTIME_RE.match(line)
+            if match and match['module'].startswith(options['prefix']):
+                modules.append((
+                    int(match['self']), int(match['cumulative']),
+                    match['module']
+                ))
+        position = 0 if options['sort'] == 'self' else 1
+        modules.sort(key=lambda module: module[position], reverse=True)
+        for phase, seconds in phases.items():
+            self.stdout.write(f'{phase:20} {seconds * 1000:8.1f} мс')
+        self.stdout.write(
+            f'Импортировано модулей: {len(modules)}, '
+            f'всего {sum(module[0] for module in modules) / 1000:.1f} мс'
+        )
+        self.stdout.write(f'{"собств., мс":>12} {"всего, мс":>10}  модуль')
+        for own, cumulative, module in modules[:options['top']]:
+            self.stdout.write(
+                f'{own / 1000:12.1f} {cumulative / 1000:10.1f}  {module}'
+            )
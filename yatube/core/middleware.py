@@ -0,0 +1,47 @@
+import time
+from math import ceil
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from core.ratelimit import TokenBucket, client_ip
+
+
+class RateLimitMiddleware:
+    """Ограничивает частоту запросов к страницам из settings.RATELIMITS.
+
+    Проверка выполняется до вызова view по IP-адресу клиента и по
+    пользователю. Токены забираются только если их хватает во всех
+    корзинах, иначе сразу отдается 429 без валидации формы и запросов
+    к базе записей.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in settings.RATELIMIT_METHODS:
+            return None
+        view_name = request.resolver_match.view_name
+        rate = settings.RATELIMITS.get(view_name)
+        if rate is None:
+            return None
+        keys = [f'{view_name}:ip:{client_ip(request)}']
+        if request.user.is_authenticated:
+            keys.append(f'{view_name}:user:{request.user.pk}')
+        buckets = [TokenBucket(key, rate) for key in keys]
+        now = time.time()
+        wait = max(bucket.wait(now) for bucket in buckets)
+        if wait:
+            response = HttpResponse(
+                'Слишком много запросов, попробуйте позже',
+                status=429
+            )
+            response['Retry-After'] = ceil(wait)
+            return response
+        for bucket in buckets:
+            bucket.consume(now)
+        return None
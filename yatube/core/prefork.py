@@ -0,0 +1,209 @@
+import logging
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer
+from django.db import connections
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+CACHED_LOADER = 'django.template.loaders.cached.Loader'
+# Пауза перед перезапуском упавшего рабочего процесса удваивается
+# с каждым падением подряд, но не превышает MAX_RESPAWN_DELAY.
+RESPAWN_DELAY = 0.5
+MAX_RESPAWN_DELAY = 30
+
+
+def _django_engines():
+    return [
+        engine.engine for engine in engines.all()
+        if isinstance(engine, DjangoTemplates)
+    ]
+
+
+def _cached(engine):
+    return (
+        len(engine.loaders) == 1
+        and isinstance(engine.loaders[0], (list, tuple))
+        and engine.loaders[0][0] == CACHED_LOADER
+    )
+
+
+def templates_cached():
+    """Все ли шаблонизаторы Django хранят скомпилированные шаблоны."""
+    return all(_cached(engine) for engine in _django_engines())
+
+
+def cache_templates():
+    """Оборачивает загрузчики шаблонов в кэширующий загрузчик.
+
+    При DEBUG=True Django его не включает, и каждый запрос заново
+    читает и компилирует шаблоны, поэтому прогрев был бы бесполезен.
+    Изменения шаблонов после этого видны только после перезапуска.
+    """
+    for engine in _django_engines():
+        if _cached(engine):
+            continue
+        engine.loaders = [(CACHED_LOADER, engine.loaders)]
+        engine.__dict__.pop('template_loaders', None)
+
+
+def warmup():
+    """Готовит процесс к запросам до того, как он начнет их принимать.
+
+    Заполняет кэши URL-резолвера и компилирует все шаблоны из каталогов
+    TEMPLATES. Возвращает количество скомпилированных шаблонов. Без
+    кэширующего загрузчика (cache_templates) шаблоны не сохраняются.
+    """
+    if not templates_cached():
+        logger.warning(
+            'Шаблоны не кэшируются, прогрев шаблонов ничего не даст'
+        )
+    resolver = get_resolver()
+    resolver.url_patterns
+    resolver.reverse_dict
+    for namespace in resolver.namespace_dict:
+        resolver.namespace_dict[namespace][1].reverse_dict
+    compiled = 0
+    for options in settings.TEMPLATES:
+        for directory in options.get('DIRS', ()):
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    if not name.endswith(('.html', '.txt', '.xml')):
+                        continue
+                    get_template(os.path.relpath(
+                        os.path.join(root, name), directory
+                    ))
+                    compiled += 1
+    return compiled
+
+
+def connect_databases():
+    """Открывает соединения со всеми базами в рабочем процессе."""
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        logger.info(format, *args)
+
+
+class PreforkServer:
+    """HTTP-сервер с ведущим процессом и рабочими процессами.
+
+    Ведущий процесс загружает приложение, прогревает его и открывает
+    сокет, затем порождает workers рабочих процессов через fork. Каждый
+    рабочий процесс открывает соединения с базой, обслуживает не более
+    max_requests запросов и завершается, а ведущий процесс запускает
+    вместо него новый. Упавший процесс перезапускается с паузой.
+    """
+
+    def __init__(self, application, host='127.0.0.1', port=8000,
+                 workers=2, max_requests=1000, on_worker_start=None):
+        self.application = application
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_requests = max_requests
+        self.on_worker_start = on_worker_start
+        self.children = set()
+        self.running = False
+        self.socket = None
+        self.respawn_delay = 0
+
+    def bind(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((self.host, self.port))
+        self.socket.listen(128)
+        self.port = self.socket.getsockname()[1]
+        return self.port
+
+    def make_server(self):
+        server = WSGIServer(
+            (self.host, self.port), QuietWSGIRequestHandler,
+            bind_and_activate=False
+        )
+        server.socket = self.socket
+        server.server_name = socket.getfqdn(self.host)
+        server.server_port = self.port
+        server.setup_environ()
+        server.set_app(self.application)
+        return server
+
+    def serve_worker(self):
+        """Цикл рабочего процесса."""
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        if self.on_worker_start is not None:
+            self.on_worker_start()
+        server = self.make_server()
+        for _ in range(self.max_requests):
+            server.handle_request()
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self.serve_worker()
+            except Exception:
+                logger.exception('Рабочий процесс упал')
+                code = 1
+            finally:
+                os._exit(code)
+        self.children.add(pid)
+        return pid
+
+    def stop(self, *args):
+        self.running = False
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        """Запускает рабочие процессы и перезапускает завершившиеся."""
+        if self.socket is None:
+            self.bind()
+        # Соединения не должны переходить из ведущего процесса в рабочие.
+        connections.close_all()
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.workers):
+            self.spawn()
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            self.children.discard(pid)
+            if not self.running:
+                continue
+            if os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0:
+                self.respawn_delay = 0
+            else:
+                self.respawn_delay = min(
+                    max(self.respawn_delay * 2, RESPAWN_DELAY),
+                    MAX_RESPAWN_DELAY
+                )
+                logger.warning(
+                    'Рабочий процесс %s завершился с ошибкой, перезапуск '
+                    'через %s с', pid, self.respawn_delay
+                )
+                time.sleep(self.respawn_delay)
+            if self.running:
+                self.spawn()
+        self.socket.close()
@@ -0,0 +1,72 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    """Разбирает частоту вида '10/m' в (емкость, токенов в секунду)."""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / PERIODS[period]
+
+
+def client_ip(request):
+    """Возвращает адрес клиента с учетом доверенных прокси.
+
+    X-Forwarded-For читается только когда запрос пришел от прокси из
+    settings.RATELIMIT_TRUSTED_PROXIES: адреса перебираются справа
+    налево, и первый не доверенный считается адресом клиента. Иначе
+    заголовок может подделать сам клиент, поэтому берется REMOTE_ADDR.
+    """
+    trusted = settings.RATELIMIT_TRUSTED_PROXIES
+    address = request.META.get('REMOTE_ADDR')
+    if address not in trusted:
+        return address
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    for hop in reversed(forwarded.split(',')):
+        hop = hop.strip()
+        if not hop:
+            continue
+        address = hop
+        if hop not in trusted:
+            break
+    return address
+
+
+class TokenBucket:
+    """Корзина токенов, состояние которой хранится в общем кэше.
+
+    В кэше лежит пара (токены, время обновления). Токены пополняются
+    непрерывно со скоростью refill до емкости capacity, каждый запрос
+    забирает один токен. Чтение и запись не атомарны, поэтому при
+    одновременных запросах корзина может пропустить лишний запрос,
+    зато проверка стоит одно чтение и одну запись в кэш.
+    """
+
+    def __init__(self, key, rate, cache=None):
+        self.key = f'ratelimit:{key}'
+        self.capacity, self.refill = parse_rate(rate)
+        self.cache = cache or caches[settings.RATELIMIT_CACHE]
+
+    def _tokens(self, now):
+        tokens, updated = self.cache.get(self.key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated) * self.refill)
+
+    def wait(self, now=None):
+        """Возвращает 0 или секунды до следующего токена, не забирая его."""
+        now = time.time() if now is None else now
+        tokens = self._tokens(now)
+        return 0 if tokens >= 1 else (1 - tokens) / self.refill
+
+    def consume(self, now=None):
+        """Забирает токен; возвращает 0 или секунды до следующего токена."""
+        now = time.time() if now is None else now
+        tokens = self._tokens(now)
+        if tokens < 1:
+            return (1 - tokens) / self.refill
+        timeout = int(self.capacity / self.refill) + 1
+        self.cache.set(self.key, (tokens - 1, now), timeout)
+        return 0
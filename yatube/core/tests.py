@@ -0,0 +1,322 @@
+import os
+import shutil
+import signal
+import tempfile
+import time
+import urllib.request
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template import engines
+from django.template.loader import get_template
+from django.test import (Client, RequestFactory, TestCase,
+                         override_settings)
+from django.urls import resolve, reverse
+
+from core.cache import SharedMemoryCache
+from core.lazy import lazy_view
+from core import prefork
+from core.prefork import PreforkServer, cache_templates, warmup
+from core.ratelimit import TokenBucket, client_ip, parse_rate
+from posts.models import Post
+
+User = get_user_model()
+
+
+class TokenBucketTests(TestCase):
+    """Класс тестирования корзины токенов."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('120/m'), (120, 2))
+
+    def test_bucket_refills(self):
+        bucket = TokenBucket('test', '2/s', cache)
+        self.assertEqual(bucket.consume(now=100), 0)
+        self.assertEqual(bucket.consume(now=100), 0)
+        self.assertAlmostEqual(bucket.consume(now=100), 0.5)
+        self.assertEqual(bucket.consume(now=100.5), 0)
+
+    def test_wait_keeps_tokens(self):
+        bucket = TokenBucket('test', '1/s', cache)
+        self.assertEqual(bucket.wait(now=100), 0)
+        self.assertEqual(bucket.wait(now=100), 0)
+        self.assertEqual(bucket.consume(now=100), 0)
+        self.assertAlmostEqual(bucket.wait(now=100), 1)
+
+    @override_settings(RATELIMIT_TRUSTED_PROXIES=('10.0.0.1', '10.0.0.2'))
+    def test_client_ip(self):
+        """X-Forwarded-For учитывается только от доверенных прокси."""
+        factory = RequestFactory()
+        cases = (
+            ('1.1.1.1', '', '1.1.1.1'),
+            ('1.1.1.1', '2.2.2.2', '1.1.1.1'),
+            ('10.0.0.1', '', '10.0.0.1'),
+            ('10.0.0.1', '2.2.2.2', '2.2.2.2'),
+            ('10.0.0.1', '3.3.3.3, 2.2.2.2, 10.0.0.2', '2.2.2.2'),
+        )
+        for remote, forwarded, expected in cases:
+            with self.subTest(remote=remote, forwarded=forwarded):
+                request = factory.get(
+                    '/', REMOTE_ADDR=remote,
+                    HTTP_X_FORWARDED_FOR=forwarded
+                )
+                self.assertEqual(client_ip(request), expected)
+
+
+@override_settings(RATELIMITS={'posts:post_create': '2/m'})
+class RateLimitMiddlewareTests(TestCase):
+    """Класс тестирования ограничения частоты запросов."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Метод с фикстурами."""
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        """Метод с фикстурами."""
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(RateLimitMiddlewareTests.user)
+
+    def test_post_create_limited(self):
+        """После исчерпания токенов запись не создается, ответ 429."""
+        url = reverse('posts:post_create')
+        for i in range(2):
+            self.client.post(url, {'text': f'Пост {i}'})
+        with self.assertNumQueries(2):
+            response = self.client.post(url, {'text': 'Лишний пост'})
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(response.has_header('Retry-After'))
+        self.assertEqual(Post.objects.count(), 2)
+
+    @override_settings(RATELIMIT_TRUSTED_PROXIES=('127.0.0.1',))
+    def test_clients_behind_proxy_not_shared(self):
+        """За доверенным прокси у каждого клиента своя корзина."""
+        url = reverse('posts:post_create')
+        anonymous = Client()
+        for _ in range(2):
+            anonymous.post(url, HTTP_X_FORWARDED_FOR='1.1.1.1')
+        response = anonymous.post(url, HTTP_X_FORWARDED_FOR='1.1.1.1')
+        self.assertEqual(response.status_code, 429)
+        response = self.client.post(
+            url, {'text': 'Пост'}, HTTP_X_FORWARDED_FOR='2.2.2.2'
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_rejected_request_keeps_ip_tokens(self):
+        """Отказ по корзине пользователя не тратит токены IP-адреса."""
+        url = reverse('posts:post_create')
+        for i in range(2):
+            self.client.post(url, {'text': f'Пост {i}'})
+        other = User.objects.create_user(username='other')
+        other_client = Client()
+        other_client.force_login(other)
+        cache.delete('ratelimit:posts:post_create:ip:127.0.0.1')
+        self.assertEqual(
+            self.client.post(url, {'text': 'Лишний'}).status_code, 429
+        )
+        for i in range(2):
+            response = other_client.post(url, {'text': f'Другой {i}'})
+            self.assertEqual(response.status_code, 302)
+
+    def test_get_not_limited(self):
+        url = reverse('posts:post_create')
+        for _ in range(3):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class SharedMemoryCacheTests(TestCase):
+    """Класс тестирования кэша в общей памяти."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache')
+        self.cache = self.make_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_cache(self, **options):
+        options = {'SLOTS': 64, 'WAYS': 4, 'SLOT_SIZE': 256, **options}
+        return SharedMemoryCache(self.path, {'OPTIONS': options})
+
+    def test_basic_operations(self):
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.assertFalse(self.cache.add('key', 2))
+        self.assertTrue(self.cache.add('other', 2))
+        self.assertEqual(self.cache.incr('other', 5), 7)
+        self.assertTrue(self.cache.delete('key'))
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('other'))
+
+    def test_expiry_and_large_values(self):
+        self.cache.set('short', 1, timeout=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get('short'))
+
+    def test_large_values(self):
+        """Большое значение лежит в файле, слишком большое отклоняется."""
+        cache = self.make_cache(MAX_VALUE_SIZE=100000)
+        page = '<article>Текст записи</article>' * 1500
+        cache.set('page', page)
+        self.assertEqual(cache.get('page'), page)
+        self.assertEqual(len(os.listdir(cache.large_path)), 1)
+        cache.set('page', 'маленькое')
+        self.assertEqual(cache.get('page'), 'маленькое')
+        self.assertEqual(os.listdir(cache.large_path), [])
+        with self.assertLogs('core.cache', 'WARNING'):
+            cache.set('huge', 'x' * 200000)
+        self.assertIsNone(cache.get('huge'))
+        self.assertEqual(cache.stats(), {'large': 1, 'rejected': 1})
+
+    def test_large_values_evicted_with_slot(self):
+        # Один набор: два больших значения и счетчик stats().
+        cache = self.make_cache(SLOTS=3, WAYS=3)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key * 1000)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('c'), 'c' * 1000)
+        self.assertEqual(len(os.listdir(cache.large_path)), 2)
+        cache.clear()
+        self.assertFalse(os.path.exists(cache.large_path))
+
+    def test_lru_eviction(self):
+        """В полном наборе вытесняется давно не использованный ключ."""
+        cache = self.make_cache(SLOTS=2, WAYS=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_shared_between_processes(self):
+        """Значения и инкременты видны другим процессам."""
+        self.cache.set('counter', 0)
+        pids = []
+        for _ in range(4):
+            pid = os.fork()
+            if pid == 0:
+                cache = self.make_cache()
+                for _ in range(50):
+                    cache.incr('counter')
+                os._exit(0)
+            pids.append(pid)
+        for pid in pids:
+            os.waitpid(pid, 0)
+        self.assertEqual(self.make_cache().get('counter'), 200)
+
+
+class LazyViewTests(TestCase):
+    """Класс тестирования отложенного импорта view."""
+
+    def test_auth_views_are_lazy(self):
+        """Маршруты ведут на обертки, страницы при этом работают."""
+        for name in ('users:login', 'password_reset', 'about:author'):
+            with self.subTest(name=name):
+                url = reverse(name)
+                self.assertTrue(hasattr(resolve(url).func, 'lazy_path'))
+                self.assertEqual(Client().get(url).status_code, 200)
+
+    def test_unknown_path_fails_on_first_call(self):
+        view = lazy_view('about.views.MissingView')
+        with self.assertRaises(ImportError):
+            view(None)
+
+
+def pid_app(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [str(os.getpid()).encode()]
+
+
+class PreforkServerTests(TestCase):
+    """Класс тестирования сервера с рабочими процессами."""
+
+    def test_warmup_compiles_templates(self):
+        self.assertGreater(warmup(), 10)
+
+    def test_cache_templates(self):
+        """После cache_templates шаблон компилируется один раз."""
+        engine = engines['django'].engine
+        loaders = engine.loaders
+        try:
+            # Как при DEBUG=True: загрузчики без кэша.
+            engine.loaders = [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]
+            engine.__dict__.pop('template_loaders', None)
+            self.assertIsNot(
+                get_template('posts/index.html').template,
+                get_template('posts/index.html').template
+            )
+            with self.assertLogs('core.prefork', 'WARNING'):
+                warmup()
+            cache_templates()
+            warmup()
+            self.assertIs(
+                get_template('posts/index.html').template,
+                get_template('posts/index.html').template
+            )
+        finally:
+            engine.loaders = loaders
+            engine.__dict__.pop('template_loaders', None)
+
+    def test_crashed_worker_respawn_delayed(self):
+        """Упавший процесс перезапускается с растущей паузой."""
+        server = PreforkServer(pid_app, port=0, workers=1)
+        server.socket = mock.Mock()
+        pids = iter(range(1, 10))
+        statuses = [(1, 256), (2, 256), (3, 256), (4, 0), (5, 256)]
+
+        def spawn():
+            server.children.add(next(pids))
+
+        def wait():
+            if not statuses:
+                server.running = False
+                raise ChildProcessError
+            return statuses.pop(0)
+
+        with mock.patch.object(server, 'spawn', spawn), \
+                mock.patch('core.prefork.os.wait', wait), \
+                mock.patch('core.prefork.signal.signal'), \
+                mock.patch('core.prefork.time.sleep') as sleep:
+            server.run()
+        delay = prefork.RESPAWN_DELAY
+        self.assertEqual(
+            [call.args[0] for call in sleep.call_args_list],
+            [delay, delay * 2, delay * 4, delay]
+        )
+
+    def test_workers_are_recycled(self):
+        """Рабочий процесс заменяется после max_requests запросов."""
+        server = PreforkServer(pid_app, port=0, workers=1, max_requests=2)
+        port = server.bind()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                server.run()
+            finally:
+                os._exit(0)
+        server.socket.close()
+        try:
+            url = f'http://127.0.0.1:{port}/'
+            pids = [
+                urllib.request.urlopen(url, timeout=5).read()
+                for _ in range(4)
+            ]
+        finally:
+            os.kill(pid, signal.SIGTERM)
+            os.waitpid(pid, 0)
+        self.assertEqual(pids[0], pids[1])
+        self.assertEqual(pids[2], pids[3])
+        self.assertNotEqual(pids[0], pids[2])
@@ -1,6 +1,26 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
 
-from posts.models import Post, Group
+from posts import bulk
+from posts.models import (
+    ArchivedPost, Comment, Digest, Post, PostSignature, Group, Subscription,
+    User
+)
+
+
+class PostActionForm(ActionForm):
+    """Форма действий над записями с параметрами массовых операций."""
+
+    group = forms.ModelChoiceField(
+        queryset=Group.objects.all(),
+        required=False,
+        label='Группа'
+    )
+    author = forms.CharField(
+        required=False,
+        label='Автор (username)'
+    )
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -11,6 +31,54 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     list_editable = ('group',)
     empty_value_display = '-пусто-'
+    action_form = PostActionForm
+    actions = ('move_to_group', 'reassign_author', 'delete_posts')
+
+    def get_actions(self, request):
+        # Стандартное удаление загружает и удаляет каждую запись отдельно.
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def _report(self, request, template, done):
+        self.message_user(request, template.format(done), messages.SUCCESS)
+
+    def move_to_group(self, request, queryset):
+        """Переносит выбранные записи в группу."""
+        form = self.action_form(request.POST)
+        if not form.is_valid() or form.cleaned_data['group'] is None:
+            self.message_user(request, 'Выберите группу', messages.ERROR)
+            return
+        done = bulk.bulk_update(
+            queryset, group_id=form.cleaned_data['group'].pk
+        )
+        self._report(request, 'Перенесено записей: {}', done)
+
+    move_to_group.short_description = 'Перенести в группу'
+
+    def reassign_author(self, request, queryset):
+        """Назначает выбранным записям другого автора."""
+        form = self.action_form(request.POST)
+        username = form.data.get('author', '').strip()
+        author = User.objects.filter(username=username).first()
+        if author is None:
+            self.message_user(
+                request, f'Пользователь "{username}" не найден',
+                messages.ERROR
+            )
+            return
+        done = bulk.bulk_update(queryset, author_id=author.pk)
+        self._report(request, 'Передано записей: {}', done)
+
+    reassign_author.short_description = 'Сменить автора'
+
+    def delete_posts(self, request, queryset):
+        """Удаляет выбранные записи пачками."""
+        done = bulk.bulk_delete(queryset)
+        self._report(request, 'Удалено записей: {}', done)
+
+    delete_posts.short_description = 'Удалить выбранные записи'
+    delete_posts.allowed_permissions = ('delete',)
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -19,5 +87,58 @@ class GroupAdmin(admin.ModelAdmin):
     list_display = ('pk', 'title', 'slug', 'description')
 
 
+class CommentAdmin(admin.ModelAdmin):
+    """Модель комментария для отображения его в админ панели."""
+
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    search_fields = ('text',)
+    list_filter = ('created',)
+    raw_id_fields = ('post', 'author', 'parent')
+    empty_value_display = '-пусто-'
+
+
+class ArchivedPostAdmin(admin.ModelAdmin):
+    """Модель архивной записи для отображения ее в админ панели."""
+
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    search_fields = ('text',)
+    list_filter = ('pub_date',)
+    raw_id_fields = ('author', 'group')
+    empty_value_display = '-пусто-'
+
+
+class SubscriptionAdmin(admin.ModelAdmin):
+    """Модель подписки для отображения ее в админ панели."""
+
+    list_display = ('pk', 'user', 'group', 'author')
+    raw_id_fields = ('user', 'group', 'author')
+    empty_value_display = '-пусто-'
+
+
+class DigestAdmin(admin.ModelAdmin):
+    """Модель настройки дайджеста для отображения ее в админ панели."""
+
+    list_display = ('user', 'frequency', 'last_sent')
+    list_filter = ('frequency',)
+    raw_id_fields = ('user',)
+    empty_value_display = '-пусто-'
+
+
+class PostSignatureAdmin(admin.ModelAdmin):
+    """Подпись записи: помеченные копии видны по полю duplicate_of."""
+
+    list_display = ('post', 'duplicate_of')
+    list_select_related = ('post',)
+    fields = ('post', 'duplicate_of')
+    readonly_fields = ('post',)
+    ordering = ('-duplicate_of',)
+    empty_value_display = '-пусто-'
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(ArchivedPost, ArchivedPostAdmin)
+admin.site.register(Subscription, SubscriptionAdmin)
+admin.site.register(Digest, DigestAdmin)
+admin.site.register(PostSignature, PostSignatureAdmin)
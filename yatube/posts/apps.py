@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from posts import signals  # noqa: F401
+        from posts.sharding import check_configuration
+        check_configuration()
@@ -0,0 +1,141 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from posts.models import ArchivedPost, Post, PostMonthCount
+
+SCOPE_ALL = 'all'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def post_scopes(author_id, group_id):
+    """Области, в которые попадает запись."""
+    scopes = [SCOPE_ALL, author_scope(author_id)]
+    if group_id:
+        scopes.append(group_scope(group_id))
+    return scopes
+
+
+def month_of(pub_date):
+    pub_date = timezone.localtime(pub_date)
+    return pub_date.year, pub_date.month
+
+
+def change_count(scopes, year, month, delta):
+    """Изменяет счетчики областей за месяц на delta."""
+    for scope in scopes:
+        counters = PostMonthCount.objects.filter(
+            scope=scope, year=year, month=month
+        )
+        if counters.update(count=F('count') + delta) or delta < 0:
+            continue
+        try:
+            with transaction.atomic():
+                PostMonthCount.objects.create(
+                    scope=scope, year=year, month=month, count=delta
+                )
+        except IntegrityError:
+            counters.update(count=F('count') + delta)
+
+
+def month_changes(rows, values=None):
+    """Изменения счетчиков после массовой операции над строками записей.
+
+    rows - кортежи (pk, author_id, group_id, pub_date) до операции,
+    values - новые значения полей или None, если записи удалены.
+    Возвращает Counter {(область, год, месяц): изменение}.
+    """
+    changes = Counter()
+    for _, author_id, group_id, pub_date in rows:
+        year, month = month_of(pub_date)
+        for scope in post_scopes(author_id, group_id):
+            changes[scope, year, month] -= 1
+        if values is None:
+            continue
+        year, month = month_of(values.get('pub_date', pub_date))
+        for scope in post_scopes(
+            values.get('author_id', author_id),
+            values.get('group_id', group_id)
+        ):
+            changes[scope, year, month] += 1
+    return changes
+
+
+def apply_month_changes(changes):
+    """Применяет изменения из month_changes, пропуская нулевые."""
+    for (scope, year, month), delta in changes.items():
+        if delta:
+            change_count([scope], year, month, delta)
+
+
+def _monthly_counts(**filters):
+    """Количество записей по месяцам в горячей и архивной таблицах."""
+    counts = Counter()
+    for model in (Post, ArchivedPost):
+        rows = model.objects.filter(**filters).annotate(
+            year=ExtractYear('pub_date'), month=ExtractMonth('pub_date')
+        ).order_by().values('year', 'month').annotate(count=Count('pk'))
+        for row in rows:
+            counts[row['year'], row['month']] += row['count']
+    return [
+        {'year': year, 'month': month, 'count': count}
+        for (year, month), count in counts.items()
+    ]
+
+
+def _replace_scope(scope, rows):
+    PostMonthCount.objects.filter(scope=scope).delete()
+    PostMonthCount.objects.bulk_create(
+        PostMonthCount(
+            scope=scope, year=row['year'], month=row['month'],
+            count=row['count']
+        )
+        for row in rows
+    )
+
+
+def recount(author_ids=(), group_ids=()):
+    """Пересчитывает счетчики указанных авторов и групп.
+
+    Полный пересчет для команды recount_archive; массовые операции
+    меняют счетчики на разницу, см. month_changes. Считаются только
+    записи этих авторов и групп по индексам
+    author_id и group_id в горячей и архивной таблицах. Общая лента
+    складывается из счетчиков авторов, так как у каждой записи ровно
+    один автор.
+    """
+    with transaction.atomic():
+        for author_id in author_ids:
+            _replace_scope(
+                author_scope(author_id), _monthly_counts(author_id=author_id)
+            )
+        for group_id in group_ids:
+            _replace_scope(
+                group_scope(group_id), _monthly_counts(group_id=group_id)
+            )
+        if author_ids:
+            _replace_scope(
+                SCOPE_ALL,
+                PostMonthCount.objects.filter(
+                    scope__startswith='author:', count__gt=0
+                ).order_by().values('year', 'month').annotate(
+                    count=Sum('count')
+                )
+            )
+
+
+def month_counts(scope, year):
+    """Счетчики записей области по месяцам года."""
+    return PostMonthCount.objects.filter(
+        scope=scope, year=year, count__gt=0
+    ).order_by('month')
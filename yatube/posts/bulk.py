@@ -0,0 +1,129 @@
+import logging
+
+from django.db import models, router, transaction
+
+from posts import archive, related
+from posts.models import Post
+from posts.signals import posts_bulk_changed
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+
+
+def iter_chunks(queryset, chunk_size=CHUNK_SIZE):
+    """Отдает (pk, author_id, group_id, pub_date) записей пачками по pk.
+
+    Используется keyset-проход по pk, поэтому изменение уже обработанных
+    строк не влияет на следующие пачки.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last_pk).values_list(
+                'pk', 'author_id', 'group_id', 'pub_date'
+            )[:chunk_size]
+        )
+        if not rows:
+            return
+        yield rows
+        last_pk = rows[-1][0]
+
+
+def _collect_ids(rows, **values):
+    """Собирает затронутые id записей, авторов и групп."""
+    post_ids = [pk for pk, *_ in rows]
+    author_ids = {author_id for _, author_id, *_ in rows}
+    group_ids = {group_id for _, _, group_id, _ in rows if group_id}
+    if values.get('author_id'):
+        author_ids.add(values['author_id'])
+    if values.get('group_id'):
+        group_ids.add(values['group_id'])
+    return post_ids, author_ids, group_ids
+
+
+def raw_delete(model, pks, using):
+    """Удаляет строки модели одним DELETE вместе с зависимыми строками.
+
+    Модели, таблиц которых в базе using нет (например, таблицы auth
+    в шарде), пропускаются.
+    """
+    for field in model._meta.get_fields(include_hidden=True):
+        if not (
+            field.auto_created and not field.concrete
+            and (field.one_to_many or field.one_to_one)
+            and router.allow_migrate_model(using, field.related_model)
+        ):
+            continue
+        related = field.related_model._base_manager.using(using).filter(
+            **{f'{field.field.name}__in': pks}
+        )
+        on_delete = field.on_delete
+        if on_delete is models.CASCADE:
+            related_pks = list(related.values_list('pk', flat=True))
+            if related_pks:
+                raw_delete(field.related_model, related_pks, using)
+        elif on_delete is models.SET_NULL:
+            related.update(**{field.field.name: None})
+        elif on_delete is models.PROTECT and related.exists():
+            raise models.ProtectedError(
+                f'Записи связаны с {field.related_model._meta.verbose_name}',
+                related
+            )
+    model._base_manager.using(using).filter(pk__in=pks)._raw_delete(using)
+
+
+def bulk_update(queryset, progress=None, chunk_size=CHUNK_SIZE, **values):
+    """Изменяет записи пачками UPDATE-запросов.
+
+    После каждой пачки отправляет сигнал posts_bulk_changed, чтобы
+    производные данные (счетчики, кэши) остались согласованными.
+    Возвращает количество измененных записей.
+    """
+    done = 0
+    for rows in iter_chunks(queryset, chunk_size):
+        post_ids, author_ids, group_ids = _collect_ids(rows, **values)
+        with transaction.atomic(using=queryset.db):
+            Post.objects.using(queryset.db).filter(
+                pk__in=post_ids
+            ).update(**values)
+        posts_bulk_changed.send(
+            sender=Post,
+            post_ids=post_ids,
+            author_ids=author_ids,
+            group_ids=group_ids,
+            deleted=False,
+            month_changes=archive.month_changes(rows, values),
+            using=queryset.db,
+        )
+        done += len(post_ids)
+        logger.info('Изменено записей: %s', done)
+        if progress is not None:
+            progress(done)
+    return done
+
+
+def bulk_delete(queryset, progress=None, chunk_size=CHUNK_SIZE):
+    """Удаляет записи пачками DELETE-запросов без загрузки объектов."""
+    done = 0
+    for rows in iter_chunks(queryset, chunk_size):
+        post_ids, author_ids, group_ids = _collect_ids(rows)
+        referrer_ids = related.referrers(queryset.db, post_ids)
+        with transaction.atomic(using=queryset.db):
+            raw_delete(Post, post_ids, queryset.db)
+        posts_bulk_changed.send(
+            sender=Post,
+            post_ids=post_ids,
+            author_ids=author_ids,
+            group_ids=group_ids,
+            deleted=True,
+            month_changes=archive.month_changes(rows),
+            referrer_ids=referrer_ids,
+            using=queryset.db,
+        )
+        done += len(post_ids)
+        logger.info('Удалено записей: %s', done)
+        if progress is not None:
+            progress(done)
+    return done
@@ -0,0 +1,127 @@
+import math
+import random
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'posts:version:{}'
+
+
+def get_version(scope):
+    """Версия области: время последнего изменения ее записей.
+
+    Если версии в кэше нет, она заводится заново, и все закэшированное
+    по старой версии просто перестает использоваться.
+    """
+    key = VERSION_KEY.format(scope)
+    version = cache.get(key)
+    if version is None:
+        version = time.time()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_versions(scopes):
+    """Отмечает изменение записей в областях."""
+    version = time.time()
+    cache.set_many(
+        {VERSION_KEY.format(scope): version for scope in scopes}, None
+    )
+
+
+def post_scope(post_id):
+    """Область страницы одной записи: сама запись и ее комментарии."""
+    return f'post:{post_id}'
+
+
+# Сколько считается свежим вычисленное значение, сколько после этого
+# хранится устаревшее и сколько живет блокировка пересчета, секунды.
+FRESH_TIMEOUT = 60 * 5
+STALE_TIMEOUT = 60 * 60
+LOCK_TIMEOUT = 30
+# Сколько ждут чужого пересчета, если отдать нечего.
+WAIT_TIMEOUT = 0.5
+WAIT_STEP = 0.02
+# Чем больше BETA, тем раньше до истечения начинается пересчет.
+BETA = 1.0
+METRICS_KEY = 'posts:coalesce:{}'
+METRICS = ('hit', 'miss', 'stale', 'early', 'served_stale', 'waited',
+           'wait_timeout')
+
+
+def record(event):
+    """Увеличивает счетчик события в общем кэше."""
+    key = METRICS_KEY.format(event)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Ключ вытеснили между add() и incr().
+        cache.add(key, 1, None)
+
+
+def get_metrics():
+    return {
+        event: cache.get(METRICS_KEY.format(event), 0) for event in METRICS
+    }
+
+
+def _expired(entry, version, now):
+    """Пора ли пересчитывать значение.
+
+    Значение из другой версии устарело сразу. Свежее значение иногда
+    пересчитывается заранее (XFetch): чем ближе истечение и чем дольше
+    считалось значение, тем вероятнее, что пересчет начнет один из
+    запросов, пока у остальных еще есть что отдать.
+    """
+    value, entry_version, expires, delta = entry
+    if entry_version != version:
+        return 'stale'
+    if now >= expires:
+        return 'stale'
+    if now - delta * BETA * math.log(random.random() or 1e-12) >= expires:
+        return 'early'
+    return None
+
+
+def get_or_compute(key, compute, version, timeout=FRESH_TIMEOUT):
+    """Значение из кэша, которое пересчитывает только один процесс.
+
+    Промах, устаревшую версию или раннее обновление обрабатывает тот,
+    кто первым взял блокировку через cache.add(). Остальные отдают
+    устаревшее значение, а если его нет - недолго ждут результата и
+    только потом считают сами.
+    """
+    now = time.time()
+    entry = cache.get(key)
+    reason = 'miss' if entry is None else _expired(entry, version, now)
+    if reason is None:
+        record('hit')
+        return entry[0]
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        record(reason)
+        try:
+            start = time.time()
+            value = compute()
+            end = time.time()
+            cache.set(
+                key, (value, version, end + timeout, end - start),
+                timeout + STALE_TIMEOUT
+            )
+        finally:
+            cache.delete(lock_key)
+        return value
+    if entry is not None:
+        record('served_stale')
+        return entry[0]
+    deadline = now + WAIT_TIMEOUT
+    while time.time() < deadline:
+        time.sleep(WAIT_STEP)
+        entry = cache.get(key)
+        if entry is not None:
+            record('waited')
+            return entry[0]
+    record('wait_timeout')
+    return compute()
@@ -0,0 +1,130 @@
+import datetime
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404
+from django.utils import timezone
+
+from posts import archive
+from posts.bulk import raw_delete
+from posts.cache import bump_versions, post_scope
+from posts.models import ArchivedPost, Post
+from posts.sharding import find_post
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_FIELDS = (
+    'pk', 'text', 'pub_date', 'author_id', 'group_id', 'text_html', 'excerpt'
+)
+
+
+def archive_cutoff(days=None):
+    """Дата, старше которой записи переносятся в архив."""
+    if days is None:
+        days = settings.POSTS_ARCHIVE_AFTER_DAYS
+    return timezone.now() - datetime.timedelta(days=days)
+
+
+def archivable(cutoff):
+    """Записи, которые можно перенести в архив.
+
+    Записи с комментариями остаются в горячей таблице: комментарии
+    ссылаются на posts_post.
+    """
+    return Post.objects.filter(
+        pub_date__lt=cutoff, comments__isnull=True
+    ).order_by('pk')
+
+
+def archive_posts(cutoff, batch_size=1000, progress=None):
+    """Переносит записи старше cutoff в архивную таблицу пачками.
+
+    Каждая пачка копируется и удаляется из posts_post в одной
+    транзакции, сигналы моделей не отправляются: запись остается
+    доступной по тому же адресу, а счетчики архива по месяцам
+    учитывают обе таблицы.
+    """
+    done = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                archivable(cutoff).values_list(*ARCHIVED_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            ArchivedPost.objects.bulk_create(
+                ArchivedPost(**dict(zip(ARCHIVED_FIELDS, row)))
+                for row in rows
+            )
+            raw_delete(Post, [row[0] for row in rows], Post.objects.db)
+        # Записи ушли из горячих лент: их закэшированные страницы
+        # устарели.
+        scopes = {archive.SCOPE_ALL}
+        for pk, _, _, author_id, group_id, *_ in rows:
+            scopes.update(archive.post_scopes(author_id, group_id))
+            scopes.add(post_scope(pk))
+        bump_versions(scopes)
+        done += len(rows)
+        logger.info('Перенесено в архив записей: %s', done)
+        if progress is not None:
+            progress(done)
+    return done
+
+
+def get_post_or_404(pk):
+    """Запись из горячей таблицы, а если ее там нет - из архива."""
+    post = find_post(pk) or find_post(pk, ArchivedPost)
+    if post is None:
+        raise Http404('Запись не найдена')
+    return post
+
+
+class ChainedPosts:
+    """Записи горячей таблицы, за которыми идут записи архива.
+
+    Поддерживает count() и срезы, поэтому подходит для Paginator.
+    Срез читает только нужные строки: из горячей таблицы, а дальше из
+    архива со смещением на число горячих записей. Старые записи с
+    комментариями остаются в горячей таблице и показываются перед
+    архивом, а не среди архивных записей своей даты.
+    """
+
+    ordered = True
+
+    def __init__(self, hot, cold):
+        self.hot = hot.order_by('-pub_date', '-pk')
+        self.cold = cold.order_by('-pub_date', '-pk')
+        self._hot_count = None
+        self._count = None
+
+    def hot_count(self):
+        if self._hot_count is None:
+            self._hot_count = self.hot.count()
+        return self._hot_count
+
+    def count(self):
+        if self._count is None:
+            self._count = self.hot_count() + self.cold.count()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            if item < 0:
+                raise IndexError('Отрицательные индексы не поддерживаются')
+            result = self[item:item + 1]
+            if not result:
+                raise IndexError(item)
+            return result[0]
+        start, stop = item.start or 0, item.stop
+        hot_count = self.hot_count()
+        posts = list(self.hot[start:stop]) if start < hot_count else []
+        if stop is None or stop > hot_count:
+            posts += self.cold[
+                max(start - hot_count, 0):
+                None if stop is None else stop - hot_count
+            ]
+        return posts
@@ -0,0 +1,162 @@
+import datetime
+from collections import defaultdict
+
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.template.loader import get_template, render_to_string
+
+from posts.models import Digest, Post, Subscription
+
+PERIODS = {
+    Digest.DAILY: datetime.timedelta(days=1),
+    Digest.WEEKLY: datetime.timedelta(weeks=1),
+}
+# Запас на неровный запуск по расписанию.
+SLACK = datetime.timedelta(hours=1)
+DIGEST_LIMIT = 20
+CHUNK_SIZE = 500
+BATCH_SIZE = 100
+# Ограничение длины списка в pk__in, чтобы не упереться в лимит
+# параметров SQLite.
+IN_LIMIT = 500
+
+
+def due_digests(frequency, now):
+    """Дайджесты, которые пора отправить."""
+    return Digest.objects.filter(frequency=frequency).filter(
+        Q(last_sent__isnull=True)
+        | Q(last_sent__lte=now - PERIODS[frequency] + SLACK)
+    ).exclude(user__email='')
+
+
+def iter_chunks(digests, chunk_size=CHUNK_SIZE):
+    """Пачки получателей по возрастанию user_id без OFFSET."""
+    rows = digests.order_by('user_id').values_list(
+        'user_id', 'user__username', 'user__email', 'last_sent'
+    )
+    last_id = 0
+    while True:
+        chunk = list(rows.filter(user_id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1][0]
+
+
+def select_posts(chunk, digests, now, period):
+    """Записи для каждого получателя пачки.
+
+    Подписки и новые записи читаются двумя запросами на всю пачку:
+    пачка - непрерывный диапазон user_id, поэтому подписки выбираются
+    по диапазону, а записи - подзапросом к ним. Возвращает словарь
+    user_id -> pk не более DIGEST_LIMIT новых записей.
+    """
+    first_id, last_id = chunk[0][0], chunk[-1][0]
+    since = {
+        user_id: last_sent or now - period
+        for user_id, _, _, last_sent in chunk
+    }
+    subscriptions = Subscription.objects.filter(
+        user_id__gte=first_id,
+        user_id__lte=last_id,
+        user_id__in=digests.values('user_id'),
+    )
+    by_group = defaultdict(list)
+    by_author = defaultdict(list)
+    for user_id, group_id, author_id in subscriptions.values_list(
+        'user_id', 'group_id', 'author_id'
+    ):
+        if user_id not in since:
+            continue
+        if group_id is not None:
+            by_group[group_id].append(user_id)
+        else:
+            by_author[author_id].append(user_id)
+    selected = defaultdict(list)
+    if not by_group and not by_author:
+        return selected
+    posts = Post.objects.filter(
+        Q(group_id__in=subscriptions.values('group_id'))
+        | Q(author_id__in=subscriptions.values('author_id')),
+        pub_date__gt=min(since.values()),
+        pub_date__lte=now,
+    ).order_by('-pub_date', '-pk').values_list(
+        'pk', 'group_id', 'author_id', 'pub_date'
+    )
+    for pk, group_id, author_id, pub_date in posts.iterator():
+        readers = set(by_group.get(group_id, ()))
+        readers.update(by_author.get(author_id, ()))
+        for user_id in readers:
+            if (
+                pub_date > since[user_id]
+                and len(selected[user_id]) < DIGEST_LIMIT
+            ):
+                selected[user_id].append(pk)
+    return selected
+
+
+def render_items(post_ids, site_url=''):
+    """Текст каждой записи дайджеста, один раз на пачку."""
+    post_ids = list(post_ids)
+    items = {}
+    for start in range(0, len(post_ids), IN_LIMIT):
+        posts = Post.objects.filter(
+            pk__in=post_ids[start:start + IN_LIMIT]
+        ).select_related('author', 'group').only(
+            'pk', 'excerpt', 'pub_date', 'author__username', 'group__title'
+        ).order_by()
+        for post in posts:
+            items[post.pk] = render_to_string(
+                'posts/email/digest_item.txt',
+                {'post': post, 'site_url': site_url}
+            )
+    return items
+
+
+def build_messages(chunk, selected, items, template):
+    return [
+        EmailMessage(
+            subject='Новые записи на Yatube',
+            body=template.render({
+                'username': username,
+                'items': [items[pk] for pk in selected[user_id]
+                          if pk in items],
+            }),
+            to=[email],
+        )
+        for user_id, username, email, _ in chunk
+        if selected.get(user_id)
+    ]
+
+
+def send_digests(frequency, now, site_url='', chunk_size=CHUNK_SIZE,
+                 batch_size=BATCH_SIZE, progress=None):
+    """Отправляет дайджесты всем, кому пора, пачками пользователей.
+
+    В памяти одновременно держится только одна пачка: ее подписки,
+    номера записей и готовые письма. Письма уходят в почтовый бэкенд
+    по batch_size через одно соединение.
+    """
+    period = PERIODS[frequency]
+    digests = due_digests(frequency, now)
+    template = get_template('posts/email/digest.txt')
+    users = sent = 0
+    with get_connection() as connection:
+        for chunk in iter_chunks(digests, chunk_size):
+            selected = select_posts(chunk, digests, now, period)
+            items = render_items(
+                {pk for post_ids in selected.values() for pk in post_ids},
+                site_url
+            )
+            messages = build_messages(chunk, selected, items, template)
+            for start in range(0, len(messages), batch_size):
+                sent += connection.send_messages(
+                    messages[start:start + batch_size]
+                ) or 0
+            digests.filter(
+                user_id__gte=chunk[0][0], user_id__lte=chunk[-1][0]
+            ).update(last_sent=now)
+            users += len(chunk)
+            if progress is not None:
+                progress(users, sent)
+    return users, sent
@@ -0,0 +1,171 @@
+import random
+import re
+import struct
+import zlib
+
+from django.db import transaction
+
+from posts.models import PostSignature, SignatureBand
+from posts.sharding import shards
+
+# numpy необязателен: без него подпись считается на чистом Python.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Подпись из NUM_PERM минимумов делится на BANDS полос по ROWS значений.
+# Записи с похожестью s попадают в общую полосу с вероятностью
+# 1 - (1 - s ** ROWS) ** BANDS: почти наверняка при s = 0.7, с
+# вероятностью 0.23 при s = 0.3 и 0.05 при s = 0.2.
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+MIN_SHINGLES = 5
+# Оценка доли общих шинглов, начиная с которой запись считается копией.
+THRESHOLD = 0.7
+# Сколько кандидатов из общих полос проверяется в одном шарде.
+MAX_CANDIDATES = 50
+# Сколько шинглов за раз обрабатывает векторная версия.
+NUMPY_BLOCK = 4096
+
+PRIME = (1 << 31) - 1
+_random = random.Random(20240229)
+A = [_random.randrange(1, PRIME) for _ in range(NUM_PERM)]
+B = [_random.randrange(0, PRIME) for _ in range(NUM_PERM)]
+PACK = struct.Struct(f'<{NUM_PERM}I')
+WORD_RE = re.compile(r'\w+')
+
+
+def shingles(text):
+    """Хэши троек соседних слов текста."""
+    words = WORD_RE.findall(text.lower())
+    return {
+        zlib.crc32(' '.join(words[i:i + SHINGLE_SIZE]).encode()) % PRIME
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def _signature_python(hashes):
+    return [
+        min((a * x + b) % PRIME for x in hashes) for a, b in zip(A, B)
+    ]
+
+
+def _signature_numpy(hashes):
+    # a и x меньше 2 ** 31, поэтому a * x + b помещается в uint64.
+    # Все операнды uint64: смешение с int приводило бы к float64.
+    a = numpy.array(A, dtype=numpy.uint64)[:, None]
+    b = numpy.array(B, dtype=numpy.uint64)[:, None]
+    prime = numpy.uint64(PRIME)
+    values = numpy.fromiter(hashes, dtype=numpy.uint64, count=len(hashes))
+    result = numpy.full(NUM_PERM, PRIME, dtype=numpy.uint64)
+    for start in range(0, len(values), NUMPY_BLOCK):
+        block = values[None, start:start + NUMPY_BLOCK]
+        numpy.minimum(
+            result, ((a * block + b) % prime).min(axis=1), out=result
+        )
+    return result.tolist()
+
+
+def signature(text, vectorized=None):
+    """MinHash-подпись текста или None, если текст слишком короткий.
+
+    При установленном numpy подпись считается матричными операциями;
+    результат совпадает с версией на чистом Python.
+    """
+    hashes = shingles(text)
+    if len(hashes) < MIN_SHINGLES:
+        return None
+    if vectorized is None:
+        vectorized = numpy is not None
+    if vectorized:
+        return _signature_numpy(hashes)
+    return _signature_python(hashes)
+
+
+def band_keys(sig):
+    """Ключи полос: номер полосы в старших битах, хэш полосы в младших."""
+    packed = PACK.pack(*sig)
+    size = ROWS * 4
+    return [
+        band << 32 | zlib.crc32(packed[band * size:(band + 1) * size])
+        for band in range(BANDS)
+    ]
+
+
+def similarity(first, second):
+    """Оценка доли общих шинглов по двум подписям."""
+    return sum(x == y for x, y in zip(first, second)) / NUM_PERM
+
+
+def find_duplicates(sig, exclude=None, before=None):
+    """Записи с похожими подписями: [(похожесть, id записи)].
+
+    В каждом шарде это один запрос: по индексу ключей полос берутся
+    не больше MAX_CANDIDATES самых новых подписей, и только они
+    сравниваются целиком. Индекс читается по всем совпавшим ключам,
+    поэтому для большого кластера копий запрос дороже, но загружается
+    и сравнивается все равно не больше MAX_CANDIDATES подписей.
+    """
+    if sig is None:
+        return []
+    keys = band_keys(sig)
+    found = []
+    for using in shards():
+        bands = SignatureBand.objects.using(using).filter(key__in=keys)
+        if exclude is not None:
+            bands = bands.exclude(signature_id=exclude)
+        if before is not None:
+            bands = bands.filter(signature_id__lt=before)
+        candidates = bands.order_by('-signature_id').values_list(
+            'signature_id', flat=True
+        ).distinct()[:MAX_CANDIDATES]
+        for post_id, packed in PostSignature.objects.using(using).filter(
+            pk__in=candidates
+        ).values_list('pk', 'signature'):
+            score = similarity(sig, PACK.unpack(bytes(packed)))
+            if score >= THRESHOLD:
+                found.append((score, post_id))
+    return sorted(found, reverse=True)
+
+
+def index_posts(posts, created=False):
+    """Пересчитывает подписи и полосы пачки записей одного шарда.
+
+    Запись, похожая на более раннюю, помечается в duplicate_of.
+    """
+    posts = list(posts)
+    if not posts:
+        return
+    using = posts[0]._state.db
+    signatures = {}
+    for post in posts:
+        sig = signature(post.text)
+        if sig is not None:
+            signatures[post.pk] = sig
+    with transaction.atomic(using=using):
+        if not created:
+            PostSignature.objects.using(using).filter(
+                pk__in=[post.pk for post in posts]
+            ).delete()
+        rows = PostSignature.objects.using(using).bulk_create(
+            PostSignature(post_id=pk, signature=PACK.pack(*sig))
+            for pk, sig in signatures.items()
+        )
+        SignatureBand.objects.using(using).bulk_create(
+            SignatureBand(signature_id=pk, key=key)
+            for pk, sig in signatures.items()
+            for key in band_keys(sig)
+        )
+        flagged = []
+        for row in rows:
+            found = find_duplicates(signatures[row.pk], before=row.pk)
+            if found:
+                row.duplicate_of = found[0][1]
+                flagged.append(row)
+        if flagged:
+            PostSignature.objects.using(using).bulk_update(
+                flagged, ['duplicate_of']
+            )
@@ -0,0 +1,188 @@
+import hashlib
+import time
+
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date, quote_etag
+from django.utils.text import Truncator
+
+from posts import archive
+from posts.cache import get_version
+from posts.groups import get_group_or_404
+from posts.models import Group, Post, User
+
+FEED_LIMIT = 20
+# Версия области меняется только в кэше процесса, изменившего записи,
+# если кэш не общий, поэтому лента перестраивается не реже, чем раз в
+# FEED_TIMEOUT секунд.
+FEED_TIMEOUT = 60 * 5
+FEED_KEY = 'posts:feed:{}:{}:{}'
+
+
+class LatestPostsFeed(Feed):
+    """Лента последних записей сайта."""
+
+    title = 'Yatube: последние записи'
+    description = 'Последние обновления на сайте'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def get_posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj=None):
+        return self.get_posts(obj).select_related(
+            'author', 'group'
+        )[:FEED_LIMIT]
+
+    def item_title(self, item):
+        return Truncator(item.text).chars(50)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return [item.group.title] if item.group else []
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    """Лента последних записей группы."""
+
+    def get_object(self, request, slug):
+        return get_group_or_404(slug)
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_posts', args=[obj.slug])
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    """Лента последних записей автора."""
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Yatube: записи {obj.username}'
+
+    def description(self, obj):
+        return f'Последние записи пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', args=[obj.username])
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+FEEDS = {
+    'rss': (LatestPostsFeed(), GroupPostsFeed(), AuthorPostsFeed()),
+    'atom': (
+        LatestPostsAtomFeed(), GroupPostsAtomFeed(), AuthorPostsAtomFeed()
+    ),
+}
+
+
+def _get_feed(kind, position):
+    if kind not in FEEDS:
+        raise Http404('Нет такого формата ленты')
+    return FEEDS[kind][position]
+
+
+def _cached_feed(request, kind, feed, scope, **kwargs):
+    """Отдает ленту из кэша по версии области с поддержкой условного GET.
+
+    Пока в области нет изменений, ответ не требует запросов к записям:
+    304 отдается по ETag/Last-Modified, а тело ленты берется из кэша.
+    ETag считается по содержимому ленты, поэтому перестроенная лента
+    без изменений не сбрасывает кэш клиентов.
+    """
+    key = FEED_KEY.format(kind, scope, get_version(scope))
+    cached = cache.get(key)
+    if cached is None:
+        generated = feed(request, **kwargs)
+        digest = hashlib.md5(generated.content).hexdigest()
+        cached = (
+            generated.content, generated['Content-Type'],
+            quote_etag(f'{kind}-{digest}'), int(time.time())
+        )
+        cache.set(key, cached, FEED_TIMEOUT)
+    content, content_type, etag, last_modified = cached
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        return response
+    response = HttpResponse(content, content_type=content_type)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def index_feed(request, kind):
+    """Лента последних записей сайта."""
+    return _cached_feed(request, kind, _get_feed(kind, 0), archive.SCOPE_ALL)
+
+
+def group_feed(request, kind, slug):
+    """Лента последних записей группы."""
+    group_id = get_object_or_404(
+        Group.objects.values_list('pk', flat=True), slug=slug
+    )
+    return _cached_feed(
+        request, kind, _get_feed(kind, 1), archive.group_scope(group_id),
+        slug=slug
+    )
+
+
+def author_feed(request, kind, username):
+    """Лента последних записей автора."""
+    author_id = get_object_or_404(
+        User.objects.values_list('pk', flat=True), username=username
+    )
+    return _cached_feed(
+        request, kind, _get_feed(kind, 2), archive.author_scope(author_id),
+        username=username
+    )
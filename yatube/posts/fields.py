@@ -0,0 +1,84 @@
+import zlib
+
+from django.db import models
+
+RAW = b'\x00'
+ZLIB = b'\x01'
+
+
+class CompressedTextField(models.TextField):
+    """Текстовое поле, которое хранит длинные значения сжатыми zlib.
+
+    В базе значение лежит двоичной строкой: первый байт - способ
+    хранения, дальше UTF-8 или сжатые данные. Тексты короче min_length
+    байт и те, что не сжимаются, хранятся как есть. Для форм, админки
+    и шаблонов значение - обычная строка; поиск по подстроке в сжатых
+    значениях невозможен.
+    """
+
+    def __init__(self, *args, min_length=1024, level=6, **kwargs):
+        self.min_length = min_length
+        self.level = level
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.min_length != 1024:
+            kwargs['min_length'] = self.min_length
+        if self.level != 6:
+            kwargs['level'] = self.level
+        return name, path, args, kwargs
+
+    def db_type(self, connection):
+        return connection.data_types['BinaryField']
+
+    def compress(self, value):
+        data = value.encode()
+        if len(data) >= self.min_length:
+            packed = zlib.compress(data, self.level)
+            if len(packed) < len(data):
+                return ZLIB + packed
+        return RAW + data
+
+    @staticmethod
+    def decompress(value):
+        if isinstance(value, str):
+            # Строка, записанная до перехода на сжатие.
+            return value
+        value = bytes(value)
+        if value[:1] == ZLIB:
+            return zlib.decompress(value[1:]).decode()
+        return value[1:].decode()
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if value is None:
+            return None
+        return connection.Database.Binary(self.compress(value))
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return self.decompress(value)
+
+
+def recompress(queryset, field_names, batch_size=1000, progress=None):
+    """Перезаписывает поля пачками, чтобы применить формат хранения.
+
+    Подходит и для строк, оставшихся текстом после смены типа столбца,
+    и для пересжатия после изменения min_length.
+    """
+    queryset = queryset.only('pk', *field_names).order_by('pk')
+    last_pk = 0
+    done = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not chunk:
+            return done
+        queryset.model._base_manager.using(queryset.db).bulk_update(
+            chunk, field_names
+        )
+        last_pk = chunk[-1].pk
+        done += len(chunk)
+        if progress is not None:
+            progress(done)
@@ -1,6 +1,9 @@
 from django import forms
+from django.conf import settings
 
-from posts.models import Post
+from posts import duplicates
+from posts.groups import registry
+from posts.models import Comment, Post
 
 
 class PostForm(forms.ModelForm):
@@ -8,10 +11,30 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Список групп берется из реестра процесса, а не из базы.
+        group = self.fields['group']
+        group.choices = registry.choices(group)
+
     def clean_text(self):
         data = self.cleaned_data['text']
 
         if not data:
             raise forms.ValidationError('Заполните поле text')
+        if settings.POSTS_REJECT_DUPLICATES and duplicates.find_duplicates(
+            duplicates.signature(data), exclude=self.instance.pk
+        ):
+            raise forms.ValidationError(
+                'Почти такая же запись уже опубликована'
+            )
 
         return data
+
+
+class CommentForm(forms.ModelForm):
+    parent = forms.IntegerField(required=False, widget=forms.HiddenInput)
+
+    class Meta:
+        model = Comment
+        fields = ('text',)
@@ -0,0 +1,120 @@
+import datetime
+import heapq
+
+from django.db.models import Q
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from posts.groups import get_group_or_404
+from posts.models import Post, User
+from posts.views import FULL_TEXT_FIELDS, LIMIT
+
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def encode_cursor(post):
+    """Курсор продолжения ленты после записи: микросекунды и pk."""
+    return f'{(post.pub_date - EPOCH) // MICROSECOND}_{post.pk}'
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор, возвращает (pub_date, pk) или None."""
+    try:
+        microseconds, pk = cursor.split('_')
+        return EPOCH + int(microseconds) * MICROSECOND, int(pk)
+    except (ValueError, OverflowError):
+        return None
+
+
+def _after_cursor(posts, position):
+    """Следующие LIMIT + 1 записей после позиции курсора."""
+    if position is not None:
+        pub_date, pk = position
+        posts = posts.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+        )
+    return list(
+        posts.defer(*FULL_TEXT_FIELDS).order_by('-pub_date', '-pk')[
+            :LIMIT + 1
+        ]
+    )
+
+
+def _fragment(request, posts, cold_posts=None, **flags):
+    """Отдает следующую пачку записей ленты после курсора.
+
+    Пачка выбирается по индексу (pub_date, pk) без OFFSET и COUNT,
+    поэтому стоимость не зависит от глубины прокрутки. Архивные записи
+    не обязательно старше горячих (записи с комментариями не
+    архивируются), поэтому обе таблицы читаются после одного курсора и
+    сливаются по (pub_date, pk).
+    """
+    position = None
+    cursor = request.GET.get('cursor')
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            return HttpResponseBadRequest('Неверный курсор')
+    posts = _after_cursor(posts, position)
+    if cold_posts is not None:
+        posts = list(heapq.merge(
+            posts, _after_cursor(cold_posts, position),
+            key=lambda post: (post.pub_date, post.pk), reverse=True
+        ))[:LIMIT + 1]
+    next_cursor = None
+    if len(posts) > LIMIT:
+        posts = posts[:LIMIT]
+        next_cursor = encode_cursor(posts[-1])
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'next_cursor': next_cursor,
+            'posts': [
+                {
+                    'id': post.pk,
+                    'excerpt': post.excerpt,
+                    'pub_date': post.pub_date.isoformat(),
+                    'author': post.author.username,
+                    'group': post.group.slug if post.group else None,
+                    'url': reverse('posts:post_detail', args=[post.pk]),
+                }
+                for post in posts
+            ],
+        })
+    response = HttpResponse(render_to_string(
+        'posts/includes/feed_fragment.html',
+        {'posts': posts, **flags},
+        request
+    ))
+    if next_cursor:
+        response['X-Next-Cursor'] = next_cursor
+    return response
+
+
+def index_fragment(request):
+    """Следующая пачка записей главной страницы."""
+    return _fragment(
+        request, Post.objects.select_related('author', 'group')
+    )
+
+
+def group_fragment(request, slug):
+    """Следующая пачка записей группы."""
+    group = get_group_or_404(slug)
+    return _fragment(
+        request, group.posts.select_related('author', 'group'),
+        hide_group=True
+    )
+
+
+def profile_fragment(request, username):
+    """Следующая пачка записей пользователя."""
+    author = get_object_or_404(User, username=username)
+    return _fragment(
+        request, author.posts.select_related('author', 'group'),
+        author.archived_posts.select_related('author', 'group'),
+        hide_author=True
+    )
@@ -0,0 +1,85 @@
+import threading
+import time
+
+from django.http import Http404
+
+from posts.cache import get_version
+from posts.models import Group
+
+# Область версии для списка групп: меняется при сохранении и удалении
+# любой группы, см. posts.signals.
+SCOPE_GROUPS = 'groups'
+# Если кэш у процессов свой, версию меняет только процесс, изменивший
+# группу; остальные перечитают группы не позже чем через столько секунд.
+REGISTRY_TIMEOUT = 5
+
+
+class GroupRegistry:
+    """Все группы в памяти процесса.
+
+    Групп немного, а нужны они почти на каждой странице: поиск по slug
+    и список в форме записи. Реестр загружает их один раз и перечитывает,
+    когда другой процесс поменял версию SCOPE_GROUPS в общем кэше или
+    прошло REGISTRY_TIMEOUT секунд с загрузки.
+    Возвращаемые объекты общие для всех запросов, менять их нельзя.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._loaded = 0
+        self._groups = ()
+        self._by_slug = {}
+        self._by_pk = {}
+
+    def _fresh(self, version):
+        return (
+            version == self._version
+            and time.monotonic() - self._loaded < REGISTRY_TIMEOUT
+        )
+
+    def _load(self):
+        version = get_version(SCOPE_GROUPS)
+        if self._fresh(version):
+            return
+        with self._lock:
+            if self._fresh(version):
+                return
+            groups = tuple(Group.objects.order_by('pk'))
+            self._by_slug = {group.slug: group for group in groups}
+            self._by_pk = {group.pk: group for group in groups}
+            self._groups = groups
+            self._version = version
+            self._loaded = time.monotonic()
+
+    def all(self):
+        self._load()
+        return self._groups
+
+    def get_by_slug(self, slug):
+        self._load()
+        return self._by_slug.get(slug)
+
+    def get_by_pk(self, pk):
+        self._load()
+        return self._by_pk.get(pk)
+
+    def choices(self, field):
+        """Варианты для ModelChoiceField без запроса к базе."""
+        choices = [
+            (field.prepare_value(group), field.label_from_instance(group))
+            for group in self.all()
+        ]
+        if field.empty_label is not None:
+            choices.insert(0, ('', field.empty_label))
+        return choices
+
+
+registry = GroupRegistry()
+
+
+def get_group_or_404(slug):
+    group = registry.get_by_slug(slug)
+    if group is None:
+        raise Http404('Группа не найдена.')
+    return group
@@ -0,0 +1,96 @@
+import time
+
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import HttpResponseBadRequest, JsonResponse
+
+from posts import archive
+from posts.groups import get_group_or_404
+from posts.models import Post
+
+LATEST_KEY = 'posts:latest:{}'
+# Отметка живет недолго: если кэш у процессов свой или обновление
+# отметки не удалось, через LATEST_TIMEOUT она пересчитается из базы.
+LATEST_TIMEOUT = 5
+# Блокировка обновления отметки и сколько ее ждать, секунды.
+LOCK_TIMEOUT = 1
+LOCK_WAIT = 0.2
+LOCK_STEP = 0.01
+# Через сколько секунд клиенту стоит спросить снова (Retry-After).
+# Сервер не ждет новых записей: ожидающий запрос занимал бы целый
+# рабочий процесс.
+POLL_INTERVAL = 5
+
+
+def _advance(key, post_id):
+    """Поднимает отметку под блокировкой, чтобы она не пошла назад."""
+    lock_key = f'{key}:lock'
+    deadline = time.monotonic() + LOCK_WAIT
+    while not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            # Без блокировки безопаснее сбросить отметку: она
+            # пересчитается из базы.
+            cache.delete(key)
+            return
+        time.sleep(LOCK_STEP)
+    try:
+        current = cache.get(key)
+        if current is None or current < post_id:
+            cache.set(key, post_id, LATEST_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+
+
+def advance(scopes, post_id):
+    """Поднимает отметку новейшей записи в областях до post_id."""
+    for scope in scopes:
+        _advance(LATEST_KEY.format(scope), post_id)
+
+
+def forget(scopes):
+    """Сбрасывает отметки: они пересчитаются из базы при запросе."""
+    cache.delete_many([LATEST_KEY.format(scope) for scope in scopes])
+
+
+def latest(scope, posts):
+    """pk новейшей записи области из кэша, а при промахе - из базы."""
+    key = LATEST_KEY.format(scope)
+    post_id = cache.get(key)
+    if post_id is None:
+        post_id = posts.aggregate(latest=Max('pk'))['latest'] or 0
+        if not cache.add(key, post_id, LATEST_TIMEOUT):
+            post_id = cache.get(key, post_id)
+    return post_id
+
+
+def _new_posts(request, scope, posts):
+    """Есть ли в области записи новее ?since=<pk> и сколько их.
+
+    Если отметка в кэше не новее since, ответ обходится без запросов к
+    базе. Ответ сразу возвращается, а заголовок Retry-After подсказывает
+    клиенту, когда опросить снова.
+    """
+    try:
+        since = int(request.GET['since'])
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest('Нужен параметр since')
+    post_id = latest(scope, posts)
+    count = 0
+    if post_id > since:
+        count = posts.filter(pk__gt=since).count()
+    response = JsonResponse({'latest': post_id, 'count': count})
+    response['Retry-After'] = POLL_INTERVAL
+    return response
+
+
+def index_new(request):
+    """Новые записи на главной странице."""
+    return _new_posts(request, archive.SCOPE_ALL, Post.objects.all())
+
+
+def group_new(request, slug):
+    """Новые записи группы."""
+    group = get_group_or_404(slug)
+    return _new_posts(
+        request, archive.group_scope(group.pk), group.posts.all()
+    )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts.cold_storage import archive_cutoff, archive_posts
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые записи в архивную таблицу пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Возраст записей в днях, по умолчанию '
+                 'settings.POSTS_ARCHIVE_AFTER_DAYS.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество записей в одной транзакции.'
+        )
+
+    def handle(self, *args, **options):
+        done = archive_posts(
+            archive_cutoff(options['days']),
+            batch_size=options['batch_size'],
+            progress=lambda done: self.stdout.write(
+                f'Перенесено записей: {done}'
+            )
+        )
+        self.stdout.write(self.style.SUCCESS(f'Готово, записей: {done}'))
@@ -0,0 +1,16 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from posts.cache import get_metrics
+
+
+class Command(BaseCommand):
+    help = 'Показывает, как часто пересчитывались закэшированные страницы.'
+
+    def handle(self, *args, **options):
+        for event, count in get_metrics().items():
+            self.stdout.write(f'{event:15} {count}')
+        # Общий кэш в памяти считает большие и отклоненные значения.
+        if hasattr(cache, 'stats'):
+            for event, count in cache.stats().items():
+                self.stdout.write(f'cache {event:9} {count}')
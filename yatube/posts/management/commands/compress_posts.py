@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from posts.fields import recompress
+from posts.models import ArchivedPost, Post
+from posts.sharding import shards
+
+
+class Command(BaseCommand):
+    help = 'Пересжимает HTML записей и архива пачками на всех шардах.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество записей в одной пачке.'
+        )
+
+    def handle(self, *args, **options):
+        for model in (Post, ArchivedPost):
+            for using in shards():
+                done = recompress(
+                    model._base_manager.using(using), ['text_html'],
+                    batch_size=options['batch_size'],
+                    progress=lambda done: self.stdout.write(
+                        f'{model.__name__}@{using}: {done}'
+                    ),
+                )
+                self.stdout.write(self.style.SUCCESS(
+                    f'{model.__name__}@{using}: готово, записей: {done}'
+                ))
@@ -0,0 +1,79 @@
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import markup
+from posts.fields import CompressedTextField
+
+LINE = 'def handler_{0}(request, post_id):  # строка {0} из вставки кода\n'
+
+
+def make_texts(count, size):
+    """Записи размером около size символов; каждая пятая - длинная."""
+    texts = []
+    for number in range(count):
+        if number % 5:
+            texts.append(f'Короткая запись номер {number}.')
+            continue
+        text = ''
+        line = 0
+        while len(text) < size:
+            text += LINE.format(number * 1000 + line)
+            line += 1
+        texts.append(text)
+    return [markup.render_html(text, set()) for text in texts]
+
+
+def measure(path, values, decode, repeat):
+    """Размер файла базы и среднее время чтения с декодированием."""
+    with sqlite3.connect(path) as connection:
+        connection.execute('CREATE TABLE post (id INTEGER PRIMARY KEY, body)')
+        connection.executemany(
+            'INSERT INTO post (body) VALUES (?)', ((v,) for v in values)
+        )
+    connection.close()
+    size = os.path.getsize(path)
+    connection = sqlite3.connect(path)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for (body,) in connection.execute('SELECT body FROM post'):
+            decode(body)
+    elapsed = (time.perf_counter() - start) / repeat
+    connection.close()
+    return size, elapsed
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает размер таблицы и время чтения HTML записей '
+        'в виде текста и в CompressedTextField.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=2000)
+        parser.add_argument('--size', type=int, default=20000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        field = CompressedTextField()
+        values = make_texts(options['count'], options['size'])
+        variants = {
+            'text': (values, str),
+            'compressed': (
+                [field.compress(value) for value in values],
+                field.decompress,
+            ),
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            for name, (stored, decode) in variants.items():
+                size, elapsed = measure(
+                    os.path.join(directory, f'{name}.sqlite3'),
+                    stored, decode, options['repeat'],
+                )
+                self.stdout.write(
+                    f'{name:10} {size / 1024:10.0f} КБ  '
+                    f'{elapsed * 1000:8.2f} мс на чтение таблицы'
+                )
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import duplicates
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит MinHash-подписи и LSH-индекс существующих записей '
+        'и помечает почти одинаковые.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Количество записей в одной пачке.'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if duplicates.numpy is None:
+            self.stdout.write('numpy не установлен, подписи считаются дольше')
+        done = 0
+        for alias in settings.POSTS_SHARDS:
+            posts = Post.objects.using(alias).only('pk', 'text').order_by('pk')
+            last_pk = 0
+            while True:
+                chunk = list(posts.filter(pk__gt=last_pk)[:chunk_size])
+                if not chunk:
+                    break
+                duplicates.index_posts(chunk)
+                last_pk = chunk[-1].pk
+                done += len(chunk)
+                self.stdout.write(f'Обработано записей: {done}')
+        self.stdout.write(self.style.SUCCESS(f'Готово, записей: {done}'))
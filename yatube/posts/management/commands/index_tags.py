@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.tagging import index_posts
+
+
+class Command(BaseCommand):
+    help = 'Заполняет теги и упоминания у существующих записей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Количество записей в одной пачке.'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        done = 0
+        for alias in settings.POSTS_SHARDS:
+            posts = Post.objects.using(alias).only(
+                'pk', 'text', 'pub_date'
+            ).order_by('pk')
+            last_pk = 0
+            while True:
+                chunk = list(posts.filter(pk__gt=last_pk)[:chunk_size])
+                if not chunk:
+                    break
+                index_posts(chunk)
+                last_pk = chunk[-1].pk
+                done += len(chunk)
+                self.stdout.write(f'Обработано записей: {done}')
+        self.stdout.write(self.style.SUCCESS(f'Готово, записей: {done}'))
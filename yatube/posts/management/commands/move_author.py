@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import User
+from posts.resharding import move_author
+from posts.sharding import SHARD_TIMEOUT
+
+
+class Command(BaseCommand):
+    help = 'Переносит записи автора в другой шард без остановки сайта.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('shard', help='Псевдоним базы из POSTS_SHARDS.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Количество записей в одной пачке.'
+        )
+        parser.add_argument(
+            '--wait', type=float, default=SHARD_TIMEOUT,
+            help='Сколько секунд ждать, пока процессы сайта увидят '
+                 'изменение справочника шардов.'
+        )
+
+    def handle(self, *args, **options):
+        if options['shard'] not in settings.POSTS_SHARDS:
+            raise CommandError(
+                f'Шард {options["shard"]} не указан в POSTS_SHARDS'
+            )
+        author = User.objects.filter(username=options['username']).first()
+        if author is None:
+            raise CommandError('Автор не найден')
+        move_author(
+            author.pk, options['shard'],
+            chunk_size=options['chunk_size'],
+            wait=options['wait'],
+            progress=lambda stage, count: self.stdout.write(
+                f'{stage}: {count}'
+            )
+        )
+        self.stdout.write(self.style.SUCCESS('Готово'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts import archive
+from posts.models import ArchivedPost, Group, Post, PostMonthCount
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает помесячные счетчики архива всех авторов и групп '
+        'по горячей и архивной таблицам.'
+    )
+
+    def handle(self, *args, **options):
+        author_ids = set()
+        for model in (Post, ArchivedPost):
+            author_ids.update(
+                model.objects.order_by().values_list(
+                    'author_id', flat=True
+                ).distinct()
+            )
+        # Счетчики авторов, у которых записей не осталось, обнуляются.
+        for scope in PostMonthCount.objects.filter(
+            scope__startswith='author:'
+        ).order_by().values_list('scope', flat=True).distinct():
+            author_ids.add(int(scope.split(':')[1]))
+        group_ids = list(Group.objects.values_list('pk', flat=True))
+        archive.recount(author_ids=author_ids, group_ids=group_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано авторов: {len(author_ids)}, '
+            f'групп: {len(group_ids)}'
+        ))
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import related
+
+
+class Command(BaseCommand):
+    help = (
+        'Рассчитывает похожие записи по TF-IDF текстов и сохраняет '
+        'их списки для страниц записей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Рассчитать только записи, появившиеся после прошлого '
+                 'запуска. Отредактированные записи пересчитывает только '
+                 'полный расчет.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=related.CHUNK_SIZE,
+            help='Количество строк матрицы в одном блоке умножения.'
+        )
+
+    def handle(self, *args, **options):
+        if related.sparse is None:
+            raise CommandError('Для расчета нужны пакеты numpy и scipy')
+        for alias in settings.POSTS_SHARDS:
+            changed = related.build(
+                alias,
+                incremental=options['incremental'],
+                chunk_size=options['chunk_size'],
+                progress=lambda done: self.stdout.write(
+                    f'{alias}: обработано записей: {done}'
+                ),
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'{alias}: обновлено списков: {changed}'
+            ))
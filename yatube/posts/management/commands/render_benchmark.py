@@ -0,0 +1,74 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.utils import timezone
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+URL_TAGS = (
+    ("{% group_url post.group.slug %}",
+     "{% url 'posts:group_posts' post.group.slug %}"),
+    ("{% profile_url post.author.username %}",
+     "{% url 'posts:profile' post.author.username %}"),
+    ("{% post_url post.pk %}",
+     "{% url 'posts:post_detail' post.pk %}"),
+)
+LOOP = '{% for post in posts %}ITEM{% endfor %}'
+
+
+def make_templates():
+    """Лента на тегах post_urls и та же лента на стандартном {% url %}."""
+    engine = engines['django']
+    template, _ = engine.engine.find_template('posts/includes/feed_item.html')
+    cached = template.source
+    plain = cached.replace('{% load post_urls %}', '')
+    for tag, url in URL_TAGS:
+        plain = plain.replace(tag, url)
+    return {
+        'url': engine.from_string(LOOP.replace('ITEM', plain)),
+        'post_urls': engine.from_string(LOOP.replace('ITEM', cached)),
+    }
+
+
+def make_posts(count):
+    """Записи в памяти: замеряется шаблон, а не база данных."""
+    now = timezone.now()
+    posts = []
+    for number in range(count):
+        author = User(pk=number, username=f'author{number}')
+        group = Group(pk=number, slug=f'group-{number}', title='Группа')
+        posts.append(Post(
+            pk=number + 1, text='Текст', text_html='Текст',
+            excerpt='Текст', pub_date=now, author=author, group=group,
+        ))
+    return posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время отрисовки ленты с {% url %} и с тегами '
+        'post_urls на страницах из 10 и 100 записей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        templates = make_templates()
+        for count in (10, 100):
+            context = {'posts': make_posts(count)}
+            for name, template in templates.items():
+                template.render(context)
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    template.render(context)
+                elapsed = (time.perf_counter() - start) / repeat
+                self.stdout.write(
+                    f'{count:4} записей  {name:10} '
+                    f'{elapsed * 1000:8.2f} мс на страницу'
+                )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from posts import markup
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Заполняет HTML и фрагменты текста у существующих записей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Количество записей в одной пачке.'
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перерисовать все записи, а не только пустые.'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.only('pk', 'text').order_by('pk')
+        if not options['all']:
+            posts = posts.filter(text_html='')
+        chunk_size = options['chunk_size']
+        last_pk = 0
+        done = 0
+        while True:
+            chunk = list(posts.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+            # Один запрос пользователей на всю пачку.
+            usernames = markup.existing_usernames(
+                post.text for post in chunk
+            )
+            for post in chunk:
+                post.render(usernames)
+            Post.objects.bulk_update(chunk, ('text_html', 'excerpt'))
+            last_pk = chunk[-1].pk
+            done += len(chunk)
+            self.stdout.write(f'Обработано записей: {done}')
+        self.stdout.write(self.style.SUCCESS(f'Готово, записей: {done}'))
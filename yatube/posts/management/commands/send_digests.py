@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.digests import BATCH_SIZE, CHUNK_SIZE, send_digests
+from posts.models import Digest
+
+
+class Command(BaseCommand):
+    help = 'Рассылает дайджесты новых записей по подпискам пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--frequency', choices=[key for key, _ in Digest.FREQUENCIES],
+            default=Digest.DAILY,
+            help='Какие дайджесты отправлять.'
+        )
+        parser.add_argument(
+            '--site-url', default='http://localhost:8000',
+            help='Адрес сайта для ссылок в письмах.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Количество пользователей в одной пачке.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество писем в одной отправке.'
+        )
+
+    def handle(self, *args, **options):
+        def progress(users, sent):
+            self.stdout.write(
+                f'Обработано пользователей: {users}, писем: {sent}'
+            )
+
+        users, sent = send_digests(
+            options['frequency'],
+            timezone.now(),
+            site_url=options['site_url'].rstrip('/'),
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, пользователей: {users}, писем: {sent}'
+        ))
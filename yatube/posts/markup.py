@@ -0,0 +1,78 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils.html import escape, linebreaks
+from django.utils.text import Truncator
+
+User = get_user_model()
+
+EXCERPT_LENGTH = 200
+LINK_RE = r'\[(?P<label>[^\]\n]+)\]\((?P<url>https?://[^\s()<>]+)\)'
+MENTION_RE = r'(?<![\w@])@(?P<username>[\w.@+-]*\w)'
+TAG_LENGTH = 50
+TAG_RE = rf'(?<![\w&#])#(?P<tag>\w{{1,{TAG_LENGTH}}})(?!\w)'
+MARKUP_RE = re.compile(f'{LINK_RE}|{MENTION_RE}|{TAG_RE}')
+
+
+def mentioned_usernames(texts):
+    """Имена пользователей, упомянутых в текстах."""
+    return {
+        match.group('username')
+        for text in texts
+        for match in MARKUP_RE.finditer(text)
+        if match.group('username')
+    }
+
+
+def mentioned_tags(text):
+    """Теги записи в нижнем регистре."""
+    return {
+        match.group('tag').lower()
+        for match in MARKUP_RE.finditer(text)
+        if match.group('tag')
+    }
+
+
+def existing_usernames(texts):
+    """Упомянутые в текстах имена, для которых есть пользователи."""
+    usernames = mentioned_usernames(texts)
+    if not usernames:
+        return set()
+    return set(
+        User.objects.filter(username__in=usernames).values_list(
+            'username', flat=True
+        )
+    )
+
+
+def render_html(text, usernames=frozenset()):
+    """Превращает текст записи в безопасный HTML.
+
+    Весь текст экранируется, после чего размечаются ссылки вида
+    [текст](https://адрес), упоминания @username пользователей из
+    usernames, теги #name, абзацы и переносы строк.
+    """
+    def replace(match):
+        if match.group('url'):
+            return (
+                f'<a href="{match.group("url")}" rel="nofollow noopener">'
+                f'{match.group("label")}</a>'
+            )
+        tag = match.group('tag')
+        if tag:
+            url = escape(reverse('posts:tag_posts', args=[tag.lower()]))
+            return f'<a href="{url}">#{tag}</a>'
+        username = match.group('username')
+        if username not in usernames:
+            return match.group(0)
+        url = escape(reverse('posts:profile', args=[username]))
+        return f'<a href="{url}">@{username}</a>'
+
+    return linebreaks(MARKUP_RE.sub(replace, escape(text)))
+
+
+def render_excerpt(text):
+    """Короткий фрагмент текста для лент."""
+    text = re.sub(LINK_RE, r'\g<label>', text)
+    return Truncator(' '.join(text.split())).chars(EXCERPT_LENGTH)
@@ -0,0 +1,79 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def fill_month_counts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    PostMonthCount = apps.get_model('posts', 'PostMonthCount')
+    scopes = (
+        ('all', None),
+        ('author', 'author_id'),
+        ('group', 'group_id'),
+    )
+    for prefix, field in scopes:
+        columns = ('year', 'month') + ((field,) if field else ())
+        rows = Post.objects.annotate(
+            year=ExtractYear('pub_date'), month=ExtractMonth('pub_date')
+        ).order_by().values(*columns).annotate(count=Count('pk'))
+        PostMonthCount.objects.bulk_create(
+            PostMonthCount(
+                scope=f'{prefix}:{row[field]}' if field else prefix,
+                year=row['year'], month=row['month'], count=row['count']
+            )
+            for row in rows
+            if not field or row[field]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_auto_20221116_1613'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='post',
+            options={'ordering': ('-pub_date',)},
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='posts', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='group',
+            field=models.ForeignKey(blank=True, help_text='Группа, к которой будет относиться пост', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='posts', to='posts.Group', verbose_name='Группа'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='pub_date',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Дата публикации'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='text',
+            field=models.TextField(help_text='Введите текст записи', verbose_name='Текст поста'),
+        ),
+        migrations.CreateModel(
+            name='PostMonthCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=50)),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('scope', 'year', 'month'),
+                'unique_together': {('scope', 'year', 'month')},
+            },
+        ),
+        migrations.RunPython(fill_month_counts, migrations.RunPython.noop),
+    ]
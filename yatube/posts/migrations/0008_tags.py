@@ -0,0 +1,57 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0007_archivedpost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Название')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PostTag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='posts.Post', verbose_name='Запись')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='posts.Tag', verbose_name='Тег')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Mention',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to='posts.Post', verbose_name='Запись')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='posttag',
+            index=models.Index(fields=['tag', '-pub_date', '-post'], name='posts_postt_tag_id_73b64f_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='posttag',
+            unique_together={('post', 'tag')},
+        ),
+        migrations.AddIndex(
+            model_name='mention',
+            index=models.Index(fields=['user', '-pub_date', '-post'], name='posts_menti_user_id_43adaa_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='mention',
+            unique_together={('post', 'user')},
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0008_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Digest',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='digest', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('frequency', models.CharField(choices=[('daily', 'Ежедневно'), ('weekly', 'Еженедельно')], db_index=True, default='daily', max_length=10, verbose_name='Периодичность')),
+                ('last_sent', models.DateTimeField(blank=True, null=True, verbose_name='Последняя отправка')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Subscription',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='subscribers', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='subscriptions', to='posts.Group', verbose_name='Группа')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subscriptions', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='subscription',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('author__isnull', True), ('group__isnull', False)), models.Q(('author__isnull', False), ('group__isnull', True)), _connector='OR'), name='subscription_group_or_author'),
+        ),
+        migrations.AddConstraint(
+            model_name='subscription',
+            constraint=models.UniqueConstraint(fields=('user', 'group'), name='unique_group_subscription'),
+        ),
+        migrations.AddConstraint(
+            model_name='subscription',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_author_subscription'),
+        ),
+    ]
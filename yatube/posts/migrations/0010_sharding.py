@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0009_digests'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorShard',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('shard', models.CharField(max_length=100, verbose_name='База данных')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GlobalId',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:31
+
+from django.db import migrations
+
+import posts.fields
+
+
+def compress_existing(apps, schema_editor):
+    """Старые строки остались текстом: перезаписываем их пачками."""
+    using = schema_editor.connection.alias
+    for name in ('Post', 'ArchivedPost'):
+        model = apps.get_model('posts', name)
+        posts.fields.recompress(
+            model._base_manager.using(using), ['text_html']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_sharding'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedpost',
+            name='text_html',
+            field=posts.fields.CompressedTextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='text_html',
+            field=posts.fields.CompressedTextField(
+                blank=True, editable=False, verbose_name='Текст поста в HTML'
+            ),
+        ),
+        migrations.RunPython(compress_existing, migrations.RunPython.noop),
+    ]
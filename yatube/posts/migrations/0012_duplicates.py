@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_compressed_text_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSignature',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='posts.Post', verbose_name='Запись')),
+                ('signature', models.BinaryField(verbose_name='Подпись')),
+                ('duplicate_of', models.IntegerField(blank=True, db_index=True, null=True, verbose_name='Похожа на запись')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SignatureBand',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField(db_index=True, verbose_name='Ключ полосы')),
+                ('signature', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='posts.PostSignature', verbose_name='Подпись')),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_duplicates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedPostsRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_post_id', models.IntegerField(verbose_name='Последняя запись')),
+                ('incremental', models.BooleanField(verbose_name='Только новые записи')),
+                ('finished', models.DateTimeField(auto_now_add=True, verbose_name='Окончание расчета')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_posts', to='posts.Post', verbose_name='Запись')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Post', verbose_name='Похожая запись')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='relatedpost',
+            index=models.Index(fields=['post', '-score'], name='posts_relat_post_id_78409f_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='relatedpost',
+            unique_together={('post', 'related')},
+        ),
+    ]
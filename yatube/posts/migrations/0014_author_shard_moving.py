@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_related_posts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorshard',
+            name='copy',
+            field=models.CharField(blank=True, db_index=True, max_length=100, verbose_name='База с копией'),
+        ),
+        migrations.AddField(
+            model_name='authorshard',
+            name='fenced',
+            field=models.BooleanField(default=False, verbose_name='Запись запрещена'),
+        ),
+    ]
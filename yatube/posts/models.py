@@ -1,9 +1,70 @@
-from django.db import models
+import datetime
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, models, router
 from django.contrib.auth import get_user_model
 
+from posts import markup
+from posts.fields import CompressedTextField
+
 User = get_user_model()
 
 
+class GlobalId(models.Model):
+    """Последовательность pk записей и комментариев, общая для шардов.
+
+    Нужна, только когда шардов несколько: строки живут в 'default',
+    поэтому pk не повторяются между базами и не меняются при переносе
+    автора в другой шард. При первом обращении процесса
+    последовательность поднимается выше уже занятых pk.
+    """
+
+    _seeded = False
+
+    @classmethod
+    def seed(cls):
+        highest = 0
+        for alias in settings.POSTS_SHARDS:
+            for model in (Post, ArchivedPost, Comment):
+                highest = max(
+                    highest,
+                    model._base_manager.using(alias).aggregate(
+                        highest=models.Max('pk')
+                    )['highest'] or 0
+                )
+        ids = cls.objects.using(DEFAULT_DB_ALIAS)
+        if highest and not ids.filter(pk__gte=highest).exists():
+            ids.create(pk=highest)
+        cls._seeded = True
+
+    @classmethod
+    def allocate(cls):
+        if not cls._seeded:
+            cls.seed()
+        return cls.objects.using(DEFAULT_DB_ALIAS).create().pk
+
+
+def allocate_pk(instance, kwargs):
+    """Готовит вставку нового объекта в шард.
+
+    Новый объект пишется в базу, которую выбирает роутер, даже если
+    его создает Model.objects.create() с базой менеджера. Если шардов
+    несколько, pk выдается из GlobalId.
+    """
+    if instance._state.adding:
+        kwargs['using'] = router.db_for_write(
+            type(instance), instance=instance
+        )
+    if (
+        len(settings.POSTS_SHARDS) > 1
+        and instance._state.adding
+        and instance.pk is None
+    ):
+        instance.pk = GlobalId.allocate()
+        # Объект новый: INSERT без пробного UPDATE.
+        kwargs.setdefault('force_insert', True)
+
+
 class Group(models.Model):
     """Модель группы."""
 
@@ -18,6 +79,8 @@ class Group(models.Model):
 class Post(models.Model):
     """Модель записи."""
 
+    is_archived = False
+
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Введите текст записи'
@@ -41,9 +104,401 @@ class Post(models.Model):
         verbose_name='Группа',
         help_text='Группа, к которой будет относиться пост'
     )
+    text_html = CompressedTextField(
+        blank=True,
+        editable=False,
+        verbose_name='Текст поста в HTML'
+    )
+    excerpt = models.CharField(
+        max_length=markup.EXCERPT_LENGTH,
+        blank=True,
+        editable=False,
+        verbose_name='Начало текста поста'
+    )
+
+    def render(self, usernames=None):
+        """Заполняет HTML и фрагмент текста по тексту записи."""
+        if usernames is None:
+            usernames = markup.existing_usernames([self.text])
+        self.text_html = markup.render_html(self.text, usernames)
+        self.excerpt = markup.render_excerpt(self.text)
+
+    def save(self, *args, **kwargs):
+        allocate_pk(self, kwargs)
+        self.render()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {
+                *update_fields, 'text_html', 'excerpt'
+            }
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.text[:15]}"
 
     class Meta:
         ordering = ('-pub_date',)
+
+
+class PostMonthCount(models.Model):
+    """Количество записей за месяц в разрезе области.
+
+    Область (scope) - вся лента ('all'), группа ('group:<id>')
+    или автор ('author:<id>'). Таблица обновляется при каждом
+    изменении записей, поэтому архив не считает GROUP BY по posts_post.
+    """
+
+    scope = models.CharField(max_length=50)
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    @property
+    def first_day(self):
+        return datetime.date(self.year, self.month, 1)
+
+    def __str__(self):
+        return f"{self.scope} {self.year}-{self.month:02}: {self.count}"
+
+    class Meta:
+        unique_together = ('scope', 'year', 'month')
+        ordering = ('scope', 'year', 'month')
+
+
+class Comment(models.Model):
+    """Модель комментария к записи.
+
+    Ветка хранится материализованным путем: путь комментария - путь
+    родителя плюс собственный pk фиксированной ширины. Сортировка по
+    path дает всю ветку в порядке обхода одним запросом.
+    """
+
+    PATH_SEGMENT = 10
+    MAX_DEPTH = 20
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Запись'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Автор'
+    )
+    parent = models.ForeignKey(
+        'self',
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='replies',
+        verbose_name='Ответ на'
+    )
+    text = models.TextField(
+        verbose_name='Текст комментария',
+        help_text='Введите текст комментария'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата комментария'
+    )
+    path = models.CharField(
+        max_length=PATH_SEGMENT * MAX_DEPTH,
+        blank=True,
+        editable=False
+    )
+
+    def build_path(self):
+        prefix = self.parent.path if self.parent else ''
+        return f'{prefix}{self.pk:0{self.PATH_SEGMENT}d}'
+
+    @property
+    def depth(self):
+        return len(self.path) // self.PATH_SEGMENT - 1
+
+    def save(self, *args, **kwargs):
+        if self.pk is None and self.parent is not None:
+            # Слишком глубокие ответы прикрепляются к последнему уровню.
+            while self.parent.depth >= self.MAX_DEPTH - 1:
+                self.parent = self.parent.parent
+        allocate_pk(self, kwargs)
+        if not self.path and self.pk is not None:
+            self.path = self.build_path()
+        super().save(*args, **kwargs)
+        if not self.path:
+            self.path = self.build_path()
+            type(self)._base_manager.using(self._state.db).filter(
+                pk=self.pk
+            ).update(path=self.path)
+
+    def __str__(self):
+        return f"{self.text[:15]}"
+
+    class Meta:
+        ordering = ('path',)
+        indexes = (models.Index(fields=('post', 'path')),)
+
+
+class ArchivedPost(models.Model):
+    """Модель записи, перенесенной из горячей таблицы в архивную.
+
+    Запись сохраняет свой pk, поэтому адреса записей не меняются, а
+    таблица posts_post и ее индексы содержат только свежие записи.
+    """
+
+    is_archived = True
+
+    text = models.TextField(verbose_name='Текст поста')
+    pub_date = models.DateTimeField(
+        db_index=True,
+        verbose_name='Дата публикации'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    text_html = CompressedTextField(blank=True)
+    excerpt = models.CharField(max_length=markup.EXCERPT_LENGTH, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.text[:15]}"
+
+    class Meta:
+        ordering = ('-pub_date',)
+
+
+class Tag(models.Model):
+    """Модель тега #name из текста записи."""
+
+    name = models.CharField(
+        max_length=markup.TAG_LENGTH,
+        unique=True,
+        verbose_name='Название'
+    )
+
+    def __str__(self):
+        return f"#{self.name}"
+
+
+class PostTag(models.Model):
+    """Тег записи.
+
+    Дата публикации копируется из записи, чтобы страница тега читалась
+    диапазоном индекса (tag, pub_date, post) без сортировки.
+    """
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+        verbose_name='Запись'
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+        verbose_name='Тег'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        unique_together = ('post', 'tag')
+        indexes = (models.Index(fields=('tag', '-pub_date', '-post')),)
+
+
+class Mention(models.Model):
+    """Упоминание пользователя @username в записи."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Запись'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Пользователь'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        unique_together = ('post', 'user')
+        indexes = (models.Index(fields=('user', '-pub_date', '-post')),)
+
+
+class Subscription(models.Model):
+    """Подписка пользователя на группу или автора."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='subscriptions',
+        verbose_name='Подписчик'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='subscriptions',
+        verbose_name='Группа'
+    )
+    author = models.ForeignKey(
+        User,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='subscribers',
+        verbose_name='Автор'
+    )
+
+    class Meta:
+        constraints = (
+            models.CheckConstraint(
+                check=(
+                    models.Q(group__isnull=False, author__isnull=True)
+                    | models.Q(group__isnull=True, author__isnull=False)
+                ),
+                name='subscription_group_or_author',
+            ),
+            models.UniqueConstraint(
+                fields=('user', 'group'), name='unique_group_subscription'
+            ),
+            models.UniqueConstraint(
+                fields=('user', 'author'), name='unique_author_subscription'
+            ),
+        )
+
+
+class Digest(models.Model):
+    """Настройка рассылки дайджеста новых записей по подпискам."""
+
+    DAILY = 'daily'
+    WEEKLY = 'weekly'
+    FREQUENCIES = ((DAILY, 'Ежедневно'), (WEEKLY, 'Еженедельно'))
+
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='digest',
+        verbose_name='Пользователь'
+    )
+    frequency = models.CharField(
+        max_length=10,
+        choices=FREQUENCIES,
+        default=DAILY,
+        db_index=True,
+        verbose_name='Периодичность'
+    )
+    last_sent = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Последняя отправка'
+    )
+
+
+class AuthorShard(models.Model):
+    """Шард записей автора, если он отличается от выбранного по хэшу.
+
+    Пока автор переносится, в copy указан второй шард с копией его
+    записей, а fenced запрещает запись, чтобы копии не разошлись.
+    """
+
+    author = models.OneToOneField(
+        User,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    shard = models.CharField(max_length=100, verbose_name='База данных')
+    copy = models.CharField(
+        max_length=100,
+        blank=True,
+        db_index=True,
+        verbose_name='База с копией'
+    )
+    fenced = models.BooleanField(
+        default=False,
+        verbose_name='Запись запрещена'
+    )
+
+
+class PostSignature(models.Model):
+    """MinHash-подпись текста записи для поиска почти одинаковых записей."""
+
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='signature',
+        verbose_name='Запись'
+    )
+    signature = models.BinaryField(verbose_name='Подпись')
+    duplicate_of = models.IntegerField(
+        blank=True,
+        null=True,
+        db_index=True,
+        verbose_name='Похожа на запись'
+    )
+
+
+class SignatureBand(models.Model):
+    """Полоса подписи в LSH-индексе: ключ - номер полосы и ее хэш."""
+
+    signature = models.ForeignKey(
+        PostSignature,
+        on_delete=models.CASCADE,
+        related_name='bands',
+        verbose_name='Подпись'
+    )
+    key = models.BigIntegerField(db_index=True, verbose_name='Ключ полосы')
+
+
+class RelatedPost(models.Model):
+    """Похожая запись, найденная пакетным расчетом сходства текстов."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='related_posts',
+        verbose_name='Запись'
+    )
+    related = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожая запись'
+    )
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        unique_together = ('post', 'related')
+        indexes = (models.Index(fields=('post', '-score')),)
+
+
+class RelatedPostsRun(models.Model):
+    """Запуск расчета похожих записей; от него считаются новые записи."""
+
+    last_post_id = models.IntegerField(verbose_name='Последняя запись')
+    incremental = models.BooleanField(verbose_name='Только новые записи')
+    finished = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Окончание расчета'
+    )
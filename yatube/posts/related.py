@@ -0,0 +1,191 @@
+import re
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from posts.cache import bump_versions, post_scope
+from posts.models import Post, RelatedPost, RelatedPostsRun
+
+# numpy и scipy нужны только пакетному расчету, сайт работает без них.
+try:
+    import numpy
+    from scipy import sparse
+except ImportError:
+    numpy = sparse = None
+
+TOP_K = 5
+MIN_SCORE = 0.1
+# Слова, встретившиеся в одной записи, на сходство не влияют.
+MIN_DF = 2
+CHUNK_SIZE = 500
+IN_LIMIT = 500
+WORD_RE = re.compile(r'\w{3,}')
+
+
+def _texts(using, chunk_size):
+    posts = Post.objects.using(using).only('pk', 'text').order_by('pk')
+    last_pk = 0
+    while True:
+        chunk = list(posts.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            return
+        for post in chunk:
+            yield post.pk, post.text
+        last_pk = chunk[-1].pk
+
+
+def vectors(texts):
+    """TF-IDF векторы текстов: id записей и разреженная матрица строк.
+
+    Частота слова берется логарифмической, строки нормированы, поэтому
+    произведение двух строк - косинус угла между записями.
+    """
+    vocabulary = {}
+    pks = []
+    indptr = [0]
+    indices = []
+    counts = []
+    for pk, text in texts:
+        for word, count in Counter(WORD_RE.findall(text.lower())).items():
+            indices.append(vocabulary.setdefault(word, len(vocabulary)))
+            counts.append(count)
+        indptr.append(len(indices))
+        pks.append(pk)
+    matrix = sparse.csr_matrix(
+        (numpy.array(counts, dtype=float), indices, indptr),
+        shape=(len(pks), len(vocabulary))
+    )
+    df = numpy.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = numpy.log((1 + len(pks)) / (1 + df)) + 1
+    idf[df < MIN_DF] = 0
+    matrix.data = 1 + numpy.log(matrix.data)
+    matrix = (matrix @ sparse.diags(idf)).tocsr()
+    matrix.eliminate_zeros()
+    norms = numpy.sqrt(matrix.multiply(matrix).sum(axis=1)).A1
+    norms[norms == 0] = 1
+    matrix = (sparse.diags(1 / norms) @ matrix).tocsr()
+    return numpy.array(pks, dtype=numpy.int64), matrix
+
+
+def _rows(similarity, row_pks, pks):
+    """Для каждой строки сходства: id записи, id соседей и оценки."""
+    for row, pk in enumerate(row_pks.tolist()):
+        start, end = similarity.indptr[row], similarity.indptr[row + 1]
+        columns = similarity.indices[start:end]
+        scores = similarity.data[start:end]
+        keep = (pks[columns] != pk) & (scores >= MIN_SCORE)
+        yield pk, pks[columns[keep]], scores[keep]
+
+
+def _top(neighbours, scores):
+    if len(scores) > TOP_K:
+        best = numpy.argpartition(-scores, TOP_K)[:TOP_K]
+        neighbours, scores = neighbours[best], scores[best]
+    return list(zip(neighbours.tolist(), scores.tolist()))
+
+
+def referrers(using, post_ids):
+    """Id записей, в списках которых есть какая-то из записей post_ids."""
+    return set(
+        RelatedPost.objects.using(using).filter(
+            related_id__in=list(post_ids)
+        ).values_list('post_id', flat=True)
+    )
+
+
+def _store(using, lists):
+    """Записывает списки {id: [(id соседа, оценка)]} одним пакетом.
+
+    Страница записи сбрасывается из кэша, только если поменялся состав
+    или порядок соседей.
+    """
+    old = defaultdict(list)
+    for post_id, related_id in RelatedPost.objects.using(using).filter(
+        post_id__in=list(lists)
+    ).order_by('post_id', '-score').values_list('post_id', 'related_id'):
+        old[post_id].append(related_id)
+    changed = {}
+    for post_id, items in lists.items():
+        items = sorted(items, key=lambda item: -item[1])[:TOP_K]
+        if [related_id for related_id, _ in items] != old[post_id]:
+            changed[post_id] = items
+    if not changed:
+        return 0
+    with transaction.atomic(using=using):
+        RelatedPost.objects.using(using).filter(
+            post_id__in=list(changed)
+        ).delete()
+        RelatedPost.objects.using(using).bulk_create(
+            RelatedPost(post_id=post_id, related_id=related_id, score=score)
+            for post_id, items in changed.items()
+            for related_id, score in items
+        )
+    bump_versions([post_scope(post_id) for post_id in changed])
+    return len(changed)
+
+
+def _merge(using, extra):
+    """Добавляет новых соседей к сохраненным спискам старых записей."""
+    post_ids = list(extra)
+    changed = 0
+    for start in range(0, len(post_ids), IN_LIMIT):
+        batch = post_ids[start:start + IN_LIMIT]
+        lists = {post_id: dict(extra[post_id]) for post_id in batch}
+        for post_id, related_id, score in RelatedPost.objects.using(
+            using
+        ).filter(post_id__in=batch).values_list(
+            'post_id', 'related_id', 'score'
+        ):
+            lists[post_id].setdefault(related_id, score)
+        changed += _store(using, {
+            post_id: list(items.items()) for post_id, items in lists.items()
+        })
+    return changed
+
+
+def build(using, incremental=False, chunk_size=CHUNK_SIZE, progress=None):
+    """Рассчитывает похожие записи шарда, возвращает число обновленных.
+
+    Полный расчет перемножает блоки из chunk_size строк на всю матрицу.
+    В режиме incremental перемножаются только записи, появившиеся после
+    прошлого запуска: они получают свои списки и попадают в списки
+    старых записей, если оказались ближе их соседей. Веса слов при этом
+    берутся по всему корпусу, а старые оценки не пересчитываются.
+    Новые записи определяются по pk, поэтому отредактированные записи и
+    записи, перенесенные из другого шарда со старыми pk, пересчитывает
+    только полный расчет.
+    """
+    last_run = RelatedPostsRun.objects.using(using).order_by('-pk').first()
+    incremental = incremental and last_run is not None
+    pks, matrix = vectors(_texts(using, chunk_size))
+    if not len(pks):
+        return 0
+    if incremental:
+        rows = numpy.flatnonzero(pks > last_run.last_post_id)
+    else:
+        rows = numpy.arange(len(pks))
+    transposed = matrix.T.tocsc()
+    changed = 0
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        similarity = (matrix[chunk] @ transposed).tocsr()
+        lists = {}
+        extra = defaultdict(list)
+        for pk, neighbours, scores in _rows(similarity, pks[chunk], pks):
+            lists[pk] = _top(neighbours, scores)
+            if incremental:
+                for neighbour, score in zip(
+                    neighbours.tolist(), scores.tolist()
+                ):
+                    if neighbour <= last_run.last_post_id:
+                        extra[neighbour].append((pk, score))
+        changed += _store(using, lists)
+        if extra:
+            changed += _merge(using, extra)
+        if progress is not None:
+            progress(start + len(chunk))
+    RelatedPostsRun.objects.using(using).create(
+        last_post_id=int(pks.max()),
+        incremental=incremental
+    )
+    return changed
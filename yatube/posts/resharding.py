@@ -0,0 +1,145 @@
+import logging
+import time
+
+from django.db import transaction
+
+from posts import duplicates
+from posts.bulk import raw_delete
+from posts.models import ArchivedPost, Comment, Post
+from posts.sharding import SHARD_TIMEOUT, assign_shard, shard_for_author
+from posts.tagging import index_posts
+
+logger = logging.getLogger(__name__)
+
+# Поля записи, которые могут поменяться, пока автор переносится.
+MUTABLE_FIELDS = ('text', 'text_html', 'excerpt', 'group')
+
+
+def _chunks(queryset, chunk_size):
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk).order_by('pk')[
+            :chunk_size
+        ])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def _copy(author_id, source, target, chunk_size, sync=False):
+    """Копирует записи автора со всем, что к ним относится.
+
+    Копирование повторяемое: уже перенесенные строки пропускаются, а при
+    sync=True у записей обновляются изменяемые поля. Теги и упоминания
+    строятся заново по тексту в целевом шарде: теги у шардов свои.
+    """
+    copied = 0
+    posts = Post.objects.using(source).filter(author_id=author_id)
+    for chunk in _chunks(posts, chunk_size):
+        pks = [post.pk for post in chunk]
+        comments = list(
+            Comment.objects.using(source).filter(post_id__in=pks)
+        )
+        with transaction.atomic(using=target):
+            Post.objects.using(target).bulk_create(
+                chunk, ignore_conflicts=True
+            )
+            if sync:
+                Post.objects.using(target).bulk_update(chunk, MUTABLE_FIELDS)
+            Comment.objects.using(target).bulk_create(
+                comments, ignore_conflicts=True
+            )
+            index_posts(chunk)
+            duplicates.index_posts(chunk)
+        copied += len(chunk)
+    archived = ArchivedPost.objects.using(source).filter(author_id=author_id)
+    for chunk in _chunks(archived, chunk_size):
+        ArchivedPost.objects.using(target).bulk_create(
+            chunk, ignore_conflicts=True
+        )
+        copied += len(chunk)
+    return copied
+
+
+def _pks(queryset):
+    return set(queryset.values_list('pk', flat=True))
+
+
+def _reconcile(author_id, source, target, chunk_size):
+    """Удаляет из target строки, которых уже нет в source.
+
+    Записи и комментарии, удаленные во время первого копирования,
+    иначе вернулись бы после переключения на target.
+    """
+    removed = 0
+    for model, lookup in ((Post, 'author_id'), (ArchivedPost, 'author_id'),
+                          (Comment, 'post__author_id')):
+        rows = model._base_manager.filter(**{lookup: author_id})
+        extra = sorted(_pks(rows.using(target)) - _pks(rows.using(source)))
+        for start in range(0, len(extra), chunk_size):
+            with transaction.atomic(using=target):
+                raw_delete(model, extra[start:start + chunk_size], target)
+        removed += len(extra)
+    return removed
+
+
+def move_author(author_id, target, chunk_size=500, progress=None,
+                wait=SHARD_TIMEOUT):
+    """Переносит записи автора в шард target без остановки сайта.
+
+    1. Записи копируются пачками, пока чтение и запись идут в старый
+       шард; ленты не показывают копию в target.
+    2. Запись для автора запрещается. Через wait секунд запрет видят
+       все процессы, и повторное копирование догоняет изменения, а
+       удаленное за время первого шага удаляется и из target.
+    3. Справочник переключается на target; через wait секунд все
+       процессы читают из него, и запись снова разрешается.
+    4. Из старого шарда без сигналов удаляются строки, которые есть в
+       target: для сайта записи не исчезали, счетчики и кэши верны.
+       Строки, которых в target нет, остаются, и о них пишется в лог.
+    """
+    source = shard_for_author(author_id)
+    if source == target:
+        return 0
+
+    def report(stage, count):
+        logger.info('Автор %s, %s: %s', author_id, stage, count)
+        if progress is not None:
+            progress(stage, count)
+
+    assign_shard(author_id, source, copy=target)
+    report('скопировано', _copy(author_id, source, target, chunk_size))
+    assign_shard(author_id, source, copy=target, fenced=True)
+    time.sleep(wait)
+    report(
+        'догнано',
+        _copy(author_id, source, target, chunk_size, sync=True)
+    )
+    report(
+        'удалено из нового шарда',
+        _reconcile(author_id, source, target, chunk_size)
+    )
+    assign_shard(author_id, target, copy=source, fenced=True)
+    time.sleep(wait)
+    assign_shard(author_id, target, copy=source)
+    deleted = 0
+    left = 0
+    for model, lookup in ((Post, 'author_id'), (ArchivedPost, 'author_id')):
+        rows = model._base_manager.filter(**{lookup: author_id})
+        source_pks = _pks(rows.using(source))
+        pks = sorted(source_pks & _pks(rows.using(target)))
+        for start in range(0, len(pks), chunk_size):
+            with transaction.atomic(using=source):
+                raw_delete(model, pks[start:start + chunk_size], source)
+        deleted += len(pks)
+        left += len(source_pks) - len(pks)
+    if left:
+        logger.warning(
+            'Автор %s: в шарде %s осталось строк без копии: %s',
+            author_id, source, left
+        )
+    else:
+        assign_shard(author_id, target)
+    report('удалено из старого шарда', deleted)
+    return deleted
@@ -0,0 +1,252 @@
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from posts.models import (
+    ArchivedPost, AuthorShard, Comment, Mention, Post, PostTag, Tag
+)
+
+User = get_user_model()
+
+SHARD_KEY = 'posts:shard:{}'
+# Справочник кэшируется в каждом процессе ненадолго: move_author
+# ждет SHARD_TIMEOUT секунд, пока изменение увидят все процессы.
+SHARD_TIMEOUT = 30
+# Модели, строки которых лежат в шарде автора записи.
+SHARDED_MODELS = (Post, ArchivedPost, Comment, PostTag, Mention, Tag)
+# Модели, которые копируются во все шарды ради внешних ключей.
+REPLICATED_MODELS = ('auth.User', 'posts.Group')
+
+
+# Части сайта, которые пока читают записи только из 'default'.
+UNROUTED = (
+    'ленты RSS/Atom, карта сайта, подгрузка ленты, архив и его счетчики, '
+    'дайджесты, массовые действия админки, холодное хранение, опрос '
+    'новых записей, страницы тегов и упоминаний'
+)
+
+
+def shards():
+    return settings.POSTS_SHARDS
+
+
+def check_configuration():
+    """Не дает запустить сайт с несколькими шардами.
+
+    Пока не все части сайта читают записи из всех шардов, записи
+    остальных шардов в них молча пропадали бы.
+    """
+    if len(shards()) > 1:
+        raise ImproperlyConfigured(
+            'POSTS_SHARDS с несколькими базами пока не поддерживается: '
+            f'из одной базы читают {UNROUTED}.'
+        )
+
+
+def _directory(author_id):
+    """Шард автора и запрет записи из справочника или по хэшу."""
+    key = SHARD_KEY.format(author_id)
+    entry = cache.get(key)
+    if entry is None:
+        entry = AuthorShard.objects.using(DEFAULT_DB_ALIAS).filter(
+            author_id=author_id
+        ).values_list('shard', 'fenced').first()
+        if entry is None:
+            aliases = shards()
+            entry = (aliases[author_id % len(aliases)], False)
+        cache.set(key, entry, SHARD_TIMEOUT)
+    return entry
+
+
+def shard_for_author(author_id):
+    """База с записями автора.
+
+    Автор живет в шарде по хэшу, если справочник AuthorShard не говорит
+    иное. Ответ кэшируется на SHARD_TIMEOUT секунд.
+    """
+    aliases = shards()
+    if len(aliases) == 1:
+        return aliases[0]
+    return _directory(author_id)[0]
+
+
+def writes_fenced(author_id):
+    """Записи автора переносятся, и создавать или менять их нельзя."""
+    if len(shards()) == 1:
+        return False
+    return _directory(author_id)[1]
+
+
+def assign_shard(author_id, alias, copy='', fenced=False):
+    """Меняет справочник; другие процессы увидят это через SHARD_TIMEOUT."""
+    AuthorShard.objects.using(DEFAULT_DB_ALIAS).update_or_create(
+        author_id=author_id,
+        defaults={'shard': alias, 'copy': copy, 'fenced': fenced}
+    )
+    cache.delete(SHARD_KEY.format(author_id))
+
+
+class ShardRouter:
+    """Направляет записи и все, что к ним относится, в шард автора.
+
+    Остальные модели остаются в 'default'. Запросы без подсказки
+    (например, Post.objects.all()) тоже идут в 'default': ленты по всем
+    шардам собирает ShardedPosts.
+    """
+
+    def _db(self, model, instance=None, **hints):
+        if instance is None or not issubclass(model, SHARDED_MODELS):
+            return None
+        if isinstance(instance, User):
+            if issubclass(model, (Post, ArchivedPost)):
+                return shard_for_author(instance.pk)
+            return None
+        if isinstance(instance, (Comment, PostTag, Mention)):
+            # Присвоение автора уже записало в _state.db базу
+            # пользователя, поэтому сначала смотрим на запись.
+            post_field = instance._meta.get_field('post')
+            if post_field.is_cached(instance):
+                return post_field.get_cached_value(instance)._state.db
+        if instance._state.db is not None:
+            return instance._state.db
+        if isinstance(instance, (Post, ArchivedPost)):
+            return shard_for_author(instance.author_id)
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._db(model, **hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db(model, **hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Пользователи и группы есть в каждом шарде.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # В шарды попадают таблицы записей и копии пользователей.
+        if db == DEFAULT_DB_ALIAS:
+            return True
+        return app_label == 'posts' or (app_label, model_name) == (
+            'auth', 'user'
+        )
+
+
+def replicate(instance):
+    """Копирует пользователя или группу из 'default' во все шарды."""
+    model = type(instance)
+    values = {
+        field.attname: getattr(instance, field.attname)
+        for field in model._meta.concrete_fields
+    }
+    for alias in shards():
+        if alias != DEFAULT_DB_ALIAS:
+            model(**values).save_base(using=alias, raw=True)
+
+
+def unreplicate(instance):
+    """Удаляет копию из шардов вместе с записями, но без таблиц auth."""
+    from posts.bulk import raw_delete
+    for alias in shards():
+        if alias != DEFAULT_DB_ALIAS:
+            with transaction.atomic(using=alias):
+                raw_delete(type(instance), [instance.pk], alias)
+
+
+def find_post(pk, model=Post):
+    """Запись из шарда, где она лежит, или None.
+
+    Во время переноса автора запись есть в двух шардах; тогда берется
+    копия из шарда, который указывает справочник.
+    """
+    for alias in shards():
+        post = model.objects.using(alias).select_related(
+            'group', 'author'
+        ).filter(pk=pk).first()
+        if post is None:
+            continue
+        expected = shard_for_author(post.author_id)
+        if expected != alias:
+            post = model.objects.using(expected).select_related(
+                'group', 'author'
+            ).filter(pk=pk).first() or post
+        return post
+    return None
+
+
+def _copied_authors(alias):
+    """Авторы, чьи записи лежат в alias лишь копией на время переноса."""
+    return list(
+        AuthorShard.objects.using(DEFAULT_DB_ALIAS).filter(
+            copy=alias
+        ).exclude(shard=alias).values_list('author_id', flat=True)
+    )
+
+
+class ShardedPosts:
+    """Лента записей из всех шардов, слитая по -pub_date.
+
+    Поддерживает count() и срезы, поэтому подходит для Paginator.
+    Срез [start:stop] читает из каждого шарда первые stop записей и
+    сливает отсортированные потоки heapq.merge; с одним шардом это
+    обычный срез запроса. Копии записей переносимых авторов
+    отбрасываются в запросах, поэтому и count(), и страницы их не
+    учитывают.
+    """
+
+    ordered = True
+
+    def __init__(self, queryset):
+        queryset = queryset.order_by('-pub_date', '-pk')
+        aliases = shards()
+        if len(aliases) == 1:
+            self.querysets = [queryset.using(aliases[0])]
+        else:
+            self.querysets = []
+            for alias in aliases:
+                shard_queryset = queryset.using(alias)
+                copied = _copied_authors(alias)
+                if copied:
+                    shard_queryset = shard_queryset.exclude(
+                        author_id__in=copied
+                    )
+                self.querysets.append(shard_queryset)
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = sum(qs.count() for qs in self.querysets)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            if item < 0:
+                raise IndexError('Отрицательные индексы не поддерживаются')
+            result = self[item:item + 1]
+            if not result:
+                raise IndexError(item)
+            return result[0]
+        if len(self.querysets) == 1:
+            return list(self.querysets[0][item])
+        return merged_slice(self.querysets, item.start or 0, item.stop)
+
+
+def merged_slice(querysets, start, stop):
+    """Срез [start:stop] общей ленты запросов, упорядоченных по -pub_date.
+
+    Из каждого запроса читаются первые stop записей, потоки сливаются
+    heapq.merge по (pub_date, pk).
+    """
+    streams = [qs if stop is None else qs[:stop] for qs in querysets]
+    merged = heapq.merge(
+        *streams, key=lambda post: (post.pub_date, post.pk), reverse=True
+    )
+    return list(islice(merged, start, stop))
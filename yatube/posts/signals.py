@@ -0,0 +1,234 @@
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import Signal, receiver
+
+from posts import (archive, duplicates, live, related, sharding, sitemaps,
+                   tagging)
+from posts.cache import bump_versions, post_scope
+from posts.groups import SCOPE_GROUPS
+from posts.models import ArchivedPost, Comment, Group, Post, User
+
+# Отправляется после массового изменения записей в обход save()/delete().
+# post_ids - затронутые записи, author_ids и group_ids - авторы и группы
+# до и после изменения, deleted - были ли записи удалены, month_changes -
+# изменения помесячных счетчиков (archive.month_changes), referrer_ids -
+# записи, в похожих которых были удаленные, using - база записей.
+posts_bulk_changed = Signal(
+    providing_args=[
+        'post_ids', 'author_ids', 'group_ids', 'deleted', 'month_changes',
+        'referrer_ids', 'using',
+    ]
+)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_scopes(sender, instance, raw=False, **kwargs):
+    """Запоминает автора и группу записи до сохранения."""
+    instance._previous = None
+    if raw or instance._state.adding:
+        return
+    instance._previous = Post.objects.using(instance._state.db).filter(
+        pk=instance.pk
+    ).values_list('author_id', 'group_id', 'pub_date').first()
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw=False, **kwargs):
+    """Обновляет помесячные счетчики архива после сохранения записи."""
+    if raw:
+        return
+    previous = getattr(instance, '_previous', None)
+    current = (instance.author_id, instance.group_id, instance.pub_date)
+    if previous == current:
+        return
+    if previous is not None:
+        author_id, group_id, pub_date = previous
+        archive.change_count(
+            archive.post_scopes(author_id, group_id),
+            *archive.month_of(pub_date), -1
+        )
+    archive.change_count(
+        archive.post_scopes(instance.author_id, instance.group_id),
+        *archive.month_of(instance.pub_date), 1
+    )
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, created, raw=False,
+                     update_fields=None, **kwargs):
+    """Разбирает теги, упоминания и подпись сохраненной записи."""
+    if raw or (update_fields is not None and 'text' not in update_fields):
+        return
+    tagging.index_posts([instance], created=created)
+    duplicates.index_posts([instance], created=created)
+
+
+@receiver(post_save, sender=Post)
+def advance_latest_post(sender, instance, created, raw=False, **kwargs):
+    """Отмечает новую запись или запись, перенесенную в другую группу."""
+    if raw:
+        return
+    if created:
+        scopes = [archive.SCOPE_ALL]
+        if instance.group_id is not None:
+            scopes.append(archive.group_scope(instance.group_id))
+        live.advance(scopes, instance.pk)
+        return
+    previous = getattr(instance, '_previous', None)
+    if previous is None or previous[1] == instance.group_id:
+        return
+    if previous[1] is not None:
+        # Отметка старой группы могла указывать на ушедшую запись.
+        live.forget([archive.group_scope(previous[1])])
+    if instance.group_id is not None:
+        live.advance([archive.group_scope(instance.group_id)], instance.pk)
+
+
+@receiver(posts_bulk_changed, sender=Post)
+def forget_latest_posts(sender, group_ids, **kwargs):
+    """Записи могли перейти в другую группу или исчезнуть."""
+    live.forget(
+        [archive.SCOPE_ALL]
+        + [archive.group_scope(group_id) for group_id in group_ids]
+    )
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    """Уменьшает помесячные счетчики архива после удаления записи."""
+    archive.change_count(
+        archive.post_scopes(instance.author_id, instance.group_id),
+        *archive.month_of(instance.pub_date), -1
+    )
+
+
+@receiver(post_delete, sender=ArchivedPost)
+def count_deleted_archived_post(sender, instance, **kwargs):
+    """Архивные записи тоже учтены в счетчиках и закэшированных лентах."""
+    scopes = archive.post_scopes(instance.author_id, instance.group_id)
+    archive.change_count(scopes, *archive.month_of(instance.pub_date), -1)
+    bump_versions({*scopes, post_scope(instance.pk)})
+
+
+@receiver(posts_bulk_changed, sender=Post)
+def count_bulk_changed(sender, month_changes, **kwargs):
+    """Меняет счетчики архива на разницу, посчитанную по строкам пачки."""
+    archive.apply_month_changes(month_changes)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_post_versions(sender, instance, raw=False, **kwargs):
+    """Отмечает изменение лент, в которые попадает запись."""
+    if raw:
+        return
+    scopes = set(archive.post_scopes(instance.author_id, instance.group_id))
+    scopes.add(post_scope(instance.pk))
+    previous = getattr(instance, '_previous', None)
+    if previous is not None:
+        scopes.update(archive.post_scopes(*previous[:2]))
+    bump_versions(scopes)
+
+
+@receiver(pre_delete, sender=Post)
+def remember_referrers(sender, instance, **kwargs):
+    """Строки похожих записей удаляются каскадом раньше post_delete."""
+    instance._referrers = related.referrers(instance._state.db, [instance.pk])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_referrer_versions(sender, instance, created=False, raw=False,
+                           update_fields=None, **kwargs):
+    """Страницы записей, где запись показана среди похожих, устаревают."""
+    if raw or created:
+        return
+    if update_fields is not None and not {'text', 'author'} & set(
+        update_fields
+    ):
+        return
+    post_ids = getattr(instance, '_referrers', None)
+    if post_ids is None:
+        post_ids = related.referrers(instance._state.db, [instance.pk])
+    bump_versions([post_scope(post_id) for post_id in post_ids])
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def bump_group_version(sender, instance, raw=False, **kwargs):
+    """Отмечает изменение ленты группы при правке самой группы."""
+    if not raw:
+        bump_versions([archive.group_scope(instance.pk), SCOPE_GROUPS])
+
+
+@receiver(posts_bulk_changed, sender=Post)
+def bump_bulk_versions(sender, post_ids, author_ids, group_ids, **kwargs):
+    """Отмечает изменение лент после массовых операций."""
+    bump_versions(
+        [archive.SCOPE_ALL]
+        + [archive.author_scope(author_id) for author_id in author_ids]
+        + [archive.group_scope(group_id) for group_id in group_ids]
+        + [post_scope(post_id) for post_id in post_ids]
+    )
+
+
+@receiver(posts_bulk_changed, sender=Post)
+def bump_bulk_referrer_versions(sender, post_ids, deleted, referrer_ids=(),
+                                using=None, **kwargs):
+    """Удаляемые записи передают списки сами: строки уже удалены."""
+    if not deleted:
+        referrer_ids = related.referrers(using, post_ids)
+    bump_versions([post_scope(post_id) for post_id in referrer_ids])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_comment_version(sender, instance, raw=False, **kwargs):
+    """Отмечает изменение страницы записи при правке комментария."""
+    if not raw:
+        bump_versions([post_scope(instance.post_id)])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_sitemap(sender, instance, **kwargs):
+    sitemaps.invalidate('posts', [instance.pk])
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_sitemap(sender, instance, **kwargs):
+    sitemaps.invalidate('groups', [instance.pk])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_profile_sitemap(sender, instance, update_fields=None,
+                               **kwargs):
+    """Вход пользователя (правка last_login) карту сайта не меняет."""
+    if update_fields and 'username' not in update_fields:
+        return
+    sitemaps.invalidate('profiles', [instance.pk])
+
+
+@receiver(posts_bulk_changed, sender=Post)
+def invalidate_bulk_sitemap(sender, post_ids, deleted, **kwargs):
+    """Удаленные записи пропадают из своих файлов карты сайта."""
+    if deleted:
+        sitemaps.invalidate('posts', post_ids)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Group)
+def replicate_to_shards(sender, instance, raw=False, using=None, **kwargs):
+    """Пользователи и группы нужны в каждом шарде для внешних ключей."""
+    if not raw and using == DEFAULT_DB_ALIAS:
+        sharding.replicate(instance)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+def unreplicate_from_shards(sender, instance, using=None, **kwargs):
+    if using == DEFAULT_DB_ALIAS:
+        sharding.unreplicate(instance)
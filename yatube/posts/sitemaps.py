@@ -0,0 +1,139 @@
+import heapq
+from xml.sax.saxutils import escape
+
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+
+from posts.models import ArchivedPost, Group, Post, User
+
+CHUNK_SIZE = 10000
+SITEMAP_TIMEOUT = 60 * 60 * 24 * 7
+SITEMAP_KEY = 'posts:sitemap:{}:{}'
+SITEMAP_CONTENT_TYPE = 'application/xml; charset=utf-8'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def _post_rows(start, end):
+    # Архивные записи доступны по тем же адресам.
+    rows = heapq.merge(*(
+        model.objects.filter(pk__gte=start, pk__lt=end).order_by(
+            'pk'
+        ).values_list('pk', 'pub_date').iterator()
+        for model in (Post, ArchivedPost)
+    ))
+    for pk, pub_date in rows:
+        yield reverse('posts:post_detail', args=[pk]), pub_date
+
+
+def _group_rows(start, end):
+    rows = Group.objects.filter(pk__gte=start, pk__lt=end).order_by(
+        'pk'
+    ).values_list('slug', flat=True).iterator()
+    for slug in rows:
+        yield reverse('posts:group_posts', args=[slug]), None
+
+
+def _profile_rows(start, end):
+    rows = User.objects.filter(pk__gte=start, pk__lt=end).order_by(
+        'pk'
+    ).values_list('username', flat=True).iterator()
+    for username in rows:
+        yield reverse('posts:profile', args=[username]), None
+
+
+# Раздел карты сайта: модели для поиска последнего pk и источник строк.
+SECTIONS = {
+    'posts': ((Post, ArchivedPost), _post_rows),
+    'groups': ((Group,), _group_rows),
+    'profiles': ((User,), _profile_rows),
+}
+
+
+def last_chunk(section):
+    """Номер последнего файла раздела или None, если раздел пуст."""
+    models, _ = SECTIONS[section]
+    pks = [
+        model.objects.aggregate(last_pk=Max('pk'))['last_pk']
+        for model in models
+    ]
+    pks = [pk for pk in pks if pk is not None]
+    return chunk_of(max(pks)) if pks else None
+
+
+def chunk_of(pk):
+    """Номер файла карты сайта, в который попадает объект."""
+    return pk // CHUNK_SIZE
+
+
+def invalidate(section, pks):
+    """Сбрасывает кэш файлов карты сайта, в которые попадают объекты.
+
+    Остальные файлы раздела остаются в кэше и не пересобираются.
+    """
+    cache.delete_many([
+        SITEMAP_KEY.format(section, chunk)
+        for chunk in {chunk_of(pk) for pk in pks}
+    ])
+
+
+def _render_chunk(section, chunk):
+    """Собирает файл карты сайта проходом по диапазону первичных ключей.
+
+    Адреса хранятся без домена, он подставляется при ответе.
+    """
+    _, rows = SECTIONS[section]
+    start = chunk * CHUNK_SIZE
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        f'<urlset xmlns="{XMLNS}">\n',
+    ]
+    for path, lastmod in rows(start, start + CHUNK_SIZE):
+        parts.append(f'<url><loc>{escape(path)}</loc>')
+        if lastmod is not None:
+            parts.append(f'<lastmod>{lastmod.date().isoformat()}</lastmod>')
+        parts.append('</url>\n')
+    parts.append('</urlset>\n')
+    return ''.join(parts)
+
+
+def _with_origin(request, content):
+    origin = escape(request.build_absolute_uri('/')[:-1])
+    return HttpResponse(
+        content.replace('<loc>', f'<loc>{origin}'),
+        content_type=SITEMAP_CONTENT_TYPE
+    )
+
+
+def sitemap_index(request):
+    """Индекс карты сайта: по файлу на каждый диапазон ключей раздела."""
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        f'<sitemapindex xmlns="{XMLNS}">\n',
+    ]
+    for section in SECTIONS:
+        last = last_chunk(section)
+        if last is None:
+            continue
+        for chunk in range(last + 1):
+            path = reverse('posts:sitemap_section', args=[section, chunk])
+            parts.append(f'<sitemap><loc>{escape(path)}</loc></sitemap>\n')
+    parts.append('</sitemapindex>\n')
+    return _with_origin(request, ''.join(parts))
+
+
+def sitemap_section(request, section, chunk):
+    """Файл карты сайта раздела, закэшированный до изменения его объектов."""
+    if section not in SECTIONS:
+        raise Http404('Нет такого раздела карты сайта')
+    # Иначе в кэш можно было бы набить пустых файлов по любым номерам.
+    last = last_chunk(section)
+    if last is None or chunk > last:
+        raise Http404('Нет такого файла карты сайта')
+    key = SITEMAP_KEY.format(section, chunk)
+    content = cache.get(key)
+    if content is None:
+        content = _render_chunk(section, chunk)
+        cache.set(key, content, SITEMAP_TIMEOUT)
+    return _with_origin(request, content)
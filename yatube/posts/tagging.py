@@ -0,0 +1,62 @@
+from django.db import transaction
+
+from posts import markup
+from posts.models import Mention, PostTag, Tag, User
+
+
+def index_posts(posts, created=False):
+    """Перестраивает теги и упоминания пачки записей.
+
+    На всю пачку приходится по одному запросу тегов и пользователей;
+    для только что созданных записей старые строки не удаляются.
+    """
+    posts = list(posts)
+    if not posts:
+        return
+    # Пачка записей из одного шарда; теги у каждого шарда свои.
+    using = posts[0]._state.db
+    tags = {post.pk: markup.mentioned_tags(post.text) for post in posts}
+    usernames = {
+        post.pk: markup.mentioned_usernames([post.text]) for post in posts
+    }
+    names = set().union(*tags.values())
+    all_usernames = set().union(*usernames.values())
+    tag_ids = {}
+    if names:
+        Tag.objects.using(using).bulk_create(
+            (Tag(name=name) for name in names), ignore_conflicts=True
+        )
+        tag_ids = dict(
+            Tag.objects.using(using).filter(name__in=names).values_list(
+                'name', 'pk'
+            )
+        )
+    user_ids = {}
+    if all_usernames:
+        user_ids = dict(
+            User.objects.filter(username__in=all_usernames).values_list(
+                'username', 'pk'
+            )
+        )
+    post_tags = [
+        PostTag(post_id=post.pk, tag_id=tag_ids[name],
+                pub_date=post.pub_date)
+        for post in posts
+        for name in tags[post.pk]
+    ]
+    mentions = [
+        Mention(post_id=post.pk, user_id=user_ids[username],
+                pub_date=post.pub_date)
+        for post in posts
+        for username in usernames[post.pk]
+        if username in user_ids
+    ]
+    with transaction.atomic(using=using):
+        if not created:
+            post_ids = [post.pk for post in posts]
+            PostTag.objects.using(using).filter(post_id__in=post_ids).delete()
+            Mention.objects.using(using).filter(post_id__in=post_ids).delete()
+        if post_tags:
+            PostTag.objects.using(using).bulk_create(post_tags)
+        if mentions:
+            Mention.objects.using(using).bulk_create(mentions)
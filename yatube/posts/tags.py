@@ -0,0 +1,51 @@
+from django.contrib.auth.decorators import login_required
+from django.db.models import Q
+from django.http import HttpResponseBadRequest
+from django.shortcuts import get_object_or_404, render
+
+from posts.fragments import decode_cursor, encode_cursor
+from posts.models import Tag
+from posts.views import FULL_TEXT_FIELDS, LIMIT
+
+
+def _keyset_list(request, rows, context):
+    """Страница записей по индексу (pub_date, post) после курсора.
+
+    rows - строки PostTag или Mention одного тега или пользователя,
+    поэтому выборка - это диапазон индекса без OFFSET и LIKE по тексту.
+    """
+    cursor = request.GET.get('cursor')
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            return HttpResponseBadRequest('Неверный курсор')
+        pub_date, pk = position
+        rows = rows.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, post_id__lt=pk)
+        )
+    rows = rows.select_related('post__author', 'post__group').defer(
+        *(f'post__{field}' for field in FULL_TEXT_FIELDS)
+    ).order_by('-pub_date', '-post_id')
+    posts = [row.post for row in rows[:LIMIT + 1]]
+    next_cursor = None
+    if len(posts) > LIMIT:
+        posts = posts[:LIMIT]
+        next_cursor = encode_cursor(posts[-1])
+    context.update(posts=posts, next_cursor=next_cursor)
+    return render(request, 'posts/keyset_list.html', context)
+
+
+def tag_posts(request, name):
+    """Записи с тегом #name."""
+    tag = get_object_or_404(Tag, name=name.lower())
+    return _keyset_list(
+        request, tag.post_tags.all(), {'title': f'Записи с тегом {tag}'}
+    )
+
+
+@login_required
+def mentions(request):
+    """Записи, в которых упомянут текущий пользователь."""
+    return _keyset_list(
+        request, request.user.mentions.all(), {'title': 'Упоминания меня'}
+    )
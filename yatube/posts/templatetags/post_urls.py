@@ -0,0 +1,62 @@
+from urllib.parse import quote
+
+from django import template
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import get_script_prefix, get_urlconf, reverse
+from django.utils.http import RFC3986_SUBDELIMS
+
+register = template.Library()
+
+SENTINEL = 918273645
+SAFE_CHARS = RFC3986_SUBDELIMS + '/~:@'
+
+# (urlconf, префикс, имя маршрута) -> части адреса до и после аргумента.
+_patterns = {}
+
+
+@receiver(setting_changed)
+def clear_patterns(setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        _patterns.clear()
+
+
+def _build(name, value):
+    """Адрес маршрута с одним аргументом без обхода резолвера.
+
+    Резолвер вызывается один раз на маршрут: адрес с меткой вместо
+    аргумента делится на две части, между которыми потом вставляется
+    значение, экранированное так же, как это делает reverse().
+    """
+    key = (get_urlconf(), get_script_prefix(), name)
+    parts = _patterns.get(key)
+    if parts is None:
+        parts = reverse(name, args=[SENTINEL]).split(str(SENTINEL))
+        _patterns[key] = parts
+    head, tail = parts
+    return f'{head}{quote(value, safe=SAFE_CHARS)}{tail}'
+
+
+def _build_str(name, value):
+    """Строку, не подходящую конвертеру str, разбирает reverse()."""
+    if not value or '/' in value:
+        return reverse(name, args=[value])
+    return _build(name, value)
+
+
+@register.simple_tag
+def post_url(post_id):
+    """Адрес страницы записи, как {% url 'posts:post_detail' post_id %}."""
+    return _build('posts:post_detail', str(int(post_id)))
+
+
+@register.simple_tag
+def profile_url(username):
+    """Адрес профиля, как {% url 'posts:profile' username %}."""
+    return _build_str('posts:profile', str(username))
+
+
+@register.simple_tag
+def group_url(slug):
+    """Адрес группы, как {% url 'posts:group_posts' slug %}."""
+    return _build_str('posts:group_posts', str(slug))
@@ -0,0 +1,63 @@
+from django import template
+from django.template.defaulttags import CsrfTokenNode
+from django.utils.safestring import mark_safe
+
+from posts.cache import get_or_compute, get_version
+
+register = template.Library()
+
+# Вместо {% csrf_token %} в общем фрагменте выводится метка, которую
+# при каждом запросе заменяет токен текущего пользователя.
+CSRF_HOLE = '<!--csrf-hole-->'
+
+
+class SharedCacheNode(template.Node):
+    def __init__(self, nodelist, scope, parts):
+        self.nodelist = nodelist
+        self.scope = scope
+        self.parts = parts
+
+    def render(self, context):
+        scope = self.scope.resolve(context)
+        if scope is None:
+            html = self.nodelist.render(context)
+        else:
+            parts = ':'.join(str(part.resolve(context)) for part in self.parts)
+            html = get_or_compute(
+                f'posts:body:{scope}:{parts}',
+                lambda: self.nodelist.render(context),
+                get_version(scope)
+            )
+        if CSRF_HOLE in html:
+            html = html.replace(CSRF_HOLE, CsrfTokenNode().render(context))
+        return mark_safe(html)
+
+
+@register.tag
+def shared_cache(parser, token):
+    """Фрагмент страницы, общий для всех пользователей.
+
+    {% shared_cache scope part ... %} ... {% endshared_cache %}
+
+    Фрагмент кэшируется по версии области scope и частям ключа; если
+    scope равен None, он просто отрисовывается. Все, что зависит от
+    пользователя, должно остаться снаружи, входить в ключ или быть
+    {% csrf_hole %}.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' требует как минимум область версии."
+        )
+    nodelist = parser.parse(('endshared_cache',))
+    parser.delete_first_token()
+    return SharedCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
+
+
+@register.simple_tag
+def csrf_hole():
+    return mark_safe(CSRF_HOLE)
@@ -0,0 +1,133 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import SCOPE_ALL, author_scope, group_scope, recount
+from ..bulk import bulk_delete, bulk_update
+from ..models import Group, Post, PostMonthCount
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+    """Класс тестирования архива записей."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Метод с фикстурами."""
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+        cls.now = timezone.localtime()
+
+    def setUp(self):
+        """Метод с фикстурами."""
+        self.client = Client()
+        self.post = Post.objects.create(
+            author=ArchiveTests.user,
+            text='Тестовый пост',
+            group=ArchiveTests.group
+        )
+
+    def count(self, scope):
+        counter = PostMonthCount.objects.filter(
+            scope=scope,
+            year=ArchiveTests.now.year,
+            month=ArchiveTests.now.month
+        ).first()
+        return counter.count if counter else 0
+
+    def test_counters_follow_changes(self):
+        """Счетчики меняются при создании, правке и удалении записи."""
+        group_id = ArchiveTests.group.pk
+        other_id = ArchiveTests.other_group.pk
+        self.assertEqual(self.count(SCOPE_ALL), 1)
+        self.assertEqual(self.count(group_scope(group_id)), 1)
+        self.post.group = ArchiveTests.other_group
+        self.post.save()
+        self.assertEqual(self.count(group_scope(group_id)), 0)
+        self.assertEqual(self.count(group_scope(other_id)), 1)
+        self.assertEqual(self.count(SCOPE_ALL), 1)
+        self.post.delete()
+        self.assertEqual(self.count(SCOPE_ALL), 0)
+        self.assertEqual(self.count(author_scope(ArchiveTests.user.pk)), 0)
+
+    def test_bulk_changes_recount(self):
+        """Массовые операции меняют счетчики затронутых областей."""
+        other = User.objects.create_user(username='other')
+        with CaptureQueriesContext(connection) as queries:
+            bulk_update(
+                Post.objects.all(), group_id=ArchiveTests.other_group.pk,
+                author_id=other.pk
+            )
+        self.assertFalse(
+            [query for query in queries if 'GROUP BY' in query['sql']]
+        )
+        self.assertEqual(self.count(group_scope(ArchiveTests.group.pk)), 0)
+        self.assertEqual(
+            self.count(group_scope(ArchiveTests.other_group.pk)), 1
+        )
+        self.assertEqual(self.count(author_scope(ArchiveTests.user.pk)), 0)
+        self.assertEqual(self.count(author_scope(other.pk)), 1)
+        self.assertEqual(self.count(SCOPE_ALL), 1)
+        bulk_delete(Post.objects.all())
+        self.assertEqual(self.count(author_scope(other.pk)), 0)
+        self.assertEqual(self.count(SCOPE_ALL), 0)
+        recount(author_ids=[ArchiveTests.user.pk, other.pk])
+        self.assertEqual(self.count(SCOPE_ALL), 0)
+
+    def test_recount_command(self):
+        """Команда восстанавливает счетчики, измененные мимо сигналов."""
+        PostMonthCount.objects.all().delete()
+        PostMonthCount.objects.create(
+            scope=author_scope(0), year=ArchiveTests.now.year,
+            month=ArchiveTests.now.month, count=5
+        )
+        call_command('recount_archive', stdout=StringIO())
+        self.assertEqual(self.count(SCOPE_ALL), 1)
+        self.assertEqual(self.count(group_scope(ArchiveTests.group.pk)), 1)
+        self.assertEqual(self.count(author_scope(0)), 0)
+
+    def test_archive_pages(self):
+        """Страницы архива показывают записи и помесячные счетчики."""
+        year, month = ArchiveTests.now.year, ArchiveTests.now.month
+        urls = (
+            reverse('posts:archive', args=[year]),
+            reverse('posts:archive_month', args=[year, month]),
+            reverse(
+                'posts:group_archive', args=[ArchiveTests.group.slug, year]
+            ),
+            reverse(
+                'posts:profile_archive_month',
+                args=[ArchiveTests.user.username, year, month]
+            ),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.context['page_obj']), 1)
+                self.assertEqual(
+                    [c.count for c in response.context['month_counts']], [1]
+                )
+        response = self.client.get(reverse('posts:archive', args=[1999]))
+        self.assertEqual(len(response.context['page_obj']), 0)
+        response = self.client.get(
+            reverse('posts:archive_month', args=[year, 13])
+        )
+        self.assertEqual(response.status_code, 404)
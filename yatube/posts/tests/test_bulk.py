@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..bulk import bulk_delete, bulk_update
+from ..models import Group, Post
+from ..signals import posts_bulk_changed
+
+User = get_user_model()
+
+
+class BulkTests(TestCase):
+    """Класс тестирования массовых операций над записями."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Метод с фикстурами."""
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@yatube.ru', password='admin'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.new_group = Group.objects.create(
+            title='Новая группа',
+            slug='new-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        """Метод с фикстурами."""
+        Post.objects.bulk_create(
+            Post(author=BulkTests.user, text=f'Пост {i}',
+                 group=BulkTests.group)
+            for i in range(7)
+        )
+        self.events = []
+        posts_bulk_changed.connect(self.receiver)
+
+    def tearDown(self):
+        posts_bulk_changed.disconnect(self.receiver)
+
+    def receiver(self, **kwargs):
+        self.events.append(kwargs)
+
+    def test_bulk_update_in_chunks(self):
+        """Записи переносятся пачками, по сигналу на каждую пачку."""
+        done = bulk_update(
+            Post.objects.all(), chunk_size=3,
+            group_id=BulkTests.new_group.pk
+        )
+        self.assertEqual(done, 7)
+        self.assertEqual(BulkTests.new_group.posts.count(), 7)
+        self.assertEqual(len(self.events), 3)
+        self.assertEqual(
+            self.events[0]['group_ids'],
+            {BulkTests.group.pk, BulkTests.new_group.pk}
+        )
+
+    def test_bulk_delete(self):
+        """Записи удаляются пачками без загрузки объектов."""
+        progress = []
+        done = bulk_delete(
+            Post.objects.all(), progress=progress.append, chunk_size=5
+        )
+        self.assertEqual(done, 7)
+        self.assertEqual(progress, [5, 7])
+        self.assertFalse(Post.objects.exists())
+        self.assertTrue(all(event['deleted'] for event in self.events))
+
+    def test_admin_actions(self):
+        """Действия админки меняют автора и удаляют записи."""
+        client = Client()
+        client.force_login(BulkTests.admin)
+        url = reverse('admin:posts_post_changelist')
+        pks = list(Post.objects.values_list('pk', flat=True))
+        client.post(url, {
+            'action': 'reassign_author',
+            '_selected_action': pks[:4],
+            'author': BulkTests.other.username,
+        })
+        self.assertEqual(BulkTests.other.posts.count(), 4)
+        client.post(url, {
+            'action': 'delete_posts',
+            '_selected_action': pks[4:],
+        })
+        self.assertEqual(Post.objects.count(), 4)
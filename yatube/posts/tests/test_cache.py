@@ -0,0 +1,56 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from .. import cache as posts_cache
+from ..cache import get_metrics, get_or_compute
+
+
+class GetOrComputeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_hit_and_version(self):
+        """Значение пересчитывается только при смене версии."""
+        self.assertEqual(get_or_compute('key', self.compute, 1), 1)
+        self.assertEqual(get_or_compute('key', self.compute, 1), 1)
+        self.assertEqual(get_or_compute('key', self.compute, 2), 2)
+        metrics = get_metrics()
+        self.assertEqual(metrics['miss'], 1)
+        self.assertEqual(metrics['hit'], 1)
+        self.assertEqual(metrics['stale'], 1)
+
+    def test_stale_while_revalidate(self):
+        """Пока другой процесс пересчитывает, отдается старое значение."""
+        get_or_compute('key', self.compute, 1)
+        cache.add('key:lock', 1)
+        self.assertEqual(get_or_compute('key', self.compute, 2), 1)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(get_metrics()['served_stale'], 1)
+
+    def test_wait_for_missing(self):
+        """Без старого значения запрос недолго ждет чужой пересчет."""
+        cache.add('key:lock', 1)
+        with mock.patch.object(posts_cache, 'WAIT_TIMEOUT', 0.05):
+            self.assertEqual(get_or_compute('key', self.compute, 1), 1)
+        self.assertEqual(get_metrics()['wait_timeout'], 1)
+
+    def test_early_refresh(self):
+        """Близкое к истечению значение иногда пересчитывается заранее."""
+        def slow():
+            time.sleep(0.01)
+            return self.compute()
+
+        get_or_compute('key', slow, 1, timeout=5)
+        self.assertEqual(get_or_compute('key', slow, 1, timeout=5), 1)
+        with mock.patch.object(posts_cache.random, 'random',
+                               return_value=1e-300):
+            self.assertEqual(get_or_compute('key', slow, 1, timeout=5), 2)
+        self.assertEqual(get_metrics()['early'], 1)
@@ -0,0 +1,172 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import archive
+from ..cold_storage import ChainedPosts
+from ..models import ArchivedPost, Comment, Post
+
+User = get_user_model()
+LIMIT = 10
+
+
+class ColdStorageTests(TestCase):
+    """Класс тестирования переноса старых записей в архив."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Метод с фикстурами."""
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        """Метод с фикстурами."""
+        self.client = Client()
+        old = timezone.now() - datetime.timedelta(days=400)
+        for i in range(8):
+            Post.objects.create(
+                author=ColdStorageTests.user, text=f'Новый {i}'
+            )
+        for i in range(7):
+            post = Post.objects.create(
+                author=ColdStorageTests.user, text=f'Старый {i}'
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=old + datetime.timedelta(minutes=i)
+            )
+        self.commented = post
+        Comment.objects.create(
+            post=post, author=ColdStorageTests.user, text='Комментарий'
+        )
+        self.old_pk = Post.objects.order_by('pub_date').first().pk
+        call_command('archive_posts', batch_size=4, stdout=StringIO())
+
+    def test_old_posts_moved(self):
+        """Старые записи без комментариев перенесены в архив."""
+        self.assertEqual(ArchivedPost.objects.count(), 6)
+        self.assertEqual(Post.objects.count(), 9)
+        self.assertTrue(Post.objects.filter(pk=self.commented.pk).exists())
+
+    def test_post_detail_reads_archive(self):
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.old_pk])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['post'].is_archived)
+
+    def test_profile_reads_archive(self):
+        """Профиль показывает горячие записи, а за ними архивные."""
+        url = reverse('posts:profile', args=[ColdStorageTests.user.username])
+        response = self.client.get(url)
+        self.assertEqual(response.context['count_posts'], 15)
+        self.assertEqual(len(response.context['page_obj']), LIMIT)
+        response = self.client.get(url, {'page': 2})
+        page = list(response.context['page_obj'])
+        self.assertEqual(len(page), 5)
+        self.assertTrue(all(post.is_archived for post in page[1:]))
+
+    def test_fragment_continues_into_archive(self):
+        url = reverse(
+            'posts:profile_fragment', args=[ColdStorageTests.user.username]
+        )
+        first = self.client.get(url, {'format': 'json'}).json()
+        second = self.client.get(
+            url, {'format': 'json', 'cursor': first['next_cursor']}
+        ).json()
+        self.assertEqual(len(first['posts']) + len(second['posts']), 15)
+
+    def test_old_hot_post_order(self):
+        """Страницы показывают горячие записи до архива, подгрузка - по дате.
+
+        Страница читает архив со смещением, не сливая таблицы; курсор
+        подгрузки сливает обе таблицы по дате.
+        """
+        Post.objects.filter(pk=self.commented.pk).update(
+            pub_date=timezone.now() - datetime.timedelta(days=500)
+        )
+
+        def ordered(posts):
+            return [
+                post.pk for post in sorted(
+                    posts, key=lambda post: (post.pub_date, post.pk),
+                    reverse=True
+                )
+            ]
+
+        url = reverse('posts:profile', args=[ColdStorageTests.user.username])
+        first = self.client.get(url, {'page': 1}).context['page_obj']
+        pages = [
+            post.pk
+            for page in (first, self.client.get(
+                url, {'page': 2}
+            ).context['page_obj'])
+            for post in page
+        ]
+        self.assertEqual(
+            pages,
+            ordered(Post.objects.all()) + ordered(ArchivedPost.objects.all())
+        )
+        expected = ordered([*Post.objects.all(), *ArchivedPost.objects.all()])
+        url = reverse(
+            'posts:profile_fragment', args=[ColdStorageTests.user.username]
+        )
+        fragments = []
+        cursor = None
+        while True:
+            params = {'format': 'json'}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(url, params).json()
+            fragments += [post['id'] for post in data['posts']]
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(fragments, expected)
+
+    def test_chained_slices(self):
+        """Срез читает из архива только свои строки со смещением."""
+        def chain():
+            return ChainedPosts(
+                ColdStorageTests.user.posts.all(),
+                ColdStorageTests.user.archived_posts.all()
+            )
+
+        posts = chain()
+        hot = list(posts.hot)
+        chained = hot + list(posts.cold)
+        self.assertEqual(posts.count(), len(chained))
+        for start, stop in ((0, 2), (1, len(hot) + 2), (len(hot), None),
+                            (len(hot) + 1, len(hot) + 3)):
+            with self.subTest(start=start, stop=stop):
+                self.assertEqual(chain()[start:stop], chained[start:stop])
+        posts = chain()
+        posts.count()
+        with CaptureQueriesContext(connection) as queries:
+            posts[len(hot) + 1:len(hot) + 3]
+        self.assertEqual(len(queries), 1)
+        self.assertIn('LIMIT 2 OFFSET 1', queries[0]['sql'])
+
+    def test_deleted_archived_post_counted(self):
+        """Удаление архивной записи уменьшает счетчик месяца."""
+        # Даты в фикстуре меняются через update(), мимо счетчиков.
+        archive.recount(author_ids=[ColdStorageTests.user.pk])
+        post = ArchivedPost.objects.first()
+        scope = archive.author_scope(ColdStorageTests.user.pk)
+        year = timezone.localtime(post.pub_date).year
+
+        def total():
+            return sum(
+                counter.count
+                for counter in archive.month_counts(scope, year)
+            )
+
+        before = total()
+        post.delete()
+        self.assertEqual(total(), before - 1)
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post
+from ..views import COMMENTS_LIMIT
+
+User = get_user_model()
+
+
+class CommentsTests(TestCase):
+    """Класс тестирования комментариев."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Метод с фикстурами."""
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        cls.url = reverse('posts:post_detail', args=[cls.post.pk])
+        cls.comment_url = reverse('posts:add_comment', args=[cls.post.pk])
+
+    def setUp(self):
+        """Метод с фикстурами."""
+        cache.clear()
+        self.guest_client = Client()
+        self.author = Client()
+        self.author.force_login(CommentsTests.user)
+
+    def comment(self, text, parent=None):
+        return Comment.objects.create(
+            post=CommentsTests.post, author=CommentsTests.user,
+            text=text, parent=parent
+        )
+
+    def test_thread_order(self):
+        """Ветка выводится в порядке обхода одним запросом."""
+        first = self.comment('первый')
+        second = self.comment('второй')
+        reply = self.comment('ответ на первый', first)
+        nested = self.comment('ответ на ответ', reply)
+        self.assertEqual(nested.depth, 2)
+        response = self.guest_client.get(CommentsTests.url)
+        self.assertEqual(
+            response.context['comments'], [first, reply, nested, second]
+        )
+        self.assertContains(response, 'ответ на ответ')
+
+    def test_constant_queries(self):
+        """Число запросов не зависит от числа комментариев."""
+        self.comment('первый')
+        # Запись, похожие записи и комментарии.
+        with self.assertNumQueries(3):
+            self.guest_client.get(CommentsTests.url)
+        # Повторная страница берется из кэша, новый комментарий
+        # делает ее устаревшей.
+        with self.assertNumQueries(0):
+            self.guest_client.get(CommentsTests.url)
+        parent = self.comment('второй')
+        for i in range(10):
+            parent = self.comment(f'ответ {i}', parent)
+        with self.assertNumQueries(3):
+            self.guest_client.get(CommentsTests.url)
+
+    def test_keyset_pagination(self):
+        for i in range(COMMENTS_LIMIT + 5):
+            self.comment(f'комментарий {i}')
+        response = self.guest_client.get(CommentsTests.url)
+        self.assertEqual(len(response.context['comments']), COMMENTS_LIMIT)
+        response = self.guest_client.get(
+            CommentsTests.url,
+            {'comments_after': response.context['next_comments']}
+        )
+        self.assertEqual(len(response.context['comments']), 5)
+        self.assertIsNone(response.context['next_comments'])
+
+    def test_add_comment(self):
+        """Комментировать может только авторизованный пользователь."""
+        self.guest_client.post(CommentsTests.comment_url, {'text': 'гость'})
+        self.assertFalse(Comment.objects.exists())
+        self.author.post(CommentsTests.comment_url, {'text': 'корень'})
+        root = Comment.objects.get()
+        self.author.post(
+            CommentsTests.comment_url, {'text': 'ответ', 'parent': root.pk}
+        )
+        self.assertEqual(root.replies.get().text, 'ответ')
@@ -0,0 +1,92 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..digests import send_digests
+from ..models import Digest, Group, Post, Subscription
+
+User = get_user_model()
+
+
+class DigestsTests(TestCase):
+    """Класс тестирования рассылки дайджестов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group_post = Post.objects.create(
+            author=cls.other, group=cls.group, text='Запись в группе'
+        )
+        cls.author_post = Post.objects.create(
+            author=cls.author, text='Запись автора'
+        )
+        cls.unrelated = Post.objects.create(
+            author=cls.other, text='Чужая запись'
+        )
+
+    def subscriber(self, name, group=None, author=None, **digest):
+        user = User.objects.create_user(
+            username=name, email=f'{name}@example.com'
+        )
+        Digest.objects.create(user=user, **digest)
+        Subscription.objects.create(user=user, group=group, author=author)
+        return user
+
+    def test_send(self):
+        """Каждый получает записи только своих подписок, один раз."""
+        group_reader = self.subscriber('g', group=DigestsTests.group)
+        self.subscriber('a', author=DigestsTests.author)
+        self.subscriber('w', author=DigestsTests.author, frequency='weekly')
+        call_command('send_digests', chunk_size=1, batch_size=1,
+                     stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+        bodies = {message.to[0]: message.body for message in mail.outbox}
+        self.assertIn('Запись в группе', bodies['g@example.com'])
+        self.assertNotIn('Запись автора', bodies['g@example.com'])
+        self.assertIn('Запись автора', bodies['a@example.com'])
+        self.assertIn(
+            f'http://localhost:8000/posts/{DigestsTests.author_post.pk}/',
+            bodies['a@example.com']
+        )
+        for body in bodies.values():
+            self.assertNotIn('Чужая запись', body)
+        group_reader.digest.refresh_from_db()
+        self.assertIsNotNone(group_reader.digest.last_sent)
+        call_command('send_digests', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_old_posts_skipped(self):
+        """Записи старше последней отправки в дайджест не попадают."""
+        self.subscriber(
+            'a', author=DigestsTests.author,
+            last_sent=timezone.now() - datetime.timedelta(days=2),
+        )
+        Post.objects.filter(pk=DigestsTests.author_post.pk).update(
+            pub_date=timezone.now() - datetime.timedelta(days=3)
+        )
+        send_digests(Digest.DAILY, timezone.now())
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_queries_per_chunk(self):
+        """Число запросов на пачку не зависит от числа получателей.
+
+        Пять запросов на пачку и один, чтобы узнать, что пачек больше нет.
+        """
+        self.subscriber('a1', author=DigestsTests.author)
+        with self.assertNumQueries(6):
+            send_digests(Digest.DAILY, timezone.now())
+        Digest.objects.update(last_sent=None)
+        for i in range(5):
+            self.subscriber(f'u{i}', group=DigestsTests.group)
+        with self.assertNumQueries(6):
+            send_digests(Digest.DAILY, timezone.now())
@@ -0,0 +1,116 @@
+from io import StringIO
+from unittest import mock, skipIf
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import duplicates
+from ..models import Post, PostSignature
+
+User = get_user_model()
+
+SPAM = (
+    'Только сегодня скидка девяносто процентов на все часы и сумки, '
+    'пишите в личные сообщения и переходите по ссылке в профиле, '
+    'количество товара ограничено, успейте заказать до конца недели'
+)
+VARIANT = SPAM.replace('девяносто', 'восемьдесят')
+OTHER = (
+    'Вчера ездили за город смотреть на осенний лес, погода была '
+    'отличная, а на обратном пути зашли в старую пекарню у станции'
+)
+
+
+class DuplicatesTests(TestCase):
+    """Класс тестирования поиска почти одинаковых записей."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(DuplicatesTests.user)
+
+    def test_similarity(self):
+        """Похожие тексты близки по подписи, разные - далеки."""
+        spam = duplicates.signature(SPAM)
+        self.assertGreaterEqual(
+            duplicates.similarity(spam, duplicates.signature(VARIANT)),
+            duplicates.THRESHOLD
+        )
+        self.assertLess(
+            duplicates.similarity(spam, duplicates.signature(OTHER)), 0.2
+        )
+        self.assertIsNone(duplicates.signature('Слишком коротко'))
+
+    @skipIf(duplicates.numpy is None, 'numpy не установлен')
+    def test_numpy_matches_python(self):
+        self.assertEqual(
+            duplicates.signature(SPAM, vectorized=True),
+            duplicates.signature(SPAM, vectorized=False)
+        )
+
+    @override_settings(POSTS_REJECT_DUPLICATES=True)
+    def test_form_rejects_near_duplicate(self):
+        """Форма не пропускает копию, но пропускает другой текст."""
+        Post.objects.create(author=DuplicatesTests.user, text=SPAM)
+        url = reverse('posts:post_create')
+        response = self.client.post(url, {'text': VARIANT})
+        self.assertFormError(
+            response, 'form', 'text',
+            'Почти такая же запись уже опубликована'
+        )
+        self.client.post(url, {'text': OTHER})
+        self.assertEqual(Post.objects.count(), 2)
+
+    @override_settings(POSTS_REJECT_DUPLICATES=True)
+    def test_edit_does_not_match_itself(self):
+        post = Post.objects.create(author=DuplicatesTests.user, text=SPAM)
+        self.client.post(
+            reverse('posts:post_edit', args=[post.pk]), {'text': VARIANT}
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.text, VARIANT)
+
+    def test_duplicate_flagged(self):
+        """Без отклонения копия сохраняется и помечается."""
+        first = Post.objects.create(author=DuplicatesTests.user, text=SPAM)
+        self.client.post(reverse('posts:post_create'), {'text': VARIANT})
+        second = Post.objects.get(text=VARIANT)
+        self.assertIsNone(PostSignature.objects.get(pk=first.pk).duplicate_of)
+        self.assertEqual(
+            PostSignature.objects.get(pk=second.pk).duplicate_of, first.pk
+        )
+
+    def test_candidates_limited(self):
+        """Сравниваются только MAX_CANDIDATES самых новых подписей."""
+        posts = [
+            Post.objects.create(author=DuplicatesTests.user, text=SPAM)
+            for _ in range(3)
+        ]
+        with mock.patch.object(duplicates, 'MAX_CANDIDATES', 2):
+            with self.assertNumQueries(1):
+                found = duplicates.find_duplicates(
+                    duplicates.signature(VARIANT)
+                )
+        self.assertEqual(
+            sorted(post_id for _, post_id in found),
+            [posts[1].pk, posts[2].pk]
+        )
+
+    def test_index_command(self):
+        """Команда строит индекс и помечает копии внутри одной пачки."""
+        Post.objects.bulk_create(
+            Post(author=DuplicatesTests.user, text=text)
+            for text in (SPAM, OTHER, VARIANT)
+        )
+        posts = list(Post.objects.order_by('pk'))
+        call_command('index_duplicates', chunk_size=10, stdout=StringIO())
+        self.assertEqual(
+            dict(PostSignature.objects.values_list('pk', 'duplicate_of')),
+            {posts[0].pk: None, posts[1].pk: None, posts[2].pk: posts[0].pk}
+        )
@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..archive import SCOPE_ALL
+from ..cache import get_version
+from ..feeds import FEED_KEY
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FeedsTests(TestCase):
+    """Класс тестирования RSS/Atom лент."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Метод с фикстурами."""
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост в ленте',
+            group=cls.group
+        )
+        cls.urls = (
+            reverse('posts:feed', args=['rss']),
+            reverse('posts:feed', args=['atom']),
+            reverse('posts:group_feed', args=[cls.group.slug, 'rss']),
+            reverse('posts:profile_feed', args=[cls.user.username, 'atom']),
+        )
+
+    def setUp(self):
+        """Метод с фикстурами."""
+        cache.clear()
+        self.client = Client()
+
+    def test_feeds_contain_posts(self):
+        """Ленты отдаются и содержат запись."""
+        for url in FeedsTests.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(
+                    'Тестовый пост в ленте', response.content.decode()
+                )
+                self.assertTrue(response.has_header('ETag'))
+
+    def test_unknown_kind(self):
+        response = self.client.get(reverse('posts:feed', args=['json']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_conditional_get_and_cache(self):
+        """Повторный опрос не обращается к базе."""
+        url = reverse('posts:feed', args=['rss'])
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_feed_expires_without_version_change(self):
+        """Запись другого процесса с отдельным кэшем видна по таймауту."""
+        url = reverse('posts:feed', args=['rss'])
+        etag = self.client.get(url)['ETag']
+        key = FEED_KEY.format('rss', SCOPE_ALL, get_version(SCOPE_ALL))
+        # Лента перестроена без изменений: ETag тот же.
+        cache.delete(key)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with mock.patch('posts.signals.bump_versions'):
+            Post.objects.create(author=FeedsTests.user, text='Чужая запись')
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        cache.delete(key)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Чужая запись', response.content.decode())
+
+    def test_new_post_changes_feed(self):
+        """Новая запись меняет версию ленты."""
+        url = reverse('posts:group_feed', args=[FeedsTests.group.slug, 'rss'])
+        etag = self.client.get(url)['ETag']
+        Post.objects.create(
+            author=FeedsTests.user,
+            text='Свежая запись',
+            group=FeedsTests.group
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Свежая запись', response.content.decode())
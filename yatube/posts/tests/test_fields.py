@@ -0,0 +1,69 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from ..fields import RAW, ZLIB
+from ..models import Post
+
+User = get_user_model()
+
+LONG_TEXT = 'Очень длинная вставка кода.\n' * 500
+
+
+def stored_html(post):
+    """Значение text_html в том виде, в котором оно лежит в базе."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT text_html FROM posts_post WHERE id = %s', [post.pk]
+        )
+        return bytes(cursor.fetchone()[0])
+
+
+class CompressedTextFieldTests(TestCase):
+    """Класс тестирования сжатого текстового поля."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def test_long_text_compressed(self):
+        """Длинный HTML хранится сжатым и читается без изменений."""
+        post = Post.objects.create(
+            author=CompressedTextFieldTests.user, text=LONG_TEXT
+        )
+        stored = stored_html(post)
+        self.assertEqual(stored[:1], ZLIB)
+        self.assertLess(len(stored), len(post.text_html.encode()) // 10)
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).text_html, post.text_html
+        )
+
+    def test_short_text_raw(self):
+        """Короткий HTML хранится как есть."""
+        post = Post.objects.create(
+            author=CompressedTextFieldTests.user, text='Короткий'
+        )
+        self.assertEqual(stored_html(post), RAW + post.text_html.encode())
+        self.assertTrue(
+            Post.objects.filter(pk=post.pk, text_html=post.text_html).exists()
+        )
+
+    def test_legacy_text_recompressed(self):
+        """Команда переводит записанные текстом строки в новый формат."""
+        post = Post.objects.create(
+            author=CompressedTextFieldTests.user, text=LONG_TEXT
+        )
+        html = post.text_html
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE posts_post SET text_html = %s WHERE id = %s',
+                [html, post.pk]
+            )
+        self.assertEqual(Post.objects.get(pk=post.pk).text_html, html)
+        call_command('compress_posts', stdout=StringIO())
+        self.assertEqual(stored_html(post)[:1], ZLIB)
+        self.assertEqual(Post.objects.get(pk=post.pk).text_html, html)
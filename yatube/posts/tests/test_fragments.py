@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+LIMIT = 10
+
+
+class FragmentsTests(TestCase):
+    """Класс тестирования фрагментов лент для подгрузки."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Метод с фикстурами."""
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(15):
+            Post.objects.create(
+                author=cls.user, text=f'Пост номер {i}', group=cls.group
+            )
+
+    def setUp(self):
+        """Метод с фикстурами."""
+        self.client = Client()
+
+    def test_json_pages_follow_cursor(self):
+        """Курсор проходит ленту без пропусков и повторов."""
+        urls = (
+            reverse('posts:index_fragment'),
+            reverse('posts:group_fragment', args=['test-slug']),
+            reverse('posts:profile_fragment', args=['auth']),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.client.get(url, {'format': 'json'}).json()
+                self.assertEqual(len(first['posts']), LIMIT)
+                second = self.client.get(url, {
+                    'format': 'json', 'cursor': first['next_cursor']
+                }).json()
+                self.assertIsNone(second['next_cursor'])
+                ids = [post['id'] for post in first['posts'] + second['posts']]
+                self.assertEqual(
+                    ids,
+                    list(Post.objects.order_by(
+                        '-pub_date', '-pk'
+                    ).values_list('pk', flat=True))
+                )
+
+    def test_html_fragment(self):
+        """HTML-фрагмент не содержит оболочку страницы."""
+        response = self.client.get(reverse('posts:index_fragment'))
+        content = response.content.decode()
+        self.assertEqual(content.count('data-post-id'), LIMIT)
+        self.assertNotIn('<html', content)
+        self.assertTrue(response.has_header('X-Next-Cursor'))
+
+    def test_bad_cursor(self):
+        response = self.client.get(
+            reverse('posts:index_fragment'), {'cursor': 'oops'}
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,58 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import Http404
+from django.test import TestCase
+
+from ..forms import PostForm
+from ..groups import REGISTRY_TIMEOUT, get_group_or_404, registry
+from ..models import Group
+
+
+class GroupRegistryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(
+            title='Тестовая группа', slug='test', description='Описание'
+        )
+
+    def test_lookups_from_memory(self):
+        """После загрузки поиск групп не обращается к базе."""
+        registry.all()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_group_or_404('test'), self.group)
+            self.assertEqual(registry.get_by_pk(self.group.pk), self.group)
+            with self.assertRaises(Http404):
+                get_group_or_404('missing')
+
+    def test_reload_on_change(self):
+        """Сохранение и удаление группы обновляют реестр."""
+        registry.all()
+        self.group.slug = 'renamed'
+        self.group.save()
+        self.assertIsNone(registry.get_by_slug('test'))
+        self.assertEqual(registry.get_by_slug('renamed'), self.group)
+        self.group.delete()
+        self.assertEqual(registry.all(), ())
+
+    def test_reload_after_timeout(self):
+        """Группу другого процесса с отдельным кэшем видно по таймауту."""
+        registry.all()
+        with mock.patch('posts.groups.get_version', return_value=0):
+            registry.all()
+            Group.objects.create(title='Новая', slug='new')
+            self.assertIsNone(registry.get_by_slug('new'))
+            now = time.monotonic() + REGISTRY_TIMEOUT
+            with mock.patch('posts.groups.time.monotonic', return_value=now):
+                self.assertEqual(registry.get_by_slug('new').title, 'Новая')
+
+    def test_form_choices(self):
+        """Список групп в форме строится без запросов."""
+        registry.all()
+        with self.assertNumQueries(0):
+            html = str(PostForm()['group'])
+        self.assertIn('Тестовая группа', html)
+        form = PostForm(data={'text': 'Текст', 'group': self.group.pk})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['group'], self.group)
@@ -0,0 +1,99 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import live
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class NewPostsTests(TestCase):
+    """Класс тестирования опроса новых записей."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.url = reverse('posts:index_new')
+        cls.group_url = reverse('posts:group_new', args=['group'])
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(author=NewPostsTests.user, text='1')
+
+    def test_nothing_new_without_queries(self):
+        """Если новых записей нет, база не запрашивается."""
+        self.client.get(NewPostsTests.url, {'since': self.post.pk})
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                NewPostsTests.url, {'since': self.post.pk}
+            )
+        self.assertEqual(
+            response.json(), {'latest': self.post.pk, 'count': 0}
+        )
+
+    def test_new_posts(self):
+        """Новые записи считаются по области."""
+        self.client.get(NewPostsTests.group_url, {'since': 0})
+        in_group = Post.objects.create(
+            author=NewPostsTests.user, text='2', group=NewPostsTests.group
+        )
+        Post.objects.create(author=NewPostsTests.user, text='3')
+        response = self.client.get(NewPostsTests.url, {'since': self.post.pk})
+        self.assertEqual(response.json()['count'], 2)
+        response = self.client.get(
+            NewPostsTests.group_url, {'since': self.post.pk}
+        )
+        self.assertEqual(
+            response.json(), {'latest': in_group.pk, 'count': 1}
+        )
+        self.assertEqual(self.client.get(NewPostsTests.url).status_code, 400)
+
+    def test_no_server_side_wait(self):
+        """Запрос не ждет новых записей и подсказывает, когда прийти."""
+        with mock.patch.object(live.time, 'sleep') as sleep:
+            response = self.client.get(
+                NewPostsTests.url, {'since': self.post.pk, 'wait': 30}
+            )
+        sleep.assert_not_called()
+        self.assertEqual(response.json()['count'], 0)
+        self.assertEqual(response['Retry-After'], str(live.POLL_INTERVAL))
+
+    def test_edit_moves_post_into_group(self):
+        """Запись, перенесенная в группу, видна опросу этой группы."""
+        self.client.get(NewPostsTests.group_url, {'since': 0})
+        self.post.group = NewPostsTests.group
+        self.post.save()
+        response = self.client.get(NewPostsTests.group_url, {'since': 0})
+        self.assertEqual(
+            response.json(), {'latest': self.post.pk, 'count': 1}
+        )
+
+    def test_busy_lock_resets_mark(self):
+        """Если отметку обновляет другой процесс, она берется из базы."""
+        key = live.LATEST_KEY.format('all')
+        cache.set(key, 0)
+        cache.add(f'{key}:lock', 1)
+        with mock.patch.object(live, 'LOCK_WAIT', 0):
+            live.advance(['all'], self.post.pk)
+        self.assertIsNone(cache.get(key))
+        response = self.client.get(NewPostsTests.url, {'since': 0})
+        self.assertEqual(response.json()['latest'], self.post.pk)
+
+    def test_mark_expires(self):
+        """Отметка не бессрочна: другие процессы увидят новую запись."""
+        key = live.LATEST_KEY.format('all')
+        cache.delete(key)
+        with mock.patch.object(live, 'LATEST_TIMEOUT', 0.01):
+            live.advance(['all'], self.post.pk)
+        self.assertEqual(cache.get(key), self.post.pk)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get(key))
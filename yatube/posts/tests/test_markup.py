@@ -0,0 +1,72 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..markup import EXCERPT_LENGTH, render_excerpt, render_html
+from ..models import Post
+
+User = get_user_model()
+
+
+class MarkupTests(TestCase):
+    """Класс тестирования разметки текста записей."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Метод с фикстурами."""
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def test_render_html(self):
+        """Текст экранируется, ссылки и упоминания размечаются."""
+        html = render_html(
+            '<b>Привет</b>, @auth и @nobody!\n'
+            'Смотри [сюда](https://example.com/?a=1&b=2)\n\nВторой абзац',
+            {'auth'}
+        )
+        self.assertIn('&lt;b&gt;Привет&lt;/b&gt;', html)
+        self.assertIn(
+            f'<a href="{reverse("posts:profile", args=["auth"])}">@auth</a>',
+            html
+        )
+        self.assertIn('@nobody', html)
+        self.assertNotIn('/profile/nobody/', html)
+        self.assertIn(
+            '<a href="https://example.com/?a=1&amp;b=2" '
+            'rel="nofollow noopener">сюда</a>',
+            html
+        )
+        self.assertIn('<br>', html)
+        self.assertEqual(html.count('<p>'), 2)
+
+    def test_javascript_links_are_not_rendered(self):
+        html = render_html('[x](javascript:alert(1))')
+        self.assertNotIn('<a', html)
+
+    def test_excerpt(self):
+        excerpt = render_excerpt('[Ссылка](https://example.com) ' * 100)
+        self.assertTrue(excerpt.startswith('Ссылка Ссылка'))
+        self.assertLessEqual(len(excerpt), EXCERPT_LENGTH)
+
+    def test_save_renders_and_feed_shows_excerpt(self):
+        """HTML считается при сохранении, лента выводит только начало."""
+        text = 'Очень длинный текст @auth ' * 50
+        post = Post.objects.create(author=MarkupTests.user, text=text)
+        self.assertIn('/profile/auth/', post.text_html)
+        self.assertEqual(post.excerpt, render_excerpt(text))
+        content = Client().get(reverse('posts:index')).content.decode()
+        self.assertIn(post.excerpt, content)
+        self.assertNotIn(text, content)
+
+    def test_render_posts_command(self):
+        """Команда заполняет HTML у записей, сохраненных без него."""
+        Post.objects.bulk_create(
+            Post(author=MarkupTests.user, text=f'Пост @auth {i}')
+            for i in range(5)
+        )
+        call_command('render_posts', chunk_size=2, stdout=StringIO())
+        self.assertFalse(Post.objects.filter(text_html='').exists())
+        self.assertFalse(Post.objects.filter(excerpt='').exists())
@@ -0,0 +1,226 @@
+"""Регрессионные тесты производительности.
+
+Для каждой страницы приложения posts и для posts.utils.get_page
+измеряются количество запросов к базе, пиковая память и время
+отрисовки на заполненной базе. Результаты сравниваются с базовыми
+значениями из performance_baseline.json с допуском.
+
+Запуск только этих тестов:
+    python manage.py test --tag performance
+Обновление базовых значений:
+    PERF_UPDATE_BASELINE=1 python manage.py test --tag performance
+Допуски задаются переменными окружения PERF_QUERY_TOLERANCE,
+PERF_MEMORY_TOLERANCE, PERF_TIME_TOLERANCE (доля от базового значения)
+и PERF_TIME_SLACK_MS (абсолютный запас на шум таймера).
+"""
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Group, Post
+from ..utils import get_page
+
+User = get_user_model()
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'performance_baseline.json'
+)
+UPDATE_BASELINE = bool(os.environ.get('PERF_UPDATE_BASELINE'))
+QUERY_TOLERANCE = float(os.environ.get('PERF_QUERY_TOLERANCE', 0))
+MEMORY_TOLERANCE = float(os.environ.get('PERF_MEMORY_TOLERANCE', 0.5))
+TIME_TOLERANCE = float(os.environ.get('PERF_TIME_TOLERANCE', 1))
+TIME_SLACK_MS = float(os.environ.get('PERF_TIME_SLACK_MS', 20))
+RUNS = 5
+USERS = 10
+GROUPS = 5
+POSTS = 300
+
+
+def measure(action):
+    """Выполняет действие и возвращает его запросы, память и время."""
+    action()
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        action()
+        timings.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    with CaptureQueriesContext(connection) as queries:
+        action()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'queries': len(queries),
+        'memory_kb': round(peak / 1024, 1),
+        'time_ms': round(statistics.median(timings), 2),
+    }
+
+
+@tag('performance')
+class PerformanceTests(TestCase):
+    """Класс тестирования бюджетов производительности."""
+
+    results = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        """Заполняет базу данными для измерений."""
+        users = [
+            User.objects.create_user(username=f'user{i}')
+            for i in range(USERS)
+        ]
+        Group.objects.bulk_create(
+            Group(
+                title=f'Группа {i}',
+                slug=f'group-{i}',
+                description=f'Описание группы {i}'
+            )
+            for i in range(GROUPS)
+        )
+        groups = list(Group.objects.order_by('pk'))
+        now = timezone.now()
+        posts = [
+            Post(
+                author=users[i % USERS],
+                group=groups[i % GROUPS] if i % 3 else None,
+                text=f'Текст записи номер {i} ' * 5,
+            )
+            for i in range(POSTS)
+        ]
+        for post in posts:
+            post.render(set())
+        Post.objects.bulk_create(posts)
+        cls.user = users[0]
+        cls.group = groups[0]
+        cls.post = cls.user.posts.first()
+        cls.year = now.year
+        with open(BASELINE_PATH, encoding='utf-8') as file:
+            cls.baseline = {} if UPDATE_BASELINE else json.load(file)
+
+    @classmethod
+    def tearDownClass(cls):
+        if UPDATE_BASELINE:
+            with open(BASELINE_PATH, 'w', encoding='utf-8') as file:
+                json.dump(
+                    cls.results, file, indent=2, sort_keys=True,
+                    ensure_ascii=False
+                )
+                file.write('\n')
+        super().tearDownClass()
+
+    def setUp(self):
+        """Метод с фикстурами."""
+        self.client = Client()
+        self.client.force_login(PerformanceTests.user)
+
+    def check_budget(self, name, action):
+        result = measure(action)
+        PerformanceTests.results[name] = result
+        if UPDATE_BASELINE:
+            return
+        baseline = PerformanceTests.baseline.get(name)
+        self.assertIsNotNone(
+            baseline,
+            f'Нет базовых значений для {name}, '
+            f'обновите их с PERF_UPDATE_BASELINE=1'
+        )
+        budgets = {
+            'queries': baseline['queries'] * (1 + QUERY_TOLERANCE),
+            'memory_kb': baseline['memory_kb'] * (1 + MEMORY_TOLERANCE),
+            'time_ms': (
+                baseline['time_ms'] * (1 + TIME_TOLERANCE) + TIME_SLACK_MS
+            ),
+        }
+        for metric, budget in budgets.items():
+            with self.subTest(name=name, metric=metric):
+                self.assertLessEqual(
+                    result[metric],
+                    budget,
+                    f'{name}: {metric} = {result[metric]} превышает '
+                    f'бюджет {budget:.1f} (базовое значение '
+                    f'{baseline[metric]})'
+                )
+
+    def check_view(self, name, url):
+        def action():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+        self.check_budget(name, action)
+
+    def test_index(self):
+        self.check_view('index', reverse('posts:index') + '?page=3')
+
+    def test_group_posts(self):
+        self.check_view(
+            'group_posts',
+            reverse('posts:group_posts', args=[PerformanceTests.group.slug])
+        )
+
+    def test_profile(self):
+        self.check_view(
+            'profile',
+            reverse('posts:profile', args=[PerformanceTests.user.username])
+        )
+
+    def test_post_detail(self):
+        self.check_view(
+            'post_detail',
+            reverse('posts:post_detail', args=[PerformanceTests.post.pk])
+        )
+
+    def test_post_create(self):
+        self.check_view('post_create', reverse('posts:post_create'))
+
+    def test_post_edit(self):
+        self.check_view(
+            'post_edit',
+            reverse('posts:post_edit', args=[PerformanceTests.post.pk])
+        )
+
+    def test_archive(self):
+        self.check_view(
+            'post_archive',
+            reverse('posts:archive', args=[PerformanceTests.year])
+        )
+        self.check_view(
+            'group_archive',
+            reverse(
+                'posts:group_archive',
+                args=[PerformanceTests.group.slug, PerformanceTests.year]
+            )
+        )
+        self.check_view(
+            'profile_archive',
+            reverse(
+                'posts:profile_archive',
+                args=[PerformanceTests.user.username, PerformanceTests.year]
+            )
+        )
+
+    def test_fragments(self):
+        self.check_view(
+            'index_fragment', reverse('posts:index_fragment')
+        )
+        self.check_view(
+            'group_fragment',
+            reverse(
+                'posts:group_fragment', args=[PerformanceTests.group.slug]
+            )
+        )
+
+    def test_get_page(self):
+        request = RequestFactory().get('/', {'page': 5})
+
+        def action():
+            page = get_page(request, Post.objects.all(), 10)
+            self.assertEqual(len(page.object_list), 10)
+        self.check_budget('get_page', action)
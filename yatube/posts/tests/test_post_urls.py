@@ -0,0 +1,35 @@
+from django.test import SimpleTestCase
+from django.urls import reverse, set_script_prefix
+
+from posts.templatetags.post_urls import group_url, post_url, profile_url
+
+
+class PostUrlsTests(SimpleTestCase):
+    def tearDown(self):
+        set_script_prefix('/')
+
+    def test_same_as_reverse(self):
+        """Теги дают те же адреса, что и reverse()."""
+        cases = (
+            (post_url, 'posts:post_detail', 42),
+            (profile_url, 'posts:profile', 'auth'),
+            (profile_url, 'posts:profile', 'user.name+tag@mail'),
+            (profile_url, 'posts:profile', 'Иван'),
+            (group_url, 'posts:group_posts', 'test-slug_1'),
+        )
+        for tag, name, value in cases:
+            with self.subTest(name=name, value=value):
+                self.assertEqual(tag(value), reverse(name, args=[value]))
+
+    def test_script_prefix(self):
+        """Префикс приложения учитывается и после заполнения кэша."""
+        post_url(1)
+        set_script_prefix('/yatube/')
+        self.assertEqual(post_url(1), '/yatube/posts/1/')
+
+    def test_fallback_to_reverse(self):
+        """Значения, не подходящие маршруту, обрабатывает reverse()."""
+        with self.assertRaisesMessage(Exception, 'Reverse'):
+            group_url('a/b')
+        with self.assertRaisesMessage(Exception, 'Reverse'):
+            profile_url('')
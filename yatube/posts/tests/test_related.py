@@ -0,0 +1,108 @@
+from io import StringIO
+from unittest import mock, skipIf
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import bulk, related
+from ..models import Post, RelatedPost
+
+User = get_user_model()
+
+TEXTS = (
+    'Кошка спит на подоконнике, кошка любит солнце и тёплый плед',
+    'Наша кошка любит спать на подоконнике под солнцем',
+    'Собака гуляет в парке и приносит мяч хозяину',
+    'Собака хозяина приносит мяч после прогулки в парке',
+)
+
+
+def related_ids(post):
+    return list(
+        RelatedPost.objects.filter(post=post).order_by(
+            '-score'
+        ).values_list('related_id', flat=True)
+    )
+
+
+class RelatedPostsTests(TestCase):
+    """Класс тестирования похожих записей."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        cache.clear()
+        self.posts = [
+            Post.objects.create(author=RelatedPostsTests.user, text=text)
+            for text in TEXTS
+        ]
+
+    def test_detail_shows_related(self):
+        """Страница записи показывает сохраненный список."""
+        first, second = self.posts[:2]
+        RelatedPost.objects.create(post=first, related=second, score=0.5)
+        response = Client().get(reverse('posts:post_detail', args=[first.pk]))
+        self.assertEqual(
+            [item.related for item in response.context['related']], [second]
+        )
+        self.assertContains(
+            response, reverse('posts:post_detail', args=[second.pk])
+        )
+
+    def test_related_change_resets_detail(self):
+        """Правка и удаление похожей записи сбрасывают страницы с ней."""
+        first, second, third = self.posts[:3]
+        RelatedPost.objects.create(post=first, related=second, score=0.5)
+        RelatedPost.objects.create(post=first, related=third, score=0.4)
+        url = reverse('posts:post_detail', args=[first.pk])
+        client = Client()
+        client.get(url)
+        second.text = 'Новый текст похожей записи'
+        second.save()
+        self.assertContains(client.get(url), 'Новый текст похожей записи')
+        second.delete()
+        response = client.get(url)
+        self.assertEqual(
+            [item.related for item in response.context['related']], [third]
+        )
+        bulk.bulk_delete(Post.objects.filter(pk=third.pk))
+        self.assertEqual(client.get(url).context['related'], [])
+
+    def test_requires_scipy(self):
+        with mock.patch.object(related, 'sparse', None):
+            with self.assertRaises(CommandError):
+                call_command('related_posts', stdout=StringIO())
+
+    @skipIf(related.sparse is None, 'scipy не установлен')
+    def test_build(self):
+        """Похожими оказываются записи на одну тему."""
+        call_command('related_posts', chunk_size=3, stdout=StringIO())
+        cats, other_cats, dogs, other_dogs = self.posts
+        self.assertEqual(related_ids(cats), [other_cats.pk])
+        self.assertEqual(related_ids(dogs), [other_dogs.pk])
+
+    @skipIf(related.sparse is None, 'scipy не установлен')
+    def test_incremental(self):
+        """Новая запись получает список и попадает в списки старых."""
+        call_command('related_posts', stdout=StringIO())
+        cats = self.posts[0]
+        # Страница записи попадает в кэш.
+        Client().get(reverse('posts:post_detail', args=[cats.pk]))
+        new = Post.objects.create(
+            author=RelatedPostsTests.user,
+            text='Кошка снова спит на подоконнике и любит солнце'
+        )
+        call_command('related_posts', incremental=True, stdout=StringIO())
+        self.assertIn(cats.pk, related_ids(new))
+        self.assertIn(new.pk, related_ids(cats))
+        # Страница записи с изменившимся списком сброшена из кэша.
+        page = Client().get(reverse('posts:post_detail', args=[cats.pk]))
+        self.assertIn(
+            new.pk, [item.related_id for item in page.context['related']]
+        )
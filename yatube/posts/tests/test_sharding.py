@@ -0,0 +1,206 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import AuthorShard, Comment, GlobalId, Group, Post, PostTag
+from ..resharding import _reconcile
+from ..sharding import (ShardRouter, assign_shard, check_configuration,
+                        shard_for_author)
+
+User = get_user_model()
+
+
+@override_settings(POSTS_SHARDS=['default', 'shard1'])
+class ShardingTests(TestCase):
+    """Класс тестирования распределения записей по шардам."""
+
+    databases = {'default', 'shard1'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.users = [
+            User.objects.create_user(username=f'user{i}') for i in range(2)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        GlobalId._seeded = False
+        self.client = Client()
+
+    def create_posts(self):
+        return [
+            Post.objects.create(
+                author=ShardingTests.users[i % 2], group=ShardingTests.group,
+                text=f'#тег запись {i}'
+            )
+            for i in range(4)
+        ]
+
+    def test_posts_on_author_shard(self):
+        """Запись лежит в шарде автора, пользователи - во всех шардах."""
+        aliases = {shard_for_author(user.pk) for user in ShardingTests.users}
+        self.assertEqual(aliases, {'default', 'shard1'})
+        for post in self.create_posts():
+            alias = shard_for_author(post.author_id)
+            self.assertTrue(
+                Post.objects.using(alias).filter(pk=post.pk).exists()
+            )
+            self.assertEqual(
+                PostTag.objects.using(alias).filter(post=post).count(), 1
+            )
+        self.assertEqual(User.objects.using('shard1').count(), 2)
+
+    def test_user_deleted_from_shards(self):
+        """Копия пользователя удаляется из шарда без таблиц auth."""
+        user = User.objects.create_user(username='temporary')
+        self.assertTrue(User.objects.using('shard1').filter(pk=user.pk))
+        user.delete()
+        self.assertFalse(User.objects.using('shard1').filter(pk=user.pk))
+
+    def test_shards_migrate_posts_tables_only(self):
+        router = ShardRouter()
+        self.assertTrue(router.allow_migrate('shard1', 'posts', 'post'))
+        self.assertTrue(router.allow_migrate('shard1', 'auth', 'user'))
+        self.assertFalse(router.allow_migrate('shard1', 'auth', 'group'))
+        self.assertFalse(router.allow_migrate('shard1', 'sessions'))
+        self.assertTrue(router.allow_migrate('default', 'sessions'))
+
+    def test_scatter_gather_feeds(self):
+        """Главная и группа сливают записи всех шардов по дате."""
+        posts = self.create_posts()[::-1]
+        for url in (reverse('posts:index'),
+                    reverse('posts:group_posts', args=['group'])):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(list(response.context['page_obj']), posts)
+                self.assertEqual(response.context['posts'][0], posts[0])
+
+    def test_routed_views(self):
+        """Профиль, запись, правка и комментарий работают в шарде автора."""
+        post = next(
+            post for post in self.create_posts()
+            if shard_for_author(post.author_id) == 'shard1'
+        )
+        author = Client()
+        author.force_login(post.author)
+        response = self.client.get(
+            reverse('posts:profile', args=[post.author.username])
+        )
+        self.assertEqual(response.context['count_posts'], 2)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        self.assertEqual(response.context['post'], post)
+        author.post(
+            reverse('posts:post_edit', args=[post.pk]),
+            {'text': 'Новый текст'}
+        )
+        self.assertEqual(
+            Post.objects.using('shard1').get(pk=post.pk).text, 'Новый текст'
+        )
+        author.post(
+            reverse('posts:add_comment', args=[post.pk]), {'text': 'Ответ'}
+        )
+        self.assertEqual(
+            Comment.objects.using('shard1').get(post_id=post.pk).text,
+            'Ответ'
+        )
+
+    def test_move_author(self):
+        """Команда переносит записи автора вместе с комментариями."""
+        posts = self.create_posts()
+        author = ShardingTests.users[0]
+        source = shard_for_author(author.pk)
+        target = 'shard1' if source == 'default' else 'default'
+        post = posts[0]
+        Comment.objects.create(post=post, author=author, text='Комментарий')
+        call_command('move_author', author.username, target, wait=0,
+                     stdout=StringIO())
+        self.assertEqual(shard_for_author(author.pk), target)
+        self.assertEqual(
+            AuthorShard.objects.values_list('shard', 'copy', 'fenced').get(
+                author=author
+            ),
+            (target, '', False)
+        )
+        self.assertFalse(
+            Post.objects.using(source).filter(author=author).exists()
+        )
+        self.assertEqual(
+            Post.objects.using(target).filter(author=author).count(), 2
+        )
+        self.assertEqual(
+            Comment.objects.using(target).get(post_id=post.pk).text,
+            'Комментарий'
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(len(response.context['page_obj']), 4)
+
+    def test_fenced_writes(self):
+        """Пока автор переносится, его записи и комментарии не меняются."""
+        post = self.create_posts()[0]
+        author = Client()
+        author.force_login(post.author)
+        assign_shard(
+            post.author_id, shard_for_author(post.author_id), fenced=True
+        )
+        requests = (
+            (reverse('posts:post_create'), {'text': 'Новая'}),
+            (reverse('posts:post_edit', args=[post.pk]), {'text': 'Новый'}),
+            (reverse('posts:add_comment', args=[post.pk]), {'text': 'Да'}),
+        )
+        for url, data in requests:
+            with self.subTest(url=url):
+                self.assertEqual(author.post(url, data).status_code, 503)
+        for alias in ('default', 'shard1'):
+            self.assertFalse(
+                Post.objects.using(alias).filter(
+                    text__startswith='Нов'
+                ).exists()
+            )
+            self.assertFalse(Comment.objects.using(alias).exists())
+
+    def test_reconcile_removes_deleted_rows(self):
+        """Удаленное в старом шарде во время копирования не воскресает."""
+        post = self.create_posts()[0]
+        source = shard_for_author(post.author_id)
+        target = 'shard1' if source == 'default' else 'default'
+        Post.objects.using(target).bulk_create([post])
+        Post.objects.using(source).filter(pk=post.pk).delete()
+        _reconcile(post.author_id, source, target, chunk_size=10)
+        self.assertFalse(
+            Post.objects.using(target).filter(pk=post.pk).exists()
+        )
+
+    def test_feed_skips_copies(self):
+        """Копии записей переносимого автора не попадают в ленту."""
+        posts = self.create_posts()
+        author = ShardingTests.users[0]
+        source = shard_for_author(author.pk)
+        target = 'shard1' if source == 'default' else 'default'
+        Post.objects.using(target).bulk_create(
+            post for post in posts if post.author_id == author.pk
+        )
+        assign_shard(author.pk, source, copy=target)
+        response = self.client.get(reverse('posts:index'))
+        page = response.context['page_obj']
+        self.assertEqual(page.paginator.count, 4)
+        self.assertEqual(list(page), posts[::-1])
+
+    def test_multiple_shards_rejected(self):
+        """Сайт не запускается, пока не все страницы читают все шарды."""
+        with self.assertRaises(ImproperlyConfigured):
+            check_configuration()
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post
+
+User = get_user_model()
+
+
+class SharedCacheTests(TestCase):
+    """Общая часть страниц кэшируется, личная - отрисовывается."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Текст')
+        cls.detail_url = reverse('posts:post_detail', args=[cls.post.pk])
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client(enforce_csrf_checks=True)
+        self.author_client.force_login(SharedCacheTests.author)
+        self.reader_client = Client(enforce_csrf_checks=True)
+        self.reader_client.force_login(SharedCacheTests.reader)
+
+    def test_header_per_user(self):
+        """Шапка у каждого своя при общей ленте."""
+        self.author_client.get(reverse('posts:index'))
+        response = self.reader_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пользователь: reader')
+        self.assertNotContains(response, 'Пользователь: author')
+        self.assertContains(response, 'Текст')
+
+    def test_edit_button_and_csrf(self):
+        """Кнопка правки только у автора, токен CSRF у каждого свой."""
+        response = self.author_client.get(SharedCacheTests.detail_url)
+        self.assertContains(response, 'Редактировать запись')
+        response = self.reader_client.get(SharedCacheTests.detail_url)
+        self.assertNotContains(response, 'Редактировать запись')
+        self.assertNotContains(response, 'csrf-hole')
+        token = response.context['csrf_token']
+        self.assertContains(response, f'value="{token}"')
+        response = self.reader_client.post(
+            reverse('posts:add_comment', args=[SharedCacheTests.post.pk]),
+            {'text': 'Комментарий', 'csrfmiddlewaretoken': str(token)}
+        )
+        self.assertEqual(response.status_code, 302)
+        response = self.reader_client.get(SharedCacheTests.detail_url)
+        self.assertContains(response, 'Комментарий')
+
+    def test_body_from_cache(self):
+        """Повторная лента для гостя не обращается к базе."""
+        client = Client()
+        client.get(reverse('posts:index'))
+        with self.assertNumQueries(0):
+            response = client.get(reverse('posts:index'))
+        self.assertContains(response, 'Текст')
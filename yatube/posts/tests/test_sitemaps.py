@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import sitemaps
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class SitemapTests(TestCase):
+    """Класс тестирования карты сайта."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Метод с фикстурами."""
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {i}')
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        """Метод с фикстурами."""
+        cache.clear()
+        self.client = Client()
+
+    @mock.patch('posts.sitemaps.CHUNK_SIZE', 2)
+    def test_index_lists_chunks(self):
+        """Индекс ссылается на файлы по диапазонам ключей."""
+        content = self.client.get(reverse('posts:sitemap')).content.decode()
+        last_chunk = SitemapTests.posts[-1].pk // 2
+        self.assertIn(
+            'http://testserver'
+            + reverse('posts:sitemap_section', args=['posts', last_chunk]),
+            content
+        )
+        self.assertIn('sitemap-groups-0.xml', content)
+        self.assertIn('sitemap-profiles-0.xml', content)
+
+    def test_section_is_cached_until_change(self):
+        """Файл раздела берется из кэша, пока объекты не изменятся."""
+        url = reverse('posts:sitemap_section', args=['posts', 0])
+        content = self.client.get(url).content.decode()
+        post = SitemapTests.posts[0]
+        self.assertIn(
+            'http://testserver'
+            + reverse('posts:post_detail', args=[post.pk]),
+            content
+        )
+        # Из базы читаются только последние pk записей и архива.
+        with self.assertNumQueries(2):
+            self.client.get(url)
+        new_post = Post.objects.create(author=SitemapTests.user, text='Новый')
+        content = self.client.get(url).content.decode()
+        self.assertIn(
+            reverse('posts:post_detail', args=[new_post.pk]), content
+        )
+
+    def test_unknown_section(self):
+        response = self.client.get(
+            reverse('posts:sitemap_section', args=['comments', 0])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_chunk_beyond_last_pk(self):
+        """Файлы за последним pk раздела не собираются и не кэшируются."""
+        chunk = sitemaps.chunk_of(SitemapTests.posts[-1].pk) + 1
+        response = self.client.get(
+            reverse('posts:sitemap_section', args=['posts', chunk])
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertIsNone(
+            cache.get(sitemaps.SITEMAP_KEY.format('posts', chunk))
+        )
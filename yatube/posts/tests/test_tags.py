@@ -0,0 +1,81 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Mention, Post, PostTag
+from ..views import LIMIT
+
+User = get_user_model()
+
+
+class TagsTests(TestCase):
+    """Класс тестирования тегов и упоминаний."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(TagsTests.reader)
+
+    def test_index_on_save(self):
+        """Теги и упоминания обновляются при правке записи."""
+        post = Post.objects.create(
+            author=TagsTests.author, text='#Python для @reader и @nobody'
+        )
+        self.assertEqual(
+            list(post.post_tags.values_list('tag__name', flat=True)),
+            ['python']
+        )
+        self.assertEqual(post.mentions.get().user, TagsTests.reader)
+        self.assertIn(reverse('posts:tag_posts', args=['python']),
+                      post.text_html)
+        post.text = '#django'
+        post.save()
+        self.assertEqual(
+            list(post.post_tags.values_list('tag__name', flat=True)),
+            ['django']
+        )
+        self.assertFalse(post.mentions.exists())
+
+    def test_tag_page_keyset(self):
+        """Страница тега листается курсором без OFFSET."""
+        posts = [
+            Post.objects.create(author=TagsTests.author, text=f'#тег {i}')
+            for i in range(LIMIT + 2)
+        ]
+        url = reverse('posts:tag_posts', args=['Тег'])
+        response = self.client.get(url)
+        self.assertEqual(response.context['posts'], posts[::-1][:LIMIT])
+        response = self.client.get(
+            url, {'cursor': response.context['next_cursor']}
+        )
+        self.assertEqual(response.context['posts'], posts[1::-1])
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertEqual(self.client.get(url, {'cursor': 'x'}).status_code,
+                         400)
+
+    def test_mentions_feed(self):
+        """Лента упоминаний только для вошедшего пользователя."""
+        post = Post.objects.create(author=TagsTests.author, text='@reader')
+        Post.objects.create(author=TagsTests.author, text='@author')
+        response = self.client.get(reverse('posts:mentions'))
+        self.assertEqual(response.context['posts'], [post])
+        self.assertEqual(Client().get(reverse('posts:mentions')).status_code,
+                         302)
+
+    def test_backfill(self):
+        """Команда заполняет теги записей, созданных в обход save()."""
+        Post.objects.bulk_create(
+            Post(author=TagsTests.author, text=f'#старое @reader {i}')
+            for i in range(3)
+        )
+        call_command('index_tags', chunk_size=2, stdout=StringIO())
+        self.assertEqual(PostTag.objects.count(), 3)
+        self.assertEqual(Mention.objects.count(), 3)
@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import utils
+from ..models import Post
+from ..utils import ELLIPSIS, ElidedPaginator
+
+User = get_user_model()
+
+
+class ElidedPaginatorTests(TestCase):
+    def test_elided_range(self):
+        """Окно вокруг текущей страницы и края списка."""
+        paginator = ElidedPaginator(range(1000), 10)
+        cases = {
+            1: [1, 2, 3, 4, ELLIPSIS, 99, 100],
+            50: [1, 2, ELLIPSIS, 47, 48, 49, 50, 51, 52, 53, ELLIPSIS,
+                 99, 100],
+            100: [1, 2, ELLIPSIS, 97, 98, 99, 100],
+        }
+        for number, expected in cases.items():
+            with self.subTest(number=number):
+                self.assertEqual(
+                    list(paginator.get_elided_page_range(number)), expected
+                )
+
+    def test_short_range(self):
+        """Немного страниц показываются целиком."""
+        paginator = ElidedPaginator(range(100), 10)
+        self.assertEqual(
+            paginator.get_page(5).elided_range, list(range(1, 11))
+        )
+
+    def test_index_navigation(self):
+        """Размер навигации на главной не зависит от числа страниц."""
+        cache.clear()
+        user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            Post(author=user, text=f'Пост {i}') for i in range(500)
+        )
+        response = self.client.get(reverse('posts:index'), {'page': 25})
+        content = response.content.decode()
+        self.assertIn('?page=50', content)
+        self.assertNotIn('?page=40"', content)
+        self.assertLess(content.count('page-link'), 20)
+
+    def test_cached_pages_bounded(self):
+        """Любая запись ?page= попадает в одну из существующих страниц."""
+        cache.clear()
+        user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            Post(author=user, text=f'Пост {i}') for i in range(15)
+        )
+        cases = {
+            '': 1, '1': 1, '0001': 1, 'last': 1, '-1': 2,
+            '2': 2, '002': 2, '99999': 2,
+        }
+        with mock.patch.object(
+            utils, 'get_or_compute', wraps=utils.get_or_compute
+        ) as get_or_compute:
+            for page, number in cases.items():
+                with self.subTest(page=page):
+                    response = self.client.get(
+                        reverse('posts:index'), {'page': page}
+                    )
+                    self.assertEqual(
+                        response.context['page_obj'].number, number
+                    )
+        keys = {call.args[0] for call in get_or_compute.call_args_list}
+        self.assertEqual(keys, {
+            'posts:count:index', 'posts:page:index:1', 'posts:page:index:2'
+        })
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import feeds, fragments, live, sitemaps, tags, views
 
 app_name = 'posts'
 
@@ -9,5 +9,72 @@ urlpatterns = [
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
-    path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit')
+    path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/comment/',
+        views.add_comment,
+        name='add_comment'
+    ),
+    path('archive/<int:year>/', views.post_archive, name='archive'),
+    path(
+        'archive/<int:year>/<int:month>/',
+        views.post_archive,
+        name='archive_month'
+    ),
+    path(
+        'group/<slug>/archive/<int:year>/',
+        views.group_archive,
+        name='group_archive'
+    ),
+    path(
+        'group/<slug>/archive/<int:year>/<int:month>/',
+        views.group_archive,
+        name='group_archive_month'
+    ),
+    path(
+        'profile/<str:username>/archive/<int:year>/',
+        views.profile_archive,
+        name='profile_archive'
+    ),
+    path(
+        'profile/<str:username>/archive/<int:year>/<int:month>/',
+        views.profile_archive,
+        name='profile_archive_month'
+    ),
+    path(
+        'feeds/<str:kind>/',
+        feeds.index_feed,
+        name='feed'
+    ),
+    path(
+        'group/<slug>/feeds/<str:kind>/',
+        feeds.group_feed,
+        name='group_feed'
+    ),
+    path(
+        'profile/<str:username>/feeds/<str:kind>/',
+        feeds.author_feed,
+        name='profile_feed'
+    ),
+    path('tag/<str:name>/', tags.tag_posts, name='tag_posts'),
+    path('mentions/', tags.mentions, name='mentions'),
+    path('sitemap.xml', sitemaps.sitemap_index, name='sitemap'),
+    path(
+        'sitemap-<str:section>-<int:chunk>.xml',
+        sitemaps.sitemap_section,
+        name='sitemap_section'
+    ),
+    path('fragment/', fragments.index_fragment, name='index_fragment'),
+    path('new/', live.index_new, name='index_new'),
+    path('group/<slug>/new/', live.group_new, name='group_new'),
+    path(
+        'group/<slug>/fragment/',
+        fragments.group_fragment,
+        name='group_fragment'
+    ),
+    path(
+        'profile/<str:username>/fragment/',
+        fragments.profile_fragment,
+        name='profile_fragment'
+    ),
 ]
@@ -1,7 +1,79 @@
-from django.core.paginator import Paginator
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+
+from posts.cache import get_or_compute, get_version
+
+ELLIPSIS = '…'
+
+
+class ElidedPage(Page):
+    @property
+    def elided_range(self):
+        return list(self.paginator.get_elided_page_range(self.number))
+
+
+class ElidedPaginator(Paginator):
+    """Паджинатор с сокращённым списком номеров страниц.
+
+    Навигация содержит только первые и последние страницы и окно вокруг
+    текущей, поэтому её размер не зависит от количества страниц.
+    """
+
+    on_each_side = 3
+    on_ends = 2
+
+    def _get_page(self, *args, **kwargs):
+        return ElidedPage(*args, **kwargs)
+
+    def get_elided_page_range(self, number=1):
+        number = self.validate_number(number)
+        num_pages = self.num_pages
+        window = self.on_each_side
+        ends = self.on_ends
+        if num_pages <= (window + ends) * 2:
+            yield from range(1, num_pages + 1)
+            return
+        if number > 1 + window + ends + 1:
+            yield from range(1, ends + 1)
+            yield ELLIPSIS
+            yield from range(number - window, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < num_pages - window - ends - 1:
+            yield from range(number + 1, number + window + 1)
+            yield ELLIPSIS
+            yield from range(num_pages - ends + 1, num_pages + 1)
+        else:
+            yield from range(number + 1, num_pages + 1)
 
 
 def get_page(request, item, limit):
-    paginator = Paginator(item, limit)
+    paginator = ElidedPaginator(item, limit)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+def get_cached_page(request, items, limit, key, scope):
+    """Страница из кэша, общая для всех запросов к версии scope.
+
+    Количество записей и записи каждой страницы кэшируются отдельно,
+    поэтому ни count(), ни выборка страницы не повторяются до изменения
+    области. Номер страницы сначала приводится к существующему, так что
+    в кэше не больше num_pages страниц, как бы ни был записан ?page=.
+    """
+    paginator = ElidedPaginator(items, limit)
+    version = get_version(scope)
+    paginator.count = get_or_compute(
+        f'posts:count:{key}', lambda: paginator.count, version
+    )
+    try:
+        number = paginator.validate_number(request.GET.get('page'))
+    except PageNotAnInteger:
+        number = 1
+    except EmptyPage:
+        number = paginator.num_pages
+    object_list = get_or_compute(
+        f'posts:page:{key}:{number}',
+        lambda: list(paginator.page(number).object_list),
+        version
+    )
+    return paginator._get_page(object_list, number, paginator)
@@ -1,22 +1,44 @@
+import datetime
+
 from django.contrib.auth import get_user
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.utils import timezone
 
-from posts.forms import PostForm
-from posts.models import Group, Post, User
-from posts.utils import get_page
+from posts import archive
+from posts.cache import get_or_compute, get_version, post_scope
+from posts.forms import CommentForm, PostForm
+from posts.cold_storage import ChainedPosts, get_post_or_404
+from posts.groups import get_group_or_404
+from posts.models import ArchivedPost, Comment, Post, RelatedPost, User
+from posts.sharding import (
+    SHARD_TIMEOUT, ShardedPosts, find_post, writes_fenced
+)
+from posts.utils import get_cached_page, get_page
 
 LIMIT = 10
+COMMENTS_LIMIT = 50
+RELATED_LIMIT = 5
+# Поля, которые не нужны в лентах: там выводится только excerpt.
+FULL_TEXT_FIELDS = ('text', 'text_html')
 
 
 def index(request):
     """Метод отображения главной страницы сайта."""
     template = 'posts/index.html'
-    posts = Post.objects.all()
-    page_obj = get_page(request, posts, LIMIT)
+    posts = ShardedPosts(
+        Post.objects.select_related('author', 'group').defer(
+            *FULL_TEXT_FIELDS
+        )
+    )
+    page_obj = get_cached_page(
+        request, posts, LIMIT, 'index', archive.SCOPE_ALL
+    )
     context = {
         'page_obj': page_obj,
-        'posts': posts
+        'posts': posts,
+        'body_scope': archive.SCOPE_ALL,
     }
     return render(request, template, context)
 
@@ -24,13 +46,17 @@ def index(request):
 def group_posts(request, slug):
     """Метод отображения страницы с постами группы."""
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = get_page(request, posts, LIMIT)
+    group = get_group_or_404(slug)
+    posts = ShardedPosts(
+        group.posts.select_related('author').defer(*FULL_TEXT_FIELDS)
+    )
+    scope = archive.group_scope(group.pk)
+    page_obj = get_cached_page(request, posts, LIMIT, scope, scope)
     context = {
         'group': group,
         'posts': posts,
         'page_obj': page_obj,
+        'body_scope': scope,
     }
     return render(request, template, context)
 
@@ -39,30 +65,120 @@ def profile(request, username):
     """Метод отображения страницы профиля пользователя."""
     template = 'posts/profile.html'
     user = get_object_or_404(User, username=username)
-    posts = user.posts.all()
-    page_obj = get_page(request, posts, LIMIT)
-    count_posts = posts.count()
+    posts = ChainedPosts(
+        user.posts.select_related('author', 'group').defer(
+            *FULL_TEXT_FIELDS
+        ),
+        user.archived_posts.select_related('author', 'group').defer(
+            *FULL_TEXT_FIELDS
+        )
+    )
+    scope = archive.author_scope(user.pk)
+    page_obj = get_cached_page(request, posts, LIMIT, scope, scope)
     context = {
         'username': user,
         'posts': posts,
         'page_obj': page_obj,
-        'count_posts': count_posts,
+        'count_posts': page_obj.paginator.count,
+        'body_scope': scope,
     }
     return render(request, template, context)
 
 
+def _post_with_comments(post_id, after=None):
+    """Запись, похожие записи и страница комментариев после пути after."""
+    post = get_post_or_404(post_id)
+    if post.is_archived:
+        # Записи с комментариями в архив не переносятся.
+        comments = Comment.objects.none()
+        related = []
+    else:
+        comments = post.comments.select_related('author')
+        # Списки заранее рассчитаны командой related_posts.
+        related = list(
+            RelatedPost.objects.using(post._state.db).filter(
+                post_id=post.pk
+            ).select_related('related__author').defer(
+                *(f'related__{name}' for name in FULL_TEXT_FIELDS)
+            ).order_by('-score')[:RELATED_LIMIT]
+        )
+    if after:
+        comments = comments.filter(path__gt=after)
+    comments = list(comments[:COMMENTS_LIMIT + 1])
+    next_comments = None
+    if len(comments) > COMMENTS_LIMIT:
+        comments = comments[:COMMENTS_LIMIT]
+        next_comments = comments[-1].path
+    return post, related, comments, next_comments
+
+
 def post_detail(request, post_id):
     """Метод отображения страницы с описанием поста."""
-    post = get_object_or_404(
-        Post.objects.select_related('group', 'author'),
-        pk=post_id
-    )
+    after = request.GET.get('comments_after')
+    if after:
+        post, related, comments, next_comments = _post_with_comments(
+            post_id, after
+        )
+        # Продолжения комментариев не кэшируются: ключей было бы
+        # столько же, сколько комментариев.
+        scope = None
+    else:
+        scope = post_scope(post_id)
+        post, related, comments, next_comments = get_or_compute(
+            f'posts:detail:{post_id}',
+            lambda: _post_with_comments(post_id),
+            get_version(scope)
+        )
+    if request.user.is_anonymous:
+        viewer = 'guest'
+    elif request.user.pk == post.author_id:
+        viewer = 'author'
+    else:
+        viewer = 'user'
     context = {
         'post': post,
+        'related': related,
+        'comments': comments,
+        'next_comments': next_comments,
+        'comment_form': CommentForm(),
+        'body_scope': scope,
+        'viewer': viewer,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def _fenced(author_id):
+    """Ответ 503, пока записи автора переносятся в другой шард."""
+    if not writes_fenced(author_id):
+        return None
+    response = HttpResponse(
+        'Записи автора переносятся, повторите через минуту', status=503
+    )
+    response['Retry-After'] = str(SHARD_TIMEOUT)
+    return response
+
+
+@login_required
+def add_comment(request, post_id):
+    """Добавление комментария или ответа на комментарий."""
+    post = find_post(post_id)
+    if post is None:
+        raise Http404('Запись не найдена')
+    fenced = _fenced(post.author_id)
+    if fenced is not None:
+        return fenced
+    form = CommentForm(request.POST or None)
+    if form.is_valid():
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post = post
+        parent_id = form.cleaned_data['parent']
+        if parent_id:
+            comment.parent = get_object_or_404(post.comments, pk=parent_id)
+        comment.save()
+    return redirect('posts:post_detail', post_id)
+
+
 @login_required
 def post_create(request):
     """Создание новой записи."""
@@ -70,12 +186,14 @@ def post_create(request):
     user = get_user(request)
     form = PostForm(request.POST or None)
     if request.method == 'POST':
+        fenced = _fenced(user.pk)
+        if fenced is not None:
+            return fenced
         if form.is_valid():
             post = form.save(commit=False)
             post.author = user
             post.save()
             return redirect('posts:profile', user.username)
-    form = PostForm()
     return render(request, template, {'form': form})
 
 
@@ -83,7 +201,9 @@ def post_create(request):
 def post_edit(request, post_id):
     """Редактирование записи."""
     template = 'posts/create_post.html'
-    post = get_object_or_404(Post, pk=post_id)
+    post = find_post(post_id)
+    if post is None:
+        raise Http404('Запись не найдена')
     form = PostForm(request.POST or None, instance=post)
     context = {
         'post': post,
@@ -91,6 +211,9 @@ def post_edit(request, post_id):
         'form': form
     }
     if request.method == "POST":
+        fenced = _fenced(post.author_id)
+        if fenced is not None:
+            return fenced
         if form.is_valid():
             form.save()
             return redirect('posts:post_detail', post_id)
@@ -98,3 +221,65 @@ def post_edit(request, post_id):
         return render(request, template, context)
     else:
         return redirect('posts:post_detail', post_id)
+
+
+def _month_range(year, month=None):
+    """Границы года или месяца в текущей временной зоне."""
+    if month is not None and not 1 <= month <= 12:
+        raise Http404('Нет такого месяца')
+    try:
+        start = datetime.datetime(year, month or 1, 1)
+        if month is None or month == 12:
+            end = datetime.datetime(year + 1, 1, 1)
+        else:
+            end = datetime.datetime(year, month + 1, 1)
+    except ValueError:
+        raise Http404('Нет такого года')
+    return timezone.make_aware(start), timezone.make_aware(end)
+
+
+def _archive(request, posts, cold_posts, scope, year, month, context):
+    """Общая часть страниц архива."""
+    start, end = _month_range(year, month)
+    posts = ChainedPosts(*(
+        queryset.filter(
+            pub_date__gte=start, pub_date__lt=end
+        ).defer(*FULL_TEXT_FIELDS)
+        for queryset in (posts, cold_posts)
+    ))
+    context.update({
+        'year': year,
+        'month': month and datetime.date(year, month, 1),
+        'month_counts': archive.month_counts(scope, year),
+        'page_obj': get_page(request, posts, LIMIT),
+    })
+    return render(request, 'posts/archive.html', context)
+
+
+def post_archive(request, year, month=None):
+    """Метод отображения архива записей за год или месяц."""
+    return _archive(
+        request, Post.objects.select_related('author', 'group'),
+        ArchivedPost.objects.select_related('author', 'group'),
+        archive.SCOPE_ALL, year, month, {}
+    )
+
+
+def group_archive(request, slug, year, month=None):
+    """Метод отображения архива записей группы."""
+    group = get_group_or_404(slug)
+    return _archive(
+        request, group.posts.select_related('author'),
+        group.archived_posts.select_related('author'),
+        archive.group_scope(group.pk), year, month, {'group': group}
+    )
+
+
+def profile_archive(request, username, year, month=None):
+    """Метод отображения архива записей пользователя."""
+    author = get_object_or_404(User, username=username)
+    return _archive(
+        request, author.posts.select_related('author', 'group'),
+        author.archived_posts.select_related('author', 'group'),
+        archive.author_scope(author.pk), year, month, {'author': author}
+    )
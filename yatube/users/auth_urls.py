@@ -0,0 +1,41 @@
+"""Маршруты django.contrib.auth.urls с отложенным импортом view."""
+from django.urls import path
+
+from core.lazy import lazy_view
+
+AUTH_VIEWS = 'django.contrib.auth.views.'
+
+urlpatterns = [
+    path('login/', lazy_view(AUTH_VIEWS + 'LoginView'), name='login'),
+    path('logout/', lazy_view(AUTH_VIEWS + 'LogoutView'), name='logout'),
+    path(
+        'password_change/',
+        lazy_view(AUTH_VIEWS + 'PasswordChangeView'),
+        name='password_change'
+    ),
+    path(
+        'password_change/done/',
+        lazy_view(AUTH_VIEWS + 'PasswordChangeDoneView'),
+        name='password_change_done'
+    ),
+    path(
+        'password_reset/',
+        lazy_view(AUTH_VIEWS + 'PasswordResetView'),
+        name='password_reset'
+    ),
+    path(
+        'password_reset/done/',
+        lazy_view(AUTH_VIEWS + 'PasswordResetDoneView'),
+        name='password_reset_done'
+    ),
+    path(
+        'reset/<uidb64>/<token>/',
+        lazy_view(AUTH_VIEWS + 'PasswordResetConfirmView'),
+        name='password_reset_confirm'
+    ),
+    path(
+        'reset/done/',
+        lazy_view(AUTH_VIEWS + 'PasswordResetCompleteView'),
+        name='password_reset_complete'
+    ),
+]
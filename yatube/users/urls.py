@@ -1,31 +1,36 @@
-from django.contrib.auth.views import (
-    LogoutView, LoginView, PasswordChangeDoneView
-)
 from django.urls import path
-from users import views
+
+from core.lazy import lazy_view
 
 app_name = 'users'
 
 urlpatterns = [
     path(
         'logout/',
-        LogoutView.as_view(template_name='users/logged_out.html'),
+        lazy_view(
+            'django.contrib.auth.views.LogoutView',
+            template_name='users/logged_out.html'
+        ),
         name='logout'
     ),
-    path('signup/', views.SignUp.as_view(), name='signup'),
+    path('signup/', lazy_view('users.views.SignUp'), name='signup'),
     path(
         'login/',
-        LoginView.as_view(template_name='users/login.html'),
+        lazy_view(
+            'django.contrib.auth.views.LoginView',
+            template_name='users/login.html'
+        ),
         name='login'
     ),
     path(
         'password_change/',
-        views.PasswordChange.as_view(),
+        lazy_view('users.views.PasswordChange'),
         name='password_change',
     ),
     path(
         'password_change/done/',
-        PasswordChangeDoneView.as_view(
+        lazy_view(
+            'django.contrib.auth.views.PasswordChangeDoneView',
             template_name='users/password_change_done.html'
         ),
         name='password_change_done',
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import sys
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -46,7 +47,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'posts',
+    'posts.apps.PostsConfig',
     'core',
     'users.apps.UsersConfig',
 ]
@@ -57,6 +58,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -91,9 +93,84 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    },
+}
+
+# Базы, между которыми записи распределяются по автору, например
+# YATUBE_POSTS_SHARDS=default,shard1. В 'default' остаются справочник
+# шардов и последовательность pk; пользователи и группы копируются во
+# все шарды. Схема каждой базы создается manage.py migrate --database.
+# Пока ленты, архив, дайджесты и другие части сайта читают только
+# 'default', запуск с несколькими шардами отклоняется (posts.sharding).
+POSTS_SHARDS = os.environ.get('YATUBE_POSTS_SHARDS', 'default').split(',')
+SHARD_DATABASES = [alias for alias in POSTS_SHARDS if alias != 'default']
+# Тесты переноса авторов работают со второй базой 'shard1'.
+if sys.argv[1:2] == ['test'] and 'shard1' not in SHARD_DATABASES:
+    SHARD_DATABASES.append('shard1')
+for alias in SHARD_DATABASES:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db_{alias}.sqlite3'),
+    }
+# Роутер нужен, только когда баз записей несколько.
+DATABASE_ROUTERS = ['posts.sharding.ShardRouter'] if SHARD_DATABASES else []
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+# Общий для WSGI-процессов хоста кэш в отображенном в память файле.
+# Включается указанием пути к файлу кэша в YATUBE_SHARED_CACHE.
+if os.environ.get('YATUBE_SHARED_CACHE'):
+    CACHES['default'] = {
+        'BACKEND': 'core.cache.SharedMemoryCache',
+        'LOCATION': os.environ['YATUBE_SHARED_CACHE'],
+        'OPTIONS': {
+            'SLOTS': 65536,
+            'SLOT_SIZE': 16384,
+            # Большие значения (страницы, карта сайта) лежат в файлах
+            # рядом с кэшем; больше этого размера не кэшируются.
+            'MAX_VALUE_SIZE': 8 * 1024 * 1024,
+        },
+    }
+
+
+# Rate limiting: частота запросов к страницам по имени URL.
+# Корзины токенов хранятся в кэше RATELIMIT_CACHE, общем для процессов.
+
+RATELIMIT_CACHE = 'default'
+RATELIMIT_METHODS = ('POST',)
+# Адреса обратных прокси через запятую: от них адрес клиента берется
+# из X-Forwarded-For, иначе все клиенты за прокси делят одну корзину.
+RATELIMIT_TRUSTED_PROXIES = tuple(
+    filter(None, os.environ.get('YATUBE_TRUSTED_PROXIES', '').split(','))
+)
+RATELIMITS = {
+    'posts:post_create': '30/m',
+    'posts:post_edit': '60/m',
+    'posts:add_comment': '30/m',
+    'users:signup': '10/m',
+    'users:login': '20/m',
+}
+
+
+# Записи старше этого количества дней переносятся в архивную таблицу
+# командой archive_posts.
+
+POSTS_ARCHIVE_AFTER_DAYS = 365
+
+# Запись, похожая на раннюю, сохраняется и помечается в
+# PostSignature.duplicate_of. С YATUBE_REJECT_DUPLICATES=1 такие записи
+# отклоняются формой.
+
+POSTS_REJECT_DUPLICATES = os.environ.get('YATUBE_REJECT_DUPLICATES') == '1'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
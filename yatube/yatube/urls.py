@@ -20,6 +20,6 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('posts.urls', namespace='posts')),
     path('auth/', include('users.urls')),
-    path('auth/', include('django.contrib.auth.urls')),
+    path('auth/', include('users.auth_urls')),
     path('about/', include('about.urls', namespace='about')),
 ]